@@ -0,0 +1,315 @@
+"""
+Zoom animations along a keyframed path
+
+    python animation.py zoom.y4m --size 640 360 --frames 300 \
+        --keyframe -0.5 0 1 --keyframe -0.743643887 0.131825904 1e5
+
+Each frame is resampled from the previous one, and only the pixels whose
+neighbourhood in the previous frame is not uniform are iterated again.
+Finished frames pass through a bounded queue to a writer thread, so the
+next frame is computed while the previous one is encoded.
+"""
+import argparse
+import math
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+from numba import njit, prange
+
+from color_handler import ColorHandler
+from fractal_generator import FractalGenerator, SOLVERS
+from image_writer import PNGWriter
+from kernels import escape_time
+from settings import DEEP_ZOOM_THRESHOLD, MAX_ITER
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def resample_frame(prev, prev_xmin, prev_ymin, prev_step_x, prev_step_y, prev_max_iter,
+                   xmin, ymin, step_x, step_y, max_iter, is_julia, c, out):
+    """
+    Fill `out` from the previous frame where it is uniform around a pixel
+    A pixel is copied when the 4x4 block of previous samples around it
+    shares one escape count (still valid at the new iteration limit);
+    all others are iterated. Returns the number of copied pixels.
+    """
+    height, width = out.shape
+    prev_height, prev_width = prev.shape
+    reused = np.zeros(height, dtype=np.int64)
+
+    for i in prange(height):
+        imag = ymin + i * step_y
+        y0 = int(math.floor((imag - prev_ymin) / prev_step_y))
+        for j in range(width):
+            real = xmin + j * step_x
+            x0 = int(math.floor((real - prev_xmin) / prev_step_x))
+
+            if 1 <= x0 < prev_width - 2 and 1 <= y0 < prev_height - 2:
+                value = prev[y0, x0]
+                # Interior counts only hold for the iteration limit they were found at
+                uniform = value < prev_max_iter - 1 or max_iter == prev_max_iter
+                for a in range(y0 - 1, y0 + 3):
+                    for b in range(x0 - 1, x0 + 3):
+                        if prev[a, b] != value:
+                            uniform = False
+                if uniform:
+                    out[i, j] = value
+                    reused[i] += 1
+                    continue
+
+            out[i, j] = escape_time(real, imag, max_iter, is_julia, c, True, True)
+
+    return reused.sum()
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def rgb_to_yuv444(rgb, out):
+    """Full-range BT.601 conversion into Y, U and V planes"""
+    for i in prange(rgb.shape[0]):
+        for j in range(rgb.shape[1]):
+            r = np.float32(rgb[i, j, 0])
+            g = np.float32(rgb[i, j, 1])
+            b = np.float32(rgb[i, j, 2])
+            out[0, i, j] = np.uint8(min(max(0.299 * r + 0.587 * g + 0.114 * b + 0.5, 0.0), 255.0))
+            out[1, i, j] = np.uint8(min(max(-0.168736 * r - 0.331264 * g + 0.5 * b + 128.5, 0.0), 255.0))
+            out[2, i, j] = np.uint8(min(max(0.5 * r - 0.418688 * g - 0.081312 * b + 128.5, 0.0), 255.0))
+
+
+class Y4MSink:
+    def __init__(self, path, width, height, fps):
+        """YUV4MPEG2 video, 4:4:4 full range, readable by ffmpeg and most players"""
+        self._file = open(path, 'wb')
+        self._file.write(f"YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 C444 XCOLORRANGE=FULL\n".encode())
+        self._planes = np.empty((3, height, width), dtype=np.uint8)
+
+    def write(self, frame):
+        rgb_to_yuv444(frame, self._planes)
+        self._file.write(b'FRAME\n')
+        self._file.write(self._planes.tobytes())
+
+    def close(self):
+        self._file.close()
+
+
+class RawSink:
+    def __init__(self, path, width, height, fps):
+        """Concatenated rgb24 frames"""
+        self._file = open(path, 'wb')
+
+    def write(self, frame):
+        self._file.write(frame.tobytes())
+
+    def close(self):
+        self._file.close()
+
+
+class PNGSequenceSink:
+    def __init__(self, pattern, width, height, fps):
+        """One PNG per frame, named by formatting the frame number into `pattern`"""
+        self.pattern = pattern
+        self.width = width
+        self.height = height
+        self.index = 0
+        directory = os.path.dirname(pattern)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        writer = PNGWriter(self.pattern % self.index, self.width, self.height)
+        writer.write(frame)
+        writer.close()
+        self.index += 1
+
+    def close(self):
+        pass
+
+
+def open_sink(path, width, height, fps):
+    """Video sink chosen from the output path"""
+    if '%' in path:
+        return PNGSequenceSink(path, width, height, fps)
+    if path.lower().endswith('.y4m'):
+        return Y4MSink(path, width, height, fps)
+    return RawSink(path, width, height, fps)
+
+
+def interpolate_path(keyframes, frame_count):
+    """
+    (x, y, zoom) for every frame of a path through evenly spaced keyframes
+    Zoom changes geometrically; within a segment the center moves in
+    proportion to the change of span, so zooming into a point keeps it still.
+    """
+    if len(keyframes) == 1 or frame_count == 1:
+        return [tuple(keyframes[0])] * frame_count
+
+    path = []
+    for frame in range(frame_count):
+        u = frame * (len(keyframes) - 1) / (frame_count - 1)
+        k = min(int(u), len(keyframes) - 2)
+        s = u - k
+        x0, y0, zoom0 = keyframes[k]
+        x1, y1, zoom1 = keyframes[k + 1]
+
+        zoom = zoom0 * (zoom1 / zoom0) ** s
+        if zoom0 != zoom1:
+            s = (1 / zoom - 1 / zoom0) / (1 / zoom1 - 1 / zoom0)
+        path.append((x0 + (x1 - x0) * s, y0 + (y1 - y0) * s, zoom))
+    return path
+
+
+class ZoomAnimation:
+    def __init__(self, width, height, max_iter=MAX_ITER, julia_c=None, colormap='viridis',
+                 solver='boundary', refresh_interval=60):
+        """
+        Frame-to-frame renderer for zoom paths
+        Every refresh_interval frames a frame is rendered in full so errors
+        from resampling cannot build up.
+        """
+        self.width = width
+        self.height = height
+        self.max_iter = max_iter
+        self.julia_c = julia_c
+        self.solver = solver
+        self.refresh_interval = refresh_interval
+
+        self.generator = FractalGenerator(width, height, solver=solver)
+        self.color_handler = ColorHandler()
+        self.color_handler.set_colormap(colormap)
+
+        # Double-buffered iteration counts: the previous frame and the current one
+        self.buffers = [np.zeros((height, width), dtype=np.uint32) for _ in range(2)]
+        self.previous = None
+
+        # Statistics
+        self.frames = 0
+        self.reused = 0
+
+    def iterations_for(self, zoom):
+        # Same zoom scaling as the interactive explorer
+        return int(self.max_iter * (1 + np.log10(zoom + 1)))
+
+    def render_frame(self, x, y, zoom, max_iter=None):
+        """Iteration counts of one frame, reusing the previous frame where possible"""
+        is_julia = self.julia_c is not None
+        c = self.julia_c if is_julia else 0j
+        if max_iter is None:
+            max_iter = self.iterations_for(zoom)
+        step = 4 / zoom / (self.width - 1)
+        xmin = x - step * (self.width - 1) / 2
+        ymin = y - step * (self.height - 1) / 2
+        xmax = xmin + step * (self.width - 1)
+        ymax = ymin + step * (self.height - 1)
+        out = self.buffers[self.frames % 2]
+
+        if zoom >= DEEP_ZOOM_THRESHOLD:
+            # Beyond float64 every frame goes through perturbation
+            np.copyto(out, self.generator.generate_deep(
+                x, y, xmax - xmin, ymax - ymin, max_iter, is_julia, self.julia_c
+            ))
+        elif self.previous is None or self.frames % self.refresh_interval == 0:
+            np.copyto(out, self.generator.generate(
+                xmin, xmax, ymin, ymax, max_iter, is_julia, self.julia_c, self.solver
+            ))
+        else:
+            prev, prev_xmin, prev_ymin, prev_step, prev_max_iter = self.previous
+            self.reused += resample_frame(
+                prev, prev_xmin, prev_ymin, prev_step, prev_step, prev_max_iter,
+                xmin, ymin, step, step, max_iter, is_julia, c, out
+            )
+
+        self.previous = (out, xmin, ymin, step, max_iter)
+        self.frames += 1
+        return out, max_iter
+
+    def render(self, keyframes, frame_count, sink, queue_depth=4, progress=None):
+        """
+        Render a keyframed zoom into a sink
+        Colorized frames wait in a queue of at most queue_depth frames
+        while a writer thread encodes them. progress(frame, frame_count)
+        is called after each frame is handed over.
+        """
+        frames = queue.Queue(maxsize=queue_depth)
+        free = queue.Queue()
+        for _ in range(queue_depth + 1):
+            free.put(np.empty((self.height, self.width, 3), dtype=np.uint8))
+        errors = []
+
+        def write_frames():
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    return
+                if not errors:
+                    try:
+                        sink.write(frame)
+                    except Exception as error:
+                        errors.append(error)
+                free.put(frame)
+
+        # The iteration limit only changes at full refreshes, so interior
+        # pixels stay reusable: each window uses the limit of its last frame
+        path = interpolate_path(keyframes, frame_count)
+        limits = []
+        for index in range(frame_count):
+            start = index - (self.frames + index) % self.refresh_interval
+            end = min(start + self.refresh_interval, frame_count) - 1
+            limits.append(self.iterations_for(max(path[end][2], path[index][2])))
+
+        writer = threading.Thread(target=write_frames, daemon=True)
+        writer.start()
+        try:
+            for index, (x, y, zoom) in enumerate(path):
+                if errors:
+                    break
+                iterations, max_iter = self.render_frame(x, y, zoom, limits[index])
+                rgb = free.get()
+                self.color_handler.colorize(iterations, max_iter, out=rgb)
+                frames.put(rgb)
+                if progress is not None:
+                    progress(index + 1, frame_count)
+        finally:
+            frames.put(None)
+            writer.join()
+            sink.close()
+
+        if errors:
+            raise errors[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a zoom animation")
+    parser.add_argument('output', help="video.y4m, frames.rgb, or a PNG pattern like frames/%%05d.png")
+    parser.add_argument('--size', nargs=2, type=int, default=(640, 360), metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--keyframe', nargs=3, type=float, action='append', required=True,
+                        metavar=('X', 'Y', 'ZOOM'))
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--iterations', type=int, default=MAX_ITER)
+    parser.add_argument('--julia', nargs=2, type=float, metavar=('RE', 'IM'))
+    parser.add_argument('--colormap', default='viridis')
+    parser.add_argument('--solver', choices=SOLVERS, default='boundary')
+    parser.add_argument('--refresh', type=int, default=60,
+                        help="render every Nth frame in full")
+    args = parser.parse_args(argv)
+
+    width, height = args.size
+    julia_c = complex(*args.julia) if args.julia else None
+    animation = ZoomAnimation(width, height, args.iterations, julia_c, args.colormap,
+                              args.solver, args.refresh)
+    sink = open_sink(args.output, width, height, args.fps)
+    start = time.perf_counter()
+
+    def progress(frame, total):
+        elapsed = time.perf_counter() - start
+        print(f"\rframe {frame}/{total}, {frame / elapsed:.1f} fps", end='', file=sys.stderr)
+
+    animation.render(args.keyframe, args.frames, sink, progress=progress)
+    reused = animation.reused / (animation.frames * width * height)
+    print(f"\n{reused:.0%} of pixels reused from the previous frame", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
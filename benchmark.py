@@ -0,0 +1,513 @@
+"""
+Benchmark suite and regression check
+
+    python benchmark.py run -o before.json
+    python benchmark.py run -o after.json
+    python benchmark.py compare before.json after.json --threshold 0.1
+
+Every result is the median of several runs in seconds. JIT compilation is
+timed separately from steady-state calls, and compare exits with status 1
+when any shared benchmark got slower than the threshold allows.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import numba
+import numpy as np
+
+# Standard views: center, zoom, base iteration count, Julia constant
+VIEWS = {
+    'default': {'x': -0.5, 'y': 0.0, 'zoom': 1.0, 'iterations': 512, 'julia_c': None},
+    'seahorse': {'x': -0.743643887037151, 'y': 0.131825904205330, 'zoom': 1e5,
+                 'iterations': 2048, 'julia_c': None},
+    'interior': {'x': -0.2, 'y': 0.0, 'zoom': 4.0, 'iterations': 1024, 'julia_c': None},
+    'julia_default': {'x': 0.0, 'y': 0.0, 'zoom': 1.0, 'iterations': 512,
+                      'julia_c': complex(-0.4, 0.6)},
+    'julia_rabbit': {'x': 0.0, 'y': 0.0, 'zoom': 1.0, 'iterations': 512,
+                     'julia_c': complex(-0.123, 0.745)},
+}
+
+RESOLUTIONS = ((640, 360), (1280, 720), (1920, 1080))
+
+
+def view_bounds(view):
+    """Bounds of a view, with the explorer's 4 x 3 unit span at zoom 1"""
+    half_w = 2 / view['zoom']
+    half_h = 1.5 / view['zoom']
+    return view['x'] - half_w, view['x'] + half_w, view['y'] - half_h, view['y'] + half_h
+
+
+def measure(fn, repeat, setup=None):
+    """Median wall time of fn() over `repeat` runs"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def thread_counts():
+    """1, 2, 4, ... up to the number of numba threads available"""
+    counts = []
+    n = 1
+    while n < numba.config.NUMBA_NUM_THREADS:
+        counts.append(n)
+        n *= 2
+    counts.append(numba.config.NUMBA_NUM_THREADS)
+    return counts
+
+
+def bench_warmup(results):
+    """First calls, which include JIT compilation of the kernels"""
+    from fractal_generator import FractalGenerator
+    from color_handler import ColorHandler
+
+    start = time.perf_counter()
+    FractalGenerator.generate_mandelbrot(-2.0, 1.0, -1.0, 1.0, 8, 8, 16, True, True)
+    results['warmup/generate_mandelbrot'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    FractalGenerator.generate_julia(-2.0, 2.0, -1.5, 1.5, 8, 8, 16, complex(-0.4, 0.6), True)
+    results['warmup/generate_julia'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    FractalGenerator.generate_mandelbrot(-2.0, 1.0, -1.0, 1.0, 8, 8, 16, True, True,
+                                         precision=np.float32)
+    results['warmup/lanes_f32'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ColorHandler().colorize(np.zeros((8, 8), dtype=np.uint32), 16)
+    results['warmup/colorize'] = time.perf_counter() - start
+
+
+def bench_kernels(results, views, resolutions, threads, repeat):
+    """Steady-state kernel time per view, resolution and thread count"""
+    from fractal_generator import FractalGenerator
+
+    for name, view in views.items():
+        bounds = view_bounds(view)
+        for width, height in resolutions:
+            out = np.empty((height, width), dtype=np.uint32)
+            for count in threads:
+                numba.set_num_threads(count)
+                if view['julia_c'] is None:
+                    fn = lambda: FractalGenerator.generate_mandelbrot(
+                        *bounds, width, height, view['iterations'], True, True, out)
+                else:
+                    fn = lambda: FractalGenerator.generate_julia(
+                        *bounds, width, height, view['iterations'], view['julia_c'], True, out)
+                results[f'kernel/{name}/{width}x{height}/t{count}'] = measure(fn, repeat)
+    numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)
+
+
+def bench_precision(results, views, resolutions, repeat):
+    """
+    Kernel time of each precision tier on the same views
+    float32 only applies to shallow views in the app, but is timed on
+    every view so the tiers can be compared like for like.
+    """
+    from fractal_generator import FractalGenerator
+
+    for name, view in views.items():
+        bounds = view_bounds(view)
+        for width, height in resolutions:
+            out = np.empty((height, width), dtype=np.uint32)
+            for precision in (np.float32, np.float64):
+                if view['julia_c'] is None:
+                    fn = lambda: FractalGenerator.generate_mandelbrot(
+                        *bounds, width, height, view['iterations'], True, True, out,
+                        precision=precision)
+                else:
+                    fn = lambda: FractalGenerator.generate_julia(
+                        *bounds, width, height, view['iterations'], view['julia_c'], True, out,
+                        precision=precision)
+                results[f'precision/{name}/{width}x{height}/{precision.__name__}'] = measure(fn, repeat)
+
+
+def bench_scheduling(results, views, resolutions, threads, repeat):
+    """
+    FractalGenerator.generate per schedule and thread count
+    Views with large interior regions leave static row blocks unbalanced,
+    which shows as poor scaling efficiency.
+    """
+    from fractal_generator import FractalGenerator, SCHEDULES
+
+    for name, view in views.items():
+        bounds = view_bounds(view)
+        is_julia = view['julia_c'] is not None
+        for width, height in resolutions:
+            for schedule in SCHEDULES:
+                for count in threads:
+                    generator = FractalGenerator(width, height, schedule=schedule, threads=count)
+                    fn = lambda: generator.generate(*bounds, view['iterations'], is_julia,
+                                                    view['julia_c'])
+                    results[f'schedule/{name}/{width}x{height}/{schedule}/t{count}'] = \
+                        measure(fn, repeat)
+
+
+def scaling_efficiency(results):
+    """
+    Speed-up over one thread divided by the thread count, for every
+    benchmark timed at several thread counts; 1.0 is perfect scaling
+    """
+    efficiency = {}
+    for name, seconds in results.items():
+        base, _, threads = name.rpartition('/t')
+        single = results.get(f'{base}/t1')
+        if threads.isdigit() and int(threads) > 1 and single and seconds > 0:
+            efficiency[name] = single / (int(threads) * seconds)
+    return efficiency
+
+
+def bench_julia_atlas(results, repeat, count=256, size=(128, 96)):
+    """A batch of Julia thumbnails rendered into one atlas"""
+    from fractal_generator import FractalGenerator
+
+    rng = np.random.default_rng(0)
+    candidates = rng.uniform(-1.0, 1.0, count) + 1j * rng.uniform(-1.0, 1.0, count)
+    generator = FractalGenerator(*size)
+    generator.smooth = True
+    generator.generate_julia_atlas(candidates[:1], *size, 256)
+    results[f'julia_atlas/{count}x{size[0]}x{size[1]}'] = measure(
+        lambda: generator.generate_julia_atlas(candidates, *size, 256), repeat)
+
+
+def bench_formulas(results, resolutions, repeat, max_iter=512):
+    """
+    Every registered formula's generated kernel on the full view, in both
+    modes, with smooth counts; 'mandelbrot/<mode>/builtin' is the hand-tuned
+    float64 kernel of the same view for reference
+    """
+    from fractal_generator import FractalGenerator
+    from formulas import FORMULAS
+    from kernels import NO_COUNTS
+
+    bounds = view_bounds({'x': 0.0, 'y': 0.0, 'zoom': 1.0})
+    for width, height in resolutions:
+        out = np.empty((height, width), dtype=np.float32)
+        for name, formula in FORMULAS.items():
+            kernel = formula.kernels.frame_kernel
+            for mode in ('mandelbrot', 'julia'):
+                # Newton's method is the classic Newton fractal at c = 0
+                c = 0j if formula.converge else complex(-0.4, 0.6)
+                args = (*bounds, width, height, max_iter, mode == 'julia', c, True, out, True,
+                        NO_COUNTS)
+                kernel(*args)
+                results[f'formula/{name}/{mode}/{width}x{height}'] = measure(
+                    lambda: kernel(*args), repeat)
+
+        for mode in ('mandelbrot', 'julia'):
+            generator = FractalGenerator(width, height)
+            generator.smooth = True
+            generator.precision = np.float64
+            render = lambda: generator.generate(*bounds, max_iter, mode == 'julia')
+            render()
+            results[f'formula/mandelbrot/{mode}/{width}x{height}/builtin'] = measure(render, repeat)
+
+
+def formula_throughput(results):
+    """Megapixels per second of every formula benchmark"""
+    throughput = {}
+    for name, seconds in results.items():
+        parts = name.split('/')
+        if parts[0] == 'formula' and seconds > 0:
+            width, height = (int(v) for v in parts[3].split('x'))
+            throughput[name] = width * height / seconds / 1e6
+    return throughput
+
+
+def bench_antialias(results, views, resolutions, repeat):
+    """
+    Edge-only supersampling against full 2x2 supersampling of the same view
+    Both include coloring, so the adaptive time is the first pass plus the
+    edge refinement and the full time renders and averages four times the
+    pixels.
+    """
+    from fractal_generator import FractalGenerator
+    from color_handler import ColorHandler
+
+    handler = ColorHandler()
+    for name, view in views.items():
+        bounds = view_bounds(view)
+        is_julia = view['julia_c'] is not None
+        max_iter = view['iterations']
+        for width, height in resolutions:
+            generator = FractalGenerator(width, height)
+            generator.smooth = True
+            full = FractalGenerator(2 * width, 2 * height)
+            full.smooth = True
+
+            def adaptive():
+                iterations = generator.generate(*bounds, max_iter, is_julia, view['julia_c'])
+                colors = handler.colorize(iterations, max_iter)
+                rows, cols, samples = generator.supersample_edges(
+                    iterations, max_iter, is_julia, view['julia_c'])
+                colors[rows, cols] = handler.colorize_samples(samples, max_iter)
+
+            def supersampled():
+                # Half-pixel margins put the 2x2 samples inside each pixel
+                x_margin = (bounds[1] - bounds[0]) / (width - 1) / 4
+                y_margin = (bounds[3] - bounds[2]) / (height - 1) / 4
+                iterations = full.generate(bounds[0] - x_margin, bounds[1] + x_margin,
+                                           bounds[2] - y_margin, bounds[3] + y_margin,
+                                           max_iter, is_julia, view['julia_c'])
+                colors = handler.colorize(iterations, max_iter)
+                colors.reshape(height, 2, width, 2, 3).mean(axis=(1, 3))
+
+            results[f'antialias/{name}/{width}x{height}/adaptive'] = measure(adaptive, repeat)
+            results[f'antialias/{name}/{width}x{height}/full'] = measure(supersampled, repeat)
+
+
+def bench_tile_store(results, views, resolutions, repeat):
+    """
+    Full-resolution tiled frames computed, computed and stored, and read back
+    from the on-disk tile store with an empty memory cache, as after a
+    restart. Stored tiles are likely still in the OS page cache.
+    """
+    from fractal_generator import FractalGenerator
+    from tile_cache import TileStore
+
+    for name, view in views.items():
+        bounds = view_bounds(view)
+        is_julia = view['julia_c'] is not None
+        for width, height in resolutions:
+            with tempfile.TemporaryDirectory() as directory:
+                generator = FractalGenerator(width, height, solver='boundary')
+                generator.smooth = True
+                store = TileStore(directory, 1 << 40)
+
+                def render():
+                    generator.generate_tiled(*bounds, view['iterations'], is_julia, view['julia_c'])
+
+                def reset(clear_store):
+                    generator.tile_cache.clear()
+                    generator.previous_pass = None
+                    if clear_store:
+                        store.clear()
+
+                prefix = f'tile_store/{name}/{width}x{height}'
+                results[f'{prefix}/compute'] = measure(render, repeat, lambda: reset(False))
+                generator.tile_store = store
+                results[f'{prefix}/write'] = measure(render, repeat, lambda: reset(True))
+                results[f'{prefix}/read'] = measure(render, repeat, lambda: reset(False))
+
+
+def bench_colorize(results, resolutions, threads, repeat):
+    """Colorization of a typical frame per resolution and thread count"""
+    from fractal_generator import FractalGenerator
+    from color_handler import ColorHandler
+
+    handler = ColorHandler()
+    for width, height in resolutions:
+        iterations = FractalGenerator.generate_mandelbrot(
+            *view_bounds(VIEWS['default']), width, height, 512, True, True)
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        for count in threads:
+            numba.set_num_threads(count)
+            results[f'colorize/{width}x{height}/t{count}'] = measure(
+                lambda: handler.colorize(iterations, 512, out=out), repeat)
+    numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)
+
+
+def bench_draw_fractal(results, views, resolutions, threads, repeat):
+    """
+    The app's full synchronous render path per resolution and thread count,
+    with a cold tile cache
+    Each resolution gets a generator set up like the app's own in its place.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from fractal_generator import FractalGenerator
+    from main import FractalForge
+
+    app = FractalForge()
+    screen_generator = app.generator
+    try:
+        for width, height in resolutions:
+            generator = FractalGenerator(width, height, screen_generator.tile_size,
+                                         solver=screen_generator.solver,
+                                         schedule=screen_generator.schedule)
+            generator.smooth = screen_generator.smooth
+            generator.precision = screen_generator.precision
+            generator.equalize = screen_generator.equalize
+            app.generator = generator
+            for name, view in views.items():
+                app.view.update(x=Decimal(repr(view['x'])), y=Decimal(repr(view['y'])),
+                                zoom=view['zoom'], julia=view['julia_c'] is not None,
+                                julia_c=view['julia_c'] or app.view['julia_c'])
+                app.draw_fractal()
+                for count in threads:
+                    # Colorizing runs at the caller's count, the kernels at the generator's
+                    numba.set_num_threads(count)
+                    generator.threads = count
+                    results[f'draw_fractal/{name}/{width}x{height}/t{count}'] = measure(
+                        app.draw_fractal, repeat, setup=generator.tile_cache.clear)
+    finally:
+        app.generator = screen_generator
+        numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)
+        app.render_worker.stop()
+
+
+# Run in a fresh interpreter by bench_startup; prints the phase timings as JSON
+STARTUP_SCRIPT = """
+import json, os, time
+start = time.perf_counter()
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+from main import FractalForge
+imported = time.perf_counter()
+app = FractalForge()
+app.generator.tile_store = None
+opened = time.perf_counter()
+app.draw_fractal()
+drawn = time.perf_counter()
+app.warmup.join()
+warm = time.perf_counter()
+app.render_worker.stop()
+print(json.dumps({'import': imported - start, 'window': opened - imported,
+                  'first_frame': drawn - start, 'warmup': warm - start}))
+"""
+
+
+def bench_startup(results):
+    """
+    Launch to first frame in a fresh process, before and after the kernel cache exists
+    The uncached run starts from an empty NUMBA_CACHE_DIR, so it includes
+    every compilation; it waits for the background warm-up to finish
+    filling the directory, which the cached run then reuses.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+        for state in ('uncached', 'cached'):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=root, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            results[f'startup/{state}/process'] = time.perf_counter() - start
+            for phase, seconds in json.loads(output.splitlines()[-1]).items():
+                results[f'startup/{state}/{phase}'] = seconds
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numba': numba.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'threads': numba.config.NUMBA_NUM_THREADS,
+        'threading_layer': numba.config.THREADING_LAYER,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run(views=VIEWS, resolutions=RESOLUTIONS, threads=None, repeat=5, draw=True):
+    """Run the suite and return {'environment': ..., 'results': {name: seconds}}"""
+    if threads is None:
+        threads = thread_counts()
+    results = {}
+    bench_warmup(results)
+    bench_kernels(results, views, resolutions, threads, repeat)
+    bench_precision(results, views, resolutions, repeat)
+    bench_scheduling(results, views, resolutions, threads, repeat)
+    bench_julia_atlas(results, repeat)
+    bench_formulas(results, resolutions, repeat)
+    bench_antialias(results, views, resolutions, repeat)
+    bench_tile_store(results, views, resolutions, repeat)
+    bench_colorize(results, resolutions, threads, repeat)
+    if draw:
+        bench_startup(results)
+        bench_draw_fractal(results, views, resolutions, threads, repeat)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Relative change of every benchmark present in both runs
+    Returns (rows, regressions) where rows are (name, before, after, change)
+    sorted by name and regressions lists the names slower than the threshold.
+    Warm-up and start-up timings are reported but never count as regressions.
+    """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before = baseline['results'][name]
+        after = current['results'][name]
+        change = after / before - 1 if before > 0 else 0.0
+        rows.append((name, before, after, change))
+        if change > threshold and not name.startswith(('warmup/', 'startup/')):
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FractalForge benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmark suite")
+    run_parser.add_argument('-o', '--output', default='benchmark.json')
+    run_parser.add_argument('--views', nargs='+', choices=sorted(VIEWS), default=sorted(VIEWS))
+    run_parser.add_argument('--sizes', nargs='+', default=[f'{w}x{h}' for w, h in RESOLUTIONS],
+                            help="resolutions as WIDTHxHEIGHT")
+    run_parser.add_argument('--threads', nargs='+', type=int)
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--no-draw', action='store_true',
+                            help="skip the start-up and draw_fractal benchmarks, which need pygame")
+
+    compare_parser = commands.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="allowed slowdown as a fraction (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        resolutions = [tuple(int(v) for v in size.split('x')) for size in args.sizes]
+        report = run({name: VIEWS[name] for name in args.views}, resolutions,
+                     args.threads, args.repeat, not args.no_draw)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        for name, seconds in report['results'].items():
+            print(f"{name:45s} {seconds * 1000:10.2f} ms")
+        efficiency = scaling_efficiency(report['results'])
+        if efficiency:
+            print("\nScaling efficiency (speed-up over one thread / threads)")
+            for name, value in efficiency.items():
+                print(f"{name:45s} {value:10.0%}")
+        throughput = formula_throughput(report['results'])
+        if throughput:
+            print("\nFormula throughput")
+            for name, value in throughput.items():
+                print(f"{name:45s} {value:10.2f} Mpixel/s")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, regressions = compare(baseline, current, args.threshold)
+    for name, before, after, change in rows:
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:45s} {before * 1000:10.2f} -> {after * 1000:10.2f} ms {change:+7.1%}{flag}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import numpy as np
+from numba import njit, prange
+from kernels import NO_COUNTS, count_row, escape_time, smooth_escape_time
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def _sample(out, done, i, j, re0, im0, step_x, step_y, max_iter, is_julia, c, options):
+    """Compute a pixel once, reusing edges shared between sub-rectangles"""
+    if not done[i, j]:
+        if options[2]:
+            out[i, j] = smooth_escape_time(re0 + j * step_x, im0 + i * step_y, max_iter,
+                                           is_julia, c, options[0], options[1])
+        else:
+            out[i, j] = escape_time(re0 + j * step_x, im0 + i * step_y, max_iter, is_julia, c,
+                                    options[0], options[1])
+        done[i, j] = True
+    return out[i, j]
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def solve_block(out, done, x0, y0, x1, y1, re0, im0, step_x, step_y,
+                max_iter, is_julia, c, min_size, options):
+    """
+    Mariani-Silver subdivision of the inclusive rectangle (x0, y0)-(x1, y1)
+    A rectangle whose whole border shares one escape count is filled with
+    it; otherwise it is split in four until it is small enough to iterate
+    every pixel. Pixel (i, j) maps to (re0 + j * step_x, im0 + i * step_y).
+    options holds the (interior_check, periodicity, smooth) kernel flags.
+    Fractional counts are rarely equal along a border, so in smooth mode
+    mostly interior regions are filled.
+    """
+    stack = np.empty((64, 4), dtype=np.int64)
+    stack[0, 0] = x0
+    stack[0, 1] = y0
+    stack[0, 2] = x1
+    stack[0, 3] = y1
+    top = 1
+
+    while top > 0:
+        top -= 1
+        ax = stack[top, 0]
+        ay = stack[top, 1]
+        bx = stack[top, 2]
+        by = stack[top, 3]
+
+        # Trace the border
+        first = _sample(out, done, ay, ax, re0, im0, step_x, step_y, max_iter, is_julia, c, options)
+        uniform = True
+        for j in range(ax, bx + 1):
+            if _sample(out, done, ay, j, re0, im0, step_x, step_y, max_iter, is_julia, c, options) != first:
+                uniform = False
+            if _sample(out, done, by, j, re0, im0, step_x, step_y, max_iter, is_julia, c, options) != first:
+                uniform = False
+        for i in range(ay + 1, by):
+            if _sample(out, done, i, ax, re0, im0, step_x, step_y, max_iter, is_julia, c, options) != first:
+                uniform = False
+            if _sample(out, done, i, bx, re0, im0, step_x, step_y, max_iter, is_julia, c, options) != first:
+                uniform = False
+
+        # Nothing left inside the border
+        if bx - ax < 2 or by - ay < 2:
+            continue
+
+        if uniform:
+            for i in range(ay + 1, by):
+                for j in range(ax + 1, bx):
+                    out[i, j] = first
+                    done[i, j] = True
+        elif bx - ax <= min_size or by - ay <= min_size:
+            for i in range(ay + 1, by):
+                for j in range(ax + 1, bx):
+                    _sample(out, done, i, j, re0, im0, step_x, step_y, max_iter, is_julia, c, options)
+        else:
+            mx = (ax + bx) // 2
+            my = (ay + by) // 2
+            for rect in ((ax, ay, mx, my), (mx, ay, bx, my), (ax, my, mx, by), (mx, my, bx, by)):
+                stack[top, 0] = rect[0]
+                stack[top, 1] = rect[1]
+                stack[top, 2] = rect[2]
+                stack[top, 3] = rect[3]
+                top += 1
+
+
+def boundary_frame(xmin, xmax, ymin, ymax, width, height, max_iter, is_julia, c,
+                   block_size, min_size, interior_check=False, periodicity=False,
+                   out=None, done=None, smooth=False, counts=NO_COUNTS):
+    """
+    Boundary-traced frame, with independent blocks solved in parallel
+    `out` and an all-False `done` mask may be passed in to avoid allocating;
+    smooth=True returns fractional escape counts as float32. A
+    (threads, 1, bins) `counts` collects per-thread escape-count histograms
+    of the blocks as they are solved.
+    """
+    if out is None:
+        out = np.zeros((height, width), dtype=np.float32 if smooth else np.uint32)
+    if done is None:
+        done = np.zeros((height, width), dtype=np.bool_)
+    return boundary_frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, is_julia, c,
+                         block_size, min_size, (interior_check, periodicity, smooth), out, done,
+                         counts)
+
+
+def boundary_tiles(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c, min_size,
+                   interior_check=False, periodicity=False, out=None, smooth=False,
+                   counts=NO_COUNTS):
+    """
+    Boundary-traced batch of grid-aligned tiles, one tile per block
+    A (threads, tiles, bins) `counts` collects per-thread escape-count
+    histograms of every tile as it is solved.
+    """
+    shape = (tile_x.shape[0], tile_size, tile_size)
+    if out is None:
+        out = np.zeros(shape, dtype=np.float32 if smooth else np.uint32)
+    return boundary_tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c,
+                         min_size, (interior_check, periodicity, smooth), out,
+                         np.zeros(shape, dtype=np.bool_), counts)
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def boundary_frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, is_julia, c,
+                  block_size, min_size, options, out, done, counts):
+    step_x = (xmax - xmin) / (width - 1)
+    step_y = (ymax - ymin) / (height - 1)
+    blocks_x = (width + block_size - 1) // block_size
+    blocks_y = (height + block_size - 1) // block_size
+
+    counting = counts.shape[0] > 0
+
+    for b in prange(blocks_x * blocks_y):
+        x0 = (b % blocks_x) * block_size
+        y0 = (b // blocks_x) * block_size
+        x1 = min(x0 + block_size, width)
+        y1 = min(y0 + block_size, height)
+        solve_block(out, done, x0, y0, x1 - 1, y1 - 1,
+                    xmin, ymin, step_x, step_y, max_iter, is_julia, c, min_size, options)
+        # Counted while the block is still in cache
+        if counting:
+            for i in range(y0, y1):
+                count_row(counts, 0, out[i, x0:x1], max_iter)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def boundary_tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c, min_size,
+                  options, out, done, counts):
+    counting = counts.shape[0] > 0
+    for t in prange(tile_x.shape[0]):
+        solve_block(out[t], done[t], 0, 0, tile_size - 1, tile_size - 1,
+                    tile_x[t] * tile_size * step_x, tile_y[t] * tile_size * step_y,
+                    step_x, step_y, max_iter, is_julia, c, min_size, options)
+        if counting:
+            for i in range(tile_size):
+                count_row(counts, t, out[t, i], max_iter)
+
+    return out
@@ -1,19 +1,37 @@
+import math
+from collections import OrderedDict
+
+import numba
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
+from numba import njit, prange
+
+from kernels import histogram_bins, histogram_kernel
+from palettes import load_palettes
+
+# Escape counts map to colors on a fixed logarithmic scale, or through the
+# cumulative histogram of the frame so its colors spread evenly over its pixels
+COLOR_MODES = ('log', 'histogram')
+
+# Iteration limits whose index tables are kept; the limit follows the zoom,
+# so only the last few are ever asked for again
+INDEX_CACHE_ENTRIES = 4
 
 class ColorHandler:
     def __init__(self):
-        # Predefined color maps with smooth transitions
-        self.colormaps = {
-            'viridis': cm.viridis,
-            'plasma': cm.plasma,
-            'rainbow': cm.rainbow,
-            'hsv': cm.hsv
-        }
+        # 8-bit RGB lookup tables with smooth transitions, one row per
+        # colormap entry, bundled rather than built by matplotlib
+        self.luts = load_palettes()
         
         # Default colormap
-        self.current_cmap = self.colormaps['viridis']
+        self.current_name = 'viridis'
+        self.current_lut = self.luts['viridis']
+        
+        # Lookup table entry per iteration count, keyed by (max_iter, table
+        # size), least recently used first
+        self._index_cache = OrderedDict()
+        
+        # Color mapping, one of COLOR_MODES
+        self.mode = 'log'
         
         # Animation phase
         self.phase = 0.0
@@ -22,34 +40,168 @@ class ColorHandler:
     def set_colormap(self, map_name):
         """Set current colormap with error handling"""
         try:
-            self.current_cmap = self.colormaps[map_name]
+            self.current_lut = self.luts[map_name]
+            self.current_name = map_name
         except KeyError:
             # Fallback to default
-            self.current_cmap = self.colormaps['viridis']
+            self.current_name = 'viridis'
+            self.current_lut = self.luts['viridis']
+
+    def set_mode(self, mode):
+        if mode not in COLOR_MODES:
+            raise ValueError(f"Unknown color mode: {mode}")
+        self.mode = mode
+
+    def histogram(self, iterations, max_iter):
+        """
+        Escape-count histogram of a frame, as histogram mode colors by
+        Row ranges are counted in parallel and merged. Histograms of several
+        frames or tiles add up to the histogram of all of them.
+        """
+        values = iterations.reshape((1,) + iterations.shape)
+        chunks = max(1, min(iterations.shape[0], 4 * numba.get_num_threads()))
+        counts = np.empty((chunks, histogram_bins(max_iter)), dtype=np.uint32)
+        histogram_kernel(values, max_iter, chunks, counts)
+        return counts.sum(axis=0, dtype=np.int64)
 
     def update_phase(self, dt):
         """Update color animation phase"""
         self.phase += self.phase_speed * dt
         self.phase %= 1.0
 
-    def colorize(self, iterations, max_iter):
+    def colorize(self, iterations, max_iter, out=None, histogram=None):
         """
         Advanced color mapping with smooth transitions
-        Uses logarithmic scaling for better detail
+        Uses logarithmic scaling for better detail.
+        Writes RGB into `out` (height x width x 3 uint8, may be a strided
+        view such as a transposed pygame pixels3d array) without
+        allocating full-frame temporaries. Float input holds fractional
+        escape counts and is interpolated between table entries.
+        In histogram mode colors follow `histogram`, from histogram() of
+        a whole image when `iterations` is a part of it, or of
+        `iterations` itself when None.
         """
         # Prevent division by zero
         max_iter = max(max_iter, 1)
         
-        # Logarithmic scaling for better color distribution
-        log_iter = np.log(iterations + 1) / np.log(max_iter + 1)
-        
-        # Smooth color mapping
-        colored = self.current_cmap(log_iter)
+        if out is None:
+            out = np.empty(iterations.shape + (3,), dtype=np.uint8)
         
-        # Convert to 8-bit color with RGB channels
-        colored = (colored[:, :, :3] * 255).astype(np.uint8)
+        # Rotating the table by the phase animates the palette without
+        # touching the iteration counts
+        lut = self.current_lut
+        shift = int(self.phase * len(lut)) % len(lut)
+        if self.mode == 'histogram':
+            if histogram is None:
+                histogram = self.histogram(iterations, max_iter)
+            if len(histogram) != histogram_bins(max_iter):
+                raise ValueError(f"Histogram of {len(histogram)} bins for {max_iter} iterations")
+            
+            # Fraction of escaped pixels below each bin edge
+            total = histogram.sum()
+            if total == 0:
+                levels = np.linspace(0.0, 1.0, len(histogram) + 1)
+            else:
+                levels = np.concatenate(([0.0], np.cumsum(histogram) / total))
+            
+            # Integer counts take the middle of their bin's rise
+            offset = 0.0 if iterations.dtype.kind == 'f' else 0.5
+            lookup_equalized_colors(iterations, levels, max_iter, offset, lut, shift, out)
+            return out
+        if iterations.dtype.kind == 'f':
+            lookup_smooth_colors(iterations, lut, len(lut) / np.log(max_iter + 1), shift, out)
+            return out
+        palette = lut[(self._lut_index(max_iter, len(lut)) + shift) % len(lut)]
         
-        # Ensure correct channel order for Pygame (RGB -> BGR)
-        colored = colored[..., [2, 1, 0]]
-        
-        return colored
+        lookup_colors(iterations, palette, out)
+        return out
+
+    def colorize_samples(self, samples, max_iter, out=None, histogram=None):
+        """
+        Mean color of each row of samples, for anti-aliased pixels
+        Every sample is colored before averaging, so an edge pixel blends
+        the colors on either side instead of landing on an in-between
+        iteration count's color. Pass the frame's histogram in histogram mode.
+        """
+        colors = self.colorize(samples, max_iter, histogram=histogram)
+        count = samples.shape[1]
+        mean = (colors.sum(axis=1, dtype=np.uint32) + count // 2) // count
+        if out is None:
+            return mean.astype(np.uint8)
+        out[...] = mean
+        return out
+
+    def _lut_index(self, max_iter, size):
+        """Logarithmically scaled table entry for every iteration count"""
+        key = (max_iter, size)
+        index = self._index_cache.get(key)
+        if index is None:
+            scaled = np.log(np.arange(max_iter + 1) + 1.0) / np.log(max_iter + 1)
+            index = np.minimum((scaled * size).astype(np.intp), size - 1)
+            self._index_cache[key] = index
+            if len(self._index_cache) > INDEX_CACHE_ENTRIES:
+                self._index_cache.popitem(last=False)
+        else:
+            self._index_cache.move_to_end(key)
+        return index
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def lookup_colors(iterations, palette, out):
+    """Map iteration counts to RGB through a per-count palette table"""
+    last = palette.shape[0] - 1
+    for i in prange(iterations.shape[0]):
+        for j in range(iterations.shape[1]):
+            n = min(iterations[i, j], last)
+            out[i, j, 0] = palette[n, 0]
+            out[i, j, 1] = palette[n, 1]
+            out[i, j, 2] = palette[n, 2]
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def lookup_smooth_colors(values, lut, scale, shift, out):
+    """
+    Map fractional escape counts to RGB on the same logarithmic scale
+    Colors are blended between neighbouring table entries, so there are no
+    bands; `shift` rotates the table like the palette animation does
+    """
+    size = lut.shape[0]
+    for i in prange(values.shape[0]):
+        for j in range(values.shape[1]):
+            f = min(math.log(values[i, j] + 1.0) * scale, size - 1.0)
+            k = int(f)
+            t = f - k
+            a = (k + shift) % size
+            b = (min(k + 1, size - 1) + shift) % size
+            for ch in range(3):
+                out[i, j, ch] = np.uint8(lut[a, ch] * (1.0 - t) + lut[b, ch] * t + 0.5)
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def lookup_equalized_colors(values, levels, max_iter, offset, lut, shift, out):
+    """
+    Map escape counts to RGB through a cumulative histogram
+    levels[k] is the fraction of escaped pixels below bin k; a count's
+    position along the table is interpolated from it, so every color covers
+    about as many pixels. Pixels that never escaped take the last entry, as
+    on the logarithmic scale.
+    """
+    size = lut.shape[0]
+    bins = levels.shape[0] - 1
+    scale = bins / max(max_iter - 1, 1)
+    for i in prange(values.shape[0]):
+        for j in range(values.shape[1]):
+            v = values[i, j]
+            if v >= max_iter - 1:
+                f = size - 1.0
+            else:
+                x = (v + offset) * scale
+                k = min(int(x), bins - 1)
+                t = min(x - k, 1.0)
+                f = (levels[k] + (levels[k + 1] - levels[k]) * t) * (size - 1.0)
+            k = int(f)
+            t = f - k
+            a = (k + shift) % size
+            b = (min(k + 1, size - 1) + shift) % size
+            for ch in range(3):
+                out[i, j, ch] = np.uint8(lut[a, ch] * (1.0 - t) + lut[b, ch] * t + 0.5)
@@ -0,0 +1,405 @@
+"""
+Tile rendering spread across worker processes, local or remote
+
+    python distributed.py render poster.png --size 8000 6000 --workers 8
+    python distributed.py worker scheduler-host:6000 --authkey KEY
+
+The scheduler splits a view into tiles and hands them to workers connected
+over multiprocessing sockets. Each worker owns a queue of tiles; idle
+workers steal from the back of the longest queue, so expensive interior
+regions do not leave the others waiting. Tiles whose worker fails or
+disconnects are retried elsewhere.
+
+Connections unpickle whatever they receive, so the authkey is all that keeps
+strangers from running code on either end. Without one the scheduler makes
+a random key per run and only listens on loopback addresses.
+"""
+import argparse
+import ipaddress
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from multiprocessing import connection, get_context
+
+import numba
+import numpy as np
+
+from boundary_solver import boundary_frame
+from fractal_generator import FractalGenerator, SOLVERS
+
+# Environment variable holding the authkey when --authkey is not given
+AUTHKEY_ENV = 'FRACTALFORGE_AUTHKEY'
+
+
+def is_loopback(host):
+    """Whether a listening host only accepts connections from this machine"""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def render_tile(job, x0, y0):
+    """Full tile_size x tile_size tile whose top-left pixel is (x0, y0)"""
+    size = job['tile_size']
+    xmin = job['xmin'] + x0 * job['step_x']
+    ymin = job['ymin'] + y0 * job['step_y']
+    xmax = xmin + (size - 1) * job['step_x']
+    ymax = ymin + (size - 1) * job['step_y']
+
+    if job['solver'] == 'boundary':
+        return boundary_frame(xmin, xmax, ymin, ymax, size, size, job['max_iter'],
+                              job['is_julia'], job['c'], 64, 4, True, True)
+    if job['is_julia']:
+        return FractalGenerator.generate_julia(xmin, xmax, ymin, ymax, size, size,
+                                               job['max_iter'], job['c'], True)
+    return FractalGenerator.generate_mandelbrot(xmin, xmax, ymin, ymax, size, size,
+                                                job['max_iter'], True, True)
+
+
+def run_worker(address, authkey, threads=None):
+    """Connect to a scheduler and render tiles until told to stop"""
+    if threads:
+        numba.set_num_threads(threads)
+    with connection.Client(address, authkey=authkey) as conn:
+        conn.send(('ready', f"{socket.gethostname()}:{os.getpid()}"))
+        while True:
+            message = conn.recv()
+            if message[0] == 'stop':
+                return
+            _, tile, job, x0, y0 = message
+            start = time.perf_counter()
+            try:
+                result = render_tile(job, x0, y0)
+            except Exception:
+                conn.send(('failed', tile, traceback.format_exc()))
+            else:
+                conn.send(('done', tile, result, time.perf_counter() - start))
+
+
+class TileScheduler:
+    def __init__(self, workers=None, tile_size=128, address=('localhost', 0),
+                 authkey=None, max_retries=2):
+        """
+        Work-stealing tile scheduler
+        `workers` local processes are started and connect like remote ones;
+        with workers=0 only remote workers connecting to `address` are used.
+        Without an authkey a random one is made, and `address` must be a
+        loopback one.
+        """
+        if authkey is None:
+            if not is_loopback(address[0]):
+                raise ValueError(f"Listening on {address[0]} needs an explicit authkey")
+            authkey = os.urandom(16).hex().encode()
+        self.tile_size = tile_size
+        self.max_retries = max_retries
+        self.authkey = authkey
+
+        # Statistics of the last render: (tile, worker, seconds, attempt)
+        self.timings = []
+        self.steals = 0
+        self.retries = 0
+
+        # Connected workers: connection -> name
+        self.workers = {}
+        self._joining = queue.Queue()
+        self._closed = False
+        self._listener = connection.Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        threading.Thread(target=self._accept, daemon=True).start()
+
+        # Local workers split the cores between them
+        if workers is None:
+            workers = os.cpu_count()
+        threads = max(1, (os.cpu_count() or 1) // max(workers, 1))
+        context = get_context('spawn')
+        self.processes = [
+            context.Process(target=run_worker, args=(self.address, authkey, threads), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, connection.AuthenticationError):
+                # Listener closed, or a client failed authentication
+                if self._closed:
+                    return
+                continue
+            self._joining.put(conn)
+
+    def _admit(self, timeout=0.0):
+        """Register workers that connected since the last call"""
+        try:
+            while True:
+                conn = self._joining.get(timeout=timeout)
+                timeout = 0.0
+                try:
+                    _, name = conn.recv()
+                except (EOFError, OSError):
+                    continue
+                self.workers[conn] = name
+        except queue.Empty:
+            pass
+
+    def _drop(self, conn):
+        self.workers.pop(conn, None)
+        conn.close()
+
+    def render(self, xmin, xmax, ymin, ymax, width, height, max_iter,
+               is_julia=False, julia_c=None, solver='brute', out=None):
+        """
+        Render a width x height view by tiles and assemble the result
+        `out` may be any (height, width) uint32 array, such as a memmap.
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
+        if is_julia and julia_c is None:
+            julia_c = complex(-0.4, 0.6)
+        if out is None:
+            out = np.empty((height, width), dtype=np.uint32)
+
+        size = self.tile_size
+        job = {
+            'xmin': xmin, 'ymin': ymin,
+            'step_x': (xmax - xmin) / (width - 1), 'step_y': (ymax - ymin) / (height - 1),
+            'tile_size': size, 'max_iter': max_iter,
+            'is_julia': is_julia, 'c': julia_c if is_julia else 0j, 'solver': solver,
+        }
+        tiles = [(x0, y0) for y0 in range(0, height, size) for x0 in range(0, width, size)]
+
+        self.timings = []
+        self.steals = 0
+        self.retries = 0
+        attempts = [0] * len(tiles)
+        remaining = len(tiles)
+
+        # Wait for a first worker, then split the tiles into contiguous runs
+        while not self.workers:
+            self._check_alive()
+            self._admit(timeout=0.1)
+        owned = {}
+        conns = list(self.workers)
+        for k, conn in enumerate(conns):
+            owned[conn] = deque(range(k * len(tiles) // len(conns), (k + 1) * len(tiles) // len(conns)))
+        retry = deque()
+        running = {}
+
+        def next_tile(conn):
+            # Retried tiles first, then the worker's own queue from the
+            # front, then half of the longest queue stolen from the back
+            if retry:
+                return retry.popleft()
+            mine = owned.setdefault(conn, deque())
+            if not mine:
+                victim = max(owned.values(), key=len)
+                if not victim:
+                    return None
+                for _ in range((len(victim) + 1) // 2):
+                    mine.appendleft(victim.pop())
+                self.steals += 1
+            return mine.popleft()
+
+        def dispatch(conn):
+            tile = next_tile(conn)
+            if tile is None:
+                return
+            try:
+                conn.send(('tile', tile, job) + tiles[tile])
+            except (OSError, EOFError):
+                fail(conn, tile)
+                return
+            attempts[tile] += 1
+            running[conn] = tile
+
+        def fail(conn, tile, reason=None):
+            # A lost worker's queue stays behind for the others to steal
+            if reason is None:
+                self._drop(conn)
+                reason = "worker disconnected"
+            if attempts[tile] > self.max_retries:
+                raise RuntimeError(f"Tile {tiles[tile]} failed {attempts[tile]} times: {reason}")
+            self.retries += 1
+            retry.appendleft(tile)
+
+        try:
+            while remaining:
+                self._admit()
+                for conn in list(self.workers):
+                    if conn not in running:
+                        dispatch(conn)
+                if not running:
+                    if not self.workers:
+                        self._check_alive()
+                    self._admit(timeout=0.1)
+                    continue
+
+                for conn in connection.wait(list(running), timeout=0.1):
+                    tile = running.pop(conn)
+                    try:
+                        message = conn.recv()
+                    except (OSError, EOFError):
+                        fail(conn, tile)
+                        continue
+                    if message[0] == 'failed':
+                        fail(conn, tile, message[2])
+                        continue
+
+                    _, _, result, seconds = message
+                    x0, y0 = tiles[tile]
+                    h = min(size, height - y0)
+                    w = min(size, width - x0)
+                    out[y0:y0 + h, x0:x0 + w] = result[:h, :w]
+                    self.timings.append((tiles[tile], self.workers[conn], seconds, attempts[tile]))
+                    remaining -= 1
+        finally:
+            # Collect tiles still in flight after an error so the next
+            # render does not receive them
+            for conn in running:
+                try:
+                    conn.recv()
+                except (OSError, EOFError):
+                    self._drop(conn)
+
+        return out
+
+    def _check_alive(self):
+        """Fail instead of waiting forever once every local worker has died"""
+        if self.processes and not any(process.is_alive() for process in self.processes) \
+                and self._joining.empty():
+            raise RuntimeError("No workers left to render tiles")
+
+    def report(self):
+        """Summary of the per-tile timings of the last render"""
+        if not self.timings:
+            return "No tiles rendered"
+        seconds = np.array([t[2] for t in self.timings])
+        per_worker = {}
+        for _, worker, elapsed, _ in self.timings:
+            count, total = per_worker.get(worker, (0, 0.0))
+            per_worker[worker] = (count + 1, total + elapsed)
+
+        lines = [
+            f"{len(seconds)} tiles: min {seconds.min() * 1000:.1f} ms, "
+            f"median {np.median(seconds) * 1000:.1f} ms, max {seconds.max() * 1000:.1f} ms",
+            f"{self.steals} steals, {self.retries} retries",
+        ]
+        for worker, (count, total) in sorted(per_worker.items()):
+            lines.append(f"  {worker}: {count} tiles, {total:.2f} s busy")
+        return "\n".join(lines)
+
+    def close(self):
+        for conn in list(self.workers):
+            try:
+                conn.send(('stop',))
+            except (OSError, EOFError):
+                pass
+            self._drop(conn)
+        self._closed = True
+        self._listener.close()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed tile rendering")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker = commands.add_parser('worker', help="render tiles for a scheduler")
+    worker.add_argument('address', help="scheduler HOST:PORT")
+    worker.add_argument('--authkey', default=os.environ.get(AUTHKEY_ENV),
+                        help=f"key printed by the scheduler (default: ${AUTHKEY_ENV})")
+    worker.add_argument('--threads', type=int)
+
+    render = commands.add_parser('render', help="render an image with a pool of workers")
+    render.add_argument('output', help="output path (.png, .raw or .npy)")
+    render.add_argument('--size', nargs=2, type=int, default=(1920, 1080),
+                        metavar=('WIDTH', 'HEIGHT'))
+    render.add_argument('--center', nargs=2, type=float, default=(-0.5, 0.0), metavar=('X', 'Y'))
+    render.add_argument('--zoom', type=float, default=1.0)
+    render.add_argument('--iterations', type=int, default=512)
+    render.add_argument('--julia', nargs=2, type=float, metavar=('RE', 'IM'))
+    render.add_argument('--colormap', default='viridis')
+    render.add_argument('--equalize', action='store_true', help="histogram-equalized colors")
+    render.add_argument('--solver', choices=SOLVERS, default='brute')
+    render.add_argument('--workers', type=int, help="local worker processes (default: one per core)")
+    render.add_argument('--tile-size', type=int, default=128)
+    render.add_argument('--listen', default='localhost:0',
+                        help="HOST:PORT remote workers connect to")
+    render.add_argument('--authkey', default=os.environ.get(AUTHKEY_ENV),
+                        help=f"key workers must present (default: ${AUTHKEY_ENV}, "
+                             "else random; required off loopback)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        if not args.authkey:
+            worker.error(f"an authkey is required, from --authkey or ${AUTHKEY_ENV}")
+        run_worker(parse_address(args.address), args.authkey.encode(), args.threads)
+        return
+
+    from color_handler import ColorHandler
+    from image_writer import open_writer
+
+    width, height = args.size
+    span_x = 4 / args.zoom
+    span_y = span_x * (height - 1) / (width - 1)
+    x, y = args.center
+    julia_c = complex(*args.julia) if args.julia else None
+    address = parse_address(args.listen)
+    if not args.authkey and not is_loopback(address[0]):
+        render.error(f"--listen {args.listen} needs --authkey or ${AUTHKEY_ENV}")
+
+    authkey = args.authkey.encode() if args.authkey else None
+    with TileScheduler(args.workers, args.tile_size, address, authkey) as scheduler:
+        print(f"Listening on {scheduler.address[0]}:{scheduler.address[1]}", file=sys.stderr)
+        if authkey is None:
+            print(f"Worker authkey: {scheduler.authkey.decode()}", file=sys.stderr)
+        start = time.perf_counter()
+        iterations = scheduler.render(x - span_x / 2, x + span_x / 2, y - span_y / 2, y + span_y / 2,
+                                      width, height, args.iterations,
+                                      julia_c is not None, julia_c, args.solver)
+        print(f"Rendered in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+        print(scheduler.report(), file=sys.stderr)
+
+    # Colorize and stream out in strips
+    color_handler = ColorHandler()
+    color_handler.set_colormap(args.colormap)
+    histogram = None
+    if args.equalize:
+        # One histogram of the whole image for every strip
+        color_handler.set_mode('histogram')
+        histogram = color_handler.histogram(iterations, args.iterations)
+    writer = open_writer(args.output, width, height)
+    try:
+        for row in range(0, height, 256):
+            writer.write(color_handler.colorize(iterations[row:row + 256], args.iterations,
+                                                histogram=histogram))
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Fractal formulas and their generated kernels
+
+Each formula is a few lines of numba code advancing the orbit z of a
+point p by one step. Its kernels are written out from a template as a
+module of their own, with the step inlined into the iteration loop, so
+every formula compiles to specialized machine code and numba's on-disk
+cache keeps it across launches. Escape-time formulas stop once |z|
+passes the bailout; convergent ones (Newton's method) once z stops moving.
+
+Every formula renders in Mandelbrot mode, where z starts at the critical
+point and p is the pixel, and in Julia mode, where z starts at the pixel
+and p is the Julia constant.
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+
+# Generated kernel modules live next to the bytecode cache, or in the
+# temporary directory when the package directory is read-only
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__', 'formulas')
+
+# Squared step length below which a convergent orbit counts as settled
+CONVERGE_EPSILON = 1e-12
+
+TEMPLATE = '''\
+# Generated by formulas.py for the {name!r} formula; edits are overwritten
+import math
+
+from numba import njit, prange
+
+from kernels import PERIOD_EPSILON, SEED_UNKNOWN, SMOOTH_BAILOUT, SMOOTH_EXTRA, count_row
+
+CONVERGE_EPSILON = {converge_epsilon!r}
+
+
+@njit(fastmath=True, nogil=True, cache=True, inline='always')
+def step(z, p):
+{step}
+    return z
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def escape_time(real, imag, max_iter, is_julia, c, periodicity=False):
+    if is_julia:
+        z = complex(real, imag)
+        p = c
+    else:
+        z = {critical!r}
+        p = complex(real, imag)
+{escape}
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def smooth_escape_time(real, imag, max_iter, is_julia, c, periodicity=False):
+    if is_julia:
+        z = complex(real, imag)
+        p = c
+    else:
+        z = {critical!r}
+        p = complex(real, imag)
+{smooth_escape}
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, is_julia, c,
+                 periodicity, out, smooth, counts):
+    counting = counts.shape[0] > 0
+    for i in prange(height):
+        imag = ymin + (ymax - ymin) * i / (height - 1)
+        for j in range(width):
+            real = xmin + (xmax - xmin) * j / (width - 1)
+            if smooth:
+                out[i, j] = smooth_escape_time(real, imag, max_iter, is_julia, c, periodicity)
+            else:
+                out[i, j] = escape_time(real, imag, max_iter, is_julia, c, periodicity)
+        if counting:
+            count_row(counts, 0, out[i], max_iter)
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c, seed,
+                 periodicity, out, smooth, counts):
+    count = tile_x.shape[0]
+    seeded = seed.shape[0] > 0
+    counting = counts.shape[0] > 0
+    for row in prange(count * tile_size):
+        t = row // tile_size
+        i = row % tile_size
+        imag = (tile_y[t] * tile_size + i) * step_y
+        for j in range(tile_size):
+            if seeded and seed[t, i, j] != SEED_UNKNOWN:
+                out[t, i, j] = seed[t, i, j]
+                continue
+            real = (tile_x[t] * tile_size + j) * step_x
+            if smooth:
+                out[t, i, j] = smooth_escape_time(real, imag, max_iter, is_julia, c, periodicity)
+            else:
+                out[t, i, j] = escape_time(real, imag, max_iter, is_julia, c, periodicity)
+        if counting:
+            count_row(counts, t, out[t, i], max_iter)
+    return out
+'''
+
+# Escape-time loops: integer counts at radius 2, fractional ones at
+# SMOOTH_BAILOUT normalized for the formula's degree, with Brent cycle checks
+ESCAPE = '''\
+    saved = z
+    window = 8
+    steps = 0
+    for k in range(max_iter):
+        z = step(z, p)
+        if z.real * z.real + z.imag * z.imag > 4.0:
+            return k
+        if periodicity:
+            dr = z.real - saved.real
+            di = z.imag - saved.imag
+            if dr * dr + di * di < PERIOD_EPSILON:
+                return max_iter - 1
+            steps += 1
+            if steps == window:
+                saved = z
+                steps = 0
+                window *= 2
+    return max_iter - 1'''
+
+SMOOTH_ESCAPE = '''\
+    bailout = SMOOTH_BAILOUT * SMOOTH_BAILOUT
+    saved = z
+    window = 8
+    steps = 0
+    for k in range(max_iter + SMOOTH_EXTRA):
+        z = step(z, p)
+        mag = z.real * z.real + z.imag * z.imag
+        if mag > bailout:
+            mu = k - math.log(0.5 * math.log(mag) / math.log(2.0)) / math.log({degree!r})
+            return min(max(mu, 0.0), max_iter - 1.0)
+        if k >= max_iter - 1 and mag <= 4.0:
+            return max_iter - 1.0
+        if periodicity:
+            dr = z.real - saved.real
+            di = z.imag - saved.imag
+            if dr * dr + di * di < PERIOD_EPSILON:
+                return max_iter - 1.0
+            steps += 1
+            if steps == window:
+                saved = z
+                steps = 0
+                window *= 2
+    return max_iter - 1.0'''
+
+# Convergent loops count the steps until z settles; orbits that never do
+# (cycles, or the poles of the step) run to max_iter - 1
+CONVERGE = '''\
+    for k in range(max_iter):
+        previous = z
+        z = step(z, p)
+        dr = z.real - previous.real
+        di = z.imag - previous.imag
+        if dr * dr + di * di < CONVERGE_EPSILON:
+            return k
+    return max_iter - 1'''
+
+# Quadratic convergence doubles log|dz| every step, which the fractional
+# part interpolates
+SMOOTH_CONVERGE = '''\
+    for k in range(max_iter):
+        previous = z
+        z = step(z, p)
+        dr = z.real - previous.real
+        di = z.imag - previous.imag
+        d = dr * dr + di * di
+        if d < CONVERGE_EPSILON:
+            if d <= 0.0:
+                return float(k)
+            mu = k - math.log2(math.log(d) / math.log(CONVERGE_EPSILON))
+            return min(max(mu, 0.0), max_iter - 1.0)
+    return max_iter - 1.0'''
+
+
+class Formula:
+    def __init__(self, name, step, degree=2, critical=0j, converge=False):
+        """
+        An iteration z -> step(z, p), given as lines of numba code that
+        update the complex `z` from it and the complex `p`
+        degree normalizes smooth escape counts; critical is where Mandelbrot
+        mode starts z; converge=True stops orbits that settle instead of
+        orbits that escape.
+        """
+        self.name = name
+        self.step = list(step)
+        self.degree = degree
+        self.critical = critical
+        self.converge = converge
+        self._module = None
+
+    def source(self):
+        """Python source of the formula's kernel module"""
+        return TEMPLATE.format(
+            name=self.name,
+            converge_epsilon=CONVERGE_EPSILON,
+            step='\n'.join('    ' + line for line in self.step),
+            critical=complex(self.critical),
+            escape=CONVERGE if self.converge else ESCAPE,
+            smooth_escape=(SMOOTH_CONVERGE if self.converge else SMOOTH_ESCAPE).format(
+                degree=float(self.degree)
+            ),
+        )
+
+    @property
+    def kernels(self):
+        """The generated module, written and imported on first use"""
+        if self._module is None:
+            source = self.source()
+            try:
+                path = write_module(GENERATED_DIR, self.name, source)
+            except OSError:
+                path = write_module(os.path.join(tempfile.gettempdir(), 'fractalforge-formulas'),
+                                    self.name, source)
+            spec = importlib.util.spec_from_file_location(f'formula_{self.name}', path)
+            module = importlib.util.module_from_spec(spec)
+            # Registered before running, so numba can find the module when
+            # it loads cached kernels
+            sys.modules[spec.name] = module
+            spec.loader.exec_module(module)
+            self._module = module
+        return self._module
+
+
+def write_module(directory, name, source):
+    """Write a generated module unless it is unchanged, which keeps numba's cache valid"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'formula_{name}.py')
+    try:
+        with open(path) as f:
+            if f.read() == source:
+                return path
+    except FileNotFoundError:
+        pass
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'w') as f:
+        f.write(source)
+    os.replace(temp, path)
+    return path
+
+
+def multibrot(power):
+    """z^power + c, expanded into power - 1 complex multiplications"""
+    return Formula(f'multibrot{power}', [f"z = {' * '.join(['z'] * power)} + p"], degree=power)
+
+
+FORMULAS = {}
+
+
+def register(formula):
+    """Add a formula to the registry under its name and return it"""
+    FORMULAS[formula.name] = formula
+    return formula
+
+
+def get_formula(name):
+    """Registered formula by name"""
+    try:
+        return FORMULAS[name]
+    except KeyError:
+        raise ValueError(f"Unknown formula: {name}") from None
+
+
+# The quadratic family renders through the hand-tuned kernels in
+# fractal_generator; its entry here is a template baseline for benchmarks
+register(Formula('mandelbrot', ["z = z * z + p"]))
+register(multibrot(3))
+register(multibrot(4))
+register(Formula('burning_ship', ["z = complex(abs(z.real), abs(z.imag))", "z = z * z + p"]))
+register(Formula('tricorn', ["z = z.conjugate()", "z = z * z + p"]))
+# Newton's method for z^3 - 1, shifted by p: Julia mode with c = 0 is the
+# classic Newton fractal and Mandelbrot mode starts from the critical point 1
+# numba's complex division raises at zero, so the step divides by the
+# floored squared magnitude instead: z = 0, where it is undefined, stays put
+register(Formula('newton', ["d = 3.0 * z * z",
+                            "r = 1.0 / max(d.real * d.real + d.imag * d.imag, 1e-300)",
+                            "z = z - (z * z * z - 1.0) * d.conjugate() * r + p"],
+                 critical=1 + 0j, converge=True))
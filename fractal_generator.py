@@ -1,92 +1,888 @@
+import math
+from contextlib import contextmanager
+
 import numpy as np
 import numba
 from numba import njit, prange
+from perturbation import PerturbationEngine
+from boundary_solver import boundary_frame, boundary_tiles
+from formulas import FORMULAS, get_formula
+from kernels import (NO_COUNTS, SEED_UNKNOWN, count_row, escape_lanes_f32, escape_time,
+                     histogram_bins, histogram_kernel, pixel_jitter, smooth_escape_time)
+from tile_cache import TileCache
+
+# Smallest pixel spacing rendered in float32: its rounding near the escape
+# radius stays below 1/256 of a pixel, well under the sampling noise of
+# shifting the pixel grid, so switching tiers shows no seams or noise
+FLOAT32_MIN_STEP = 256 * float(np.spacing(np.float32(2.0)))
+
+# Per-pixel iteration, or Mariani-Silver boundary tracing
+SOLVERS = ('brute', 'boundary')
+
+# Parallel loops either hand each thread one contiguous share of the rows,
+# or let idle threads pull small chunks so interior-heavy bands spread out
+SCHEDULES = ('static', 'dynamic')
 
 class FractalGenerator:
-    def __init__(self, width, height):
+    def __init__(self, width, height, tile_size=64, cache_mb=256, solver='brute',
+                 schedule='dynamic', threads=None, formula='mandelbrot'):
+        # Pixel steps are span / (size - 1), so each side needs two pixels
+        if width < 2 or height < 2:
+            raise ValueError(f"Invalid dimensions: {width}x{height}")
+        
         # Pre-allocate high-precision buffers
         self.width = width
         self.height = height
         self.iterations_buffer = np.zeros((height, width), dtype=np.uint32)
+
+        # Output buffers reused across frames, keyed by (shape, dtype)
+        self.buffers = {((height, width), np.dtype(np.uint32)): self.iterations_buffer}
+
+        # Default solver for tiled rendering
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
+        self.solver = solver
+        self.block_size = 64
+        self.min_block = 4
+
+        # Thread scheduling; threads=None uses every numba thread. Chunks
+        # of row loops are chunk_size rows, loops over blocks or tiles
+        # hand out one at a time
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule: {schedule}")
+        if threads is not None and not 1 <= threads <= numba.config.NUMBA_NUM_THREADS:
+            raise ValueError(f"Invalid thread count: {threads}")
+        self.schedule = schedule
+        self.threads = threads
+        self.chunk_size = 4
+
+        # Iterated formula, by name in formulas.FORMULAS. The quadratic
+        # 'mandelbrot' family uses the kernels below, with every solver,
+        # float32 tier, anti-aliasing and deep zoom; other formulas render
+        # per pixel in float64 through their generated kernels
+        if formula not in FORMULAS:
+            raise ValueError(f"Unknown formula: {formula}")
+        self.formula = formula
+
+        # Kernel early-outs: cardioid/bulb test and orbit cycle detection
+        self.interior_check = True
+        self.periodicity = True
+
+        # Normalized fractional escape counts in float32 instead of uint32 counts
+        self.smooth = False
+
+        # With equalize, the kernels count an escape-count histogram of
+        # every row or block as they write it, and each pass leaves the
+        # merged counts in `histogram` for histogram-equalized coloring
+        self.equalize = False
+        self.histogram = None
+
+        # Grid-aligned tiles reused across pans
+        self.tile_size = tile_size
+        self.tile_cache = TileCache(cache_mb * 1024 * 1024)
+
+        # Optional TileStore that keeps full-resolution tiles and deep-zoom
+        # frames on disk across restarts
+        self.tile_store = None
+
+        # Key of the previous tiled pass, whose samples can seed a finer one
+        self.previous_pass = None
         
-        # Use higher precision for calculations
+        # Coordinate precision: None picks float32 or float64 per view from
+        # the pixel spacing; dtype is the precision of the last pass
+        self.precision = None
         self.dtype = np.float64
 
+        # Pixel (i, j) of the last pass lies at base + (origin + (j, i)) * step,
+        # as (base_x, base_y, origin_x, origin_y, step_x, step_y); None
+        # after a perturbation pass, which has no float64 grid
+        self.grid = None
+
+        # Anti-aliasing refines pixels whose escape count differs from a
+        # neighbour's by more than this fraction of the logarithmic color scale
+        self.edge_threshold = 1 / 128
+
+        # Reference-orbit engine for zooms beyond float64 resolution
+        self.perturbation = PerturbationEngine()
+
     @staticmethod
-    @njit(parallel=True, fastmath=True)
-    def generate_mandelbrot(xmin, xmax, ymin, ymax, width, height, max_iter):
+    def generate_mandelbrot(xmin, xmax, ymin, ymax, width, height, max_iter,
+                            interior_check=False, periodicity=False, out=None, smooth=False,
+                            precision=np.float64, counts=NO_COUNTS):
         """
         High-precision Mandelbrot set generation with parallel processing
-        Uses float64 for maximum precision
+        Uses float64 unless precision=np.float32 selects the vectorized
+        kernel; writes into `out` when given.
+        smooth=True returns fractional escape counts as float32. A
+        (threads, 1, bins) `counts` collects per-thread escape-count
+        histograms as the rows are written.
+        """
+        if out is None:
+            out = np.zeros((height, width), dtype=np.float32 if smooth else np.uint32)
+        if precision == np.float32:
+            return lanes_frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, False, 0j,
+                                      interior_check, periodicity, out, smooth, counts)
+        return mandelbrot_kernel(xmin, xmax, ymin, ymax, width, height, max_iter,
+                                 interior_check, periodicity, out, smooth, counts)
+
+    @staticmethod
+    def generate_julia(xmin, xmax, ymin, ymax, width, height, max_iter, c,
+                       periodicity=False, out=None, smooth=False, precision=np.float64,
+                       counts=NO_COUNTS):
+        """
+        High-precision Julia set generation with parallel processing
+        Uses float64 unless precision=np.float32 selects the vectorized
+        kernel; writes into `out` when given.
+        smooth=True returns fractional escape counts as float32; `counts`
+        collects histograms as in generate_mandelbrot.
+        """
+        if out is None:
+            out = np.zeros((height, width), dtype=np.float32 if smooth else np.uint32)
+        if precision == np.float32:
+            return lanes_frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, True, c,
+                                      False, periodicity, out, smooth, counts)
+        return julia_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, c,
+                            periodicity, out, smooth, counts)
+
+    @staticmethod
+    def generate_tiles(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c, seed,
+                       interior_check=False, periodicity=False, out=None, smooth=False,
+                       precision=np.float64, counts=NO_COUNTS):
+        """
+        Render a batch of grid-aligned tiles in one parallel launch
+        Pixel (i, j) of tile (tx, ty) sits at global grid position
+        (tx * tile_size + j, ty * tile_size + i). Pixels with a known
+        value in `seed` (an empty array disables seeding) are not iterated.
+        A (threads, tiles, bins) `counts` collects each thread's escape-count
+        histogram of every tile as it is written.
+        """
+        if out is None:
+            out = np.zeros((tile_x.shape[0], tile_size, tile_size),
+                           dtype=np.float32 if smooth else np.uint32)
+        if precision == np.float32:
+            return lanes_tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia,
+                                      c, seed, interior_check, periodicity, out, smooth, counts)
+        return tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c,
+                            seed, interior_check, periodicity, out, smooth, counts)
+
+    def frame_shape(self, scale=1.0):
+        """(height, width) of a pass rendered at the given resolution scale"""
+        factor = max(1, int(round(1 / scale)))
+        return -(-self.height // factor), -(-self.width // factor)
+
+    def precision_for(self, step_x, step_y, magnitude=2.0):
+        """
+        Coordinate precision for a pass with the given pixel spacing
+        float32 while its rounding at `magnitude`, the escape radius or the
+        largest coordinate if that is bigger, is a small fraction of a pixel
+        """
+        if self.precision is not None:
+            return self.precision
+        step = min(abs(step_x), abs(step_y))
+        if step >= FLOAT32_MIN_STEP * max(magnitude, 2.0) / 2.0:
+            return np.float32
+        return np.float64
+
+    @property
+    def output_dtype(self):
+        """Element type of the escape counts this generator returns"""
+        return np.float32 if self.smooth else np.uint32
+
+    @contextmanager
+    def parallel(self, chunk_size=None):
+        """
+        Apply the thread count and schedule to kernels launched in the block
+        numba keeps both per calling thread, so they are set around every
+        pass instead of once.
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        threads = numba.get_num_threads()
+        numba.set_num_threads(self.threads or numba.config.NUMBA_NUM_THREADS)
+        previous = numba.set_parallel_chunksize(chunk_size if self.schedule == 'dynamic' else 0)
+        try:
+            yield
+        finally:
+            numba.set_parallel_chunksize(previous)
+            numba.set_num_threads(threads)
+
+    def histogram_counts(self, tiles, max_iter):
         """
-        div_time = np.zeros((height, width), dtype=np.uint32)
+        Zeroed per-thread histograms for a pass over `tiles` tiles, sized for
+        the threads parallel() runs, or NO_COUNTS without equalize
+        """
+        if not self.equalize:
+            return NO_COUNTS
+        threads = self.threads or numba.config.NUMBA_NUM_THREADS
+        return np.zeros((threads, tiles, histogram_bins(max_iter)), dtype=np.uint32)
+
+    def output_buffer(self, shape, dtype=np.uint32):
+        """
+        Reusable output buffer for a pass of the given shape
+        Its contents are overwritten by the next pass of the same shape
+        """
+        key = (tuple(shape), np.dtype(dtype))
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[key] = buffer
+        return buffer
+
+    def generate(self, xmin, xmax, ymin, ymax, max_iter, is_julia=False, julia_c=None,
+                 solver='brute'):
+        """
+        Generate fractal with adaptive precision and parallel processing
+        solver='boundary' skips uniform regions by tracing rectangle borders.
+        Views coarse enough for float32 use the vectorized kernel instead,
+        which outpaces tracing. Formulas other than 'mandelbrot' always run
+        their own per-pixel kernel. The returned array is reused by the next
+        frame of the same size.
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
+        if max_iter < 1:
+            raise ValueError(f"Invalid iteration count: {max_iter}")
         
-        for i in prange(height):
-            for j in prange(width):
-                # Map pixel coordinates to complex plane
-                real = xmin + (xmax - xmin) * j / (width - 1)
-                imag = ymin + (ymax - ymin) * i / (height - 1)
-                
-                c = complex(real, imag)
-                z = 0j
-                
-                for k in range(max_iter):
-                    z = z * z + c
-                    if z.real * z.real + z.imag * z.imag > 4.0:
-                        div_time[i, j] = k
-                        break
-                else:
-                    div_time[i, j] = max_iter - 1
+        # Default Julia constant if not provided
+        if is_julia and julia_c is None:
+            julia_c = complex(-0.4, 0.6)
+        
+        shape = (self.height, self.width)
+        out = self.output_buffer(shape, self.output_dtype)
+        self.grid = (xmin, ymin, 0, 0, (xmax - xmin) / (self.width - 1),
+                     (ymax - ymin) / (self.height - 1))
+        counts = self.histogram_counts(1, max_iter)
+        self.histogram = None
+        if self.formula != 'mandelbrot':
+            self.dtype = np.float64
+            with self.parallel():
+                self.iterations_buffer = get_formula(self.formula).kernels.frame_kernel(
+                    xmin, xmax, ymin, ymax,
+                    self.width, self.height,
+                    max_iter, is_julia, julia_c if is_julia else 0j,
+                    self.periodicity, out, self.smooth, counts
+                )
+            if self.equalize:
+                self.histogram = counts.sum(axis=(0, 1), dtype=np.int64)
+            return self.iterations_buffer
+        
+        self.dtype = self.precision_for(
+            (xmax - xmin) / (self.width - 1), (ymax - ymin) / (self.height - 1),
+            max(abs(xmin), abs(xmax), abs(ymin), abs(ymax), abs(julia_c) if is_julia else 0.0)
+        )
+        
+        # Choose generation method; boundary tracing parallelizes over blocks
+        tracing = solver == 'boundary' and self.dtype != np.float32
+        with self.parallel(1 if tracing else None):
+            if self.dtype == np.float32:
+                self.iterations_buffer = lanes_frame_kernel(
+                    xmin, xmax, ymin, ymax,
+                    self.width, self.height,
+                    max_iter, is_julia, julia_c if is_julia else 0j,
+                    self.interior_check and not is_julia, self.periodicity,
+                    out, self.smooth, counts
+                )
+            elif solver == 'boundary':
+                done = self.output_buffer(shape, np.bool_)
+                done[:] = False
+                self.iterations_buffer = boundary_frame(
+                    xmin, xmax, ymin, ymax,
+                    self.width, self.height,
+                    max_iter, is_julia, julia_c if is_julia else 0j,
+                    self.block_size, self.min_block,
+                    self.interior_check, self.periodicity,
+                    out, done, self.smooth, counts
+                )
+            elif is_julia:
+                self.iterations_buffer = self.generate_julia(
+                    xmin, xmax, ymin, ymax, 
+                    self.width, self.height, 
+                    max_iter, julia_c, self.periodicity, out, self.smooth, counts=counts
+                )
+            else:
+                self.iterations_buffer = self.generate_mandelbrot(
+                    xmin, xmax, ymin, ymax, 
+                    self.width, self.height, 
+                    max_iter, self.interior_check, self.periodicity, out, self.smooth,
+                    counts=counts
+                )
+        if self.equalize:
+            self.histogram = counts.sum(axis=(0, 1), dtype=np.int64)
+        
+        return self.iterations_buffer
+
+    def generate_deep(self, center_x, center_y, span_x, span_y, max_iter,
+                      is_julia=False, julia_c=None, scale=1.0):
+        """
+        Deep-zoom generation using perturbation theory
+        The center may be a Decimal or string with more digits than float64 holds
+        """
+        if self.formula != 'mandelbrot':
+            raise ValueError(f"No deep zoom for the {self.formula} formula")
+        if is_julia and julia_c is None:
+            julia_c = complex(-0.4, 0.6)
+
+        height, width = self.frame_shape(scale)
+        self.dtype = np.float64
+        self.grid = None
+        self.histogram = None
+        out = self.output_buffer((height, width), self.output_dtype)
+        
+        # Full-resolution frames are stored whole, keyed by the exact center
+        store = self.tile_store if scale >= 1 else None
+        key = ('deep', 'julia' if is_julia else 'mandelbrot', julia_c if is_julia else 0j,
+               str(center_x), str(center_y), span_x, span_y, width, height, max_iter,
+               out.dtype.str)
+        stored = store.get(key) if store is not None else None
+        if stored is not None:
+            np.copyto(out, stored)
+            self.iterations_buffer = out
+            if self.equalize:
+                # Stored frames are not rendered, so they are counted here
+                chunks = self.threads or numba.config.NUMBA_NUM_THREADS
+                counts = np.empty((chunks, histogram_bins(max_iter)), dtype=np.uint32)
+                with self.parallel(1):
+                    histogram_kernel(out[np.newaxis], max_iter, chunks, counts)
+                self.histogram = counts.sum(axis=0, dtype=np.int64)
+            return out
+        
+        counts = self.histogram_counts(1, max_iter)
+        with self.parallel():
+            self.iterations_buffer = self.perturbation.render(
+                center_x, center_y, span_x, span_y,
+                width, height, max_iter,
+                julia_c if is_julia else None,
+                out=out,
+                smooth=self.smooth,
+                counts=counts
+            )
+        if self.equalize:
+            self.histogram = counts.sum(axis=(0, 1), dtype=np.int64)
+        if store is not None:
+            store.put(key, self.iterations_buffer)
+
+        return self.iterations_buffer
+
+    def generate_julia_atlas(self, cs, width, height, max_iter, columns=None,
+                             bounds=(-2.0, 2.0, -1.5, 1.5)):
+        """
+        Julia sets for an array of constants, rendered in one kernel launch
+        Each constant gets a width x height thumbnail of `bounds`, packed
+        row by row into an atlas `columns` thumbnails wide (near square by
+        default); cells past the last constant are zero. Formulas other
+        than 'mandelbrot' take a launch per thumbnail. The atlas is reused
+        by the next pass of the same shape.
+        """
+        cs = np.ascontiguousarray(cs, dtype=np.complex128).ravel()
+        if len(cs) == 0 or width < 2 or height < 2:
+            raise ValueError(f"Invalid atlas: {len(cs)} thumbnails of {width}x{height}")
+        if max_iter < 1:
+            raise ValueError(f"Invalid iteration count: {max_iter}")
+        if columns is None:
+            columns = int(np.ceil(np.sqrt(len(cs))))
+        rows = -(-len(cs) // columns)
+        
+        xmin, xmax, ymin, ymax = bounds
+        self.dtype = self.precision_for(
+            (xmax - xmin) / (width - 1), (ymax - ymin) / (height - 1),
+            max(abs(xmin), abs(xmax), abs(ymin), abs(ymax), np.abs(cs).max())
+        )
+        atlas = self.output_buffer((rows * height, columns * width), self.output_dtype)
+        atlas.fill(0)
+        if self.formula != 'mandelbrot':
+            # One launch per cell through the formula's own kernel
+            self.dtype = np.float64
+            kernels = get_formula(self.formula).kernels
+            with self.parallel():
+                for n, c in enumerate(cs):
+                    y0, x0 = n // columns * height, n % columns * width
+                    kernels.frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, True, c,
+                                         self.periodicity, atlas[y0:y0 + height, x0:x0 + width],
+                                         self.smooth, NO_COUNTS)
+            return atlas
+        with self.parallel():
+            julia_atlas_kernel(
+                cs, xmin, xmax, ymin, ymax, width, height, max_iter,
+                self.periodicity, self.dtype == np.float32, atlas, self.smooth
+            )
+        
+        return atlas
+
+    def supersample_edges(self, iterations, max_iter, is_julia=False, julia_c=None, grid=2):
+        """
+        Jittered subsamples of the edge pixels of the last pass
+        A pixel is an edge when its escape count differs from a 4-neighbour's
+        by more than edge_threshold on the logarithmic color scale. Each edge
+        pixel gets grid x grid subsamples at the precision of the pass, one
+        per stratum, jittered by a hash of the global row so a pixel is
+        sampled the same way in every frame. Returns (rows, cols, samples)
+        with the first-pass value in column 0 of samples, or None after a
+        perturbation pass or with a formula other than 'mandelbrot'.
+        """
+        if self.grid is None or self.formula != 'mandelbrot':
+            return None
+        if is_julia and julia_c is None:
+            julia_c = complex(-0.4, 0.6)
         
-        return div_time
+        mask = self.output_buffer(iterations.shape, np.bool_)
+        edge_mask_kernel(iterations, max_iter, self.edge_threshold, mask)
+        rows, cols = np.divmod(np.flatnonzero(mask), mask.shape[1])
+        
+        samples = np.empty((len(rows), grid * grid + 1), dtype=iterations.dtype)
+        samples[:, 0] = iterations[rows, cols]
+        with self.parallel(1):
+            supersample_kernel(
+                rows, cols, *self.grid, grid, max_iter, is_julia, julia_c if is_julia else 0j,
+                self.interior_check and not is_julia, self.periodicity,
+                self.dtype == np.float32, samples, self.smooth
+            )
+        
+        return rows, cols, samples
 
     @staticmethod
-    @njit(parallel=True, fastmath=True)
-    def generate_julia(xmin, xmax, ymin, ymax, width, height, max_iter, c):
+    def _assemble(tiles, tile_size, origin_x, origin_y, width, height, fill=None, out=None,
+                  dtype=np.uint32):
+        """Copy the overlap of each (tx, ty) -> tile entry into a frame"""
+        frame = np.empty((height, width), dtype=dtype) if out is None else out
+        if fill is not None:
+            frame.fill(fill)
+        
+        size = tile_size
+        for (tx, ty), tile in tiles.items():
+            x0 = max(tx * size, origin_x)
+            x1 = min((tx + 1) * size, origin_x + width)
+            y0 = max(ty * size, origin_y)
+            y1 = min((ty + 1) * size, origin_y + height)
+            if x0 < x1 and y0 < y1:
+                frame[y0 - origin_y:y1 - origin_y, x0 - origin_x:x1 - origin_x] = \
+                    tile[y0 - ty * size:y1 - ty * size, x0 - tx * size:x1 - tx * size]
+        
+        return frame
+
+    def _seed_tiles(self, missing, key_base):
         """
-        High-precision Julia set generation with parallel processing
-        Uses float64 for maximum precision
+        Escape counts for the missing tiles taken from a coarser previous pass
+        Its grid is an integer multiple of the current one, so every coarse
+        sample lands exactly on a fine pixel. Samples that escaped are final;
+        the rest stay SEED_UNKNOWN and are iterated again.
         """
-        div_time = np.zeros((height, width), dtype=np.uint32)
+        fractal, c, step_x, step_y, max_iter, dtype = key_base[:6]
+        previous = self.previous_pass
+        if previous is None or previous[:2] != (fractal, c) or previous[5] != dtype:
+            return None
         
-        for i in prange(height):
-            for j in prange(width):
-                # Map pixel coordinates to complex plane
-                real = xmin + (xmax - xmin) * j / (width - 1)
-                imag = ymin + (ymax - ymin) * i / (height - 1)
-                
-                z = complex(real, imag)
-                
-                for k in range(max_iter):
-                    z = z * z + c
-                    if z.real * z.real + z.imag * z.imag > 4.0:
-                        div_time[i, j] = k
-                        break
-                else:
-                    div_time[i, j] = max_iter - 1
+        factor = int(round(previous[2] / step_x))
+        if factor < 2 or previous[2] != step_x * factor or previous[3] != step_y * factor:
+            return None
+        coarse_iter = previous[4]
+        
+        # Fine pixel region spanned by the missing tiles
+        size = self.tile_size
+        tile_x = np.array([tx for tx, _ in missing])
+        tile_y = np.array([ty for _, ty in missing])
+        col0, col1 = tile_x.min() * size, (tile_x.max() + 1) * size
+        row0, row1 = tile_y.min() * size, (tile_y.max() + 1) * size
         
-        return div_time
+        # Coarse samples falling inside it
+        ccol0, ccol1 = -(-col0 // factor), (col1 - 1) // factor + 1
+        crow0, crow1 = -(-row0 // factor), (row1 - 1) // factor + 1
+        coarse_tiles = {}
+        for cty in range(crow0 // size, (crow1 - 1) // size + 1):
+            for ctx in range(ccol0 // size, (ccol1 - 1) // size + 1):
+                tile = self.tile_cache.tiles.get(previous + (ctx, cty))
+                if tile is not None:
+                    coarse_tiles[ctx, cty] = tile
+        if not coarse_tiles:
+            return None
+        
+        values = self._assemble(
+            coarse_tiles, size, ccol0, crow0, ccol1 - ccol0, crow1 - crow0, SEED_UNKNOWN,
+            dtype=dtype
+        )
+        known = values < coarse_iter - 1
+        if coarse_iter >= max_iter:
+            known |= values != SEED_UNKNOWN
+        values = np.where(known, np.minimum(values, max_iter - 1), SEED_UNKNOWN)
+        
+        region = np.full((row1 - row0, col1 - col0), SEED_UNKNOWN, dtype=dtype)
+        region[crow0 * factor - row0::factor, ccol0 * factor - col0::factor] = values
+        
+        seed = np.empty((len(missing), size, size), dtype=dtype)
+        for n, (tx, ty) in enumerate(missing):
+            y = ty * size - row0
+            x = tx * size - col0
+            seed[n] = region[y:y + size, x:x + size]
+        return seed
 
-    def generate(self, xmin, xmax, ymin, ymax, max_iter, is_julia=False, julia_c=None):
+    def _tile_histogram(self, tiles, key_base, max_iter):
         """
-        Generate fractal with adaptive precision and parallel processing
+        Escape-count histogram of a pass, summed from the histograms cached
+        beside its tiles
+        Tiles without one, read from the tile store or left by a pass
+        without equalize, are counted now. Since the sum covers whole tiles,
+        every pass over the same tiles gets the same histogram.
+        """
+        bins = histogram_bins(max_iter)
+        total = np.zeros(bins, dtype=np.int64)
+        uncounted = []
+        for (tx, ty) in tiles:
+            counts = self.tile_cache.get(key_base + (tx, ty, 'histogram'))
+            if counts is None:
+                uncounted.append((tx, ty))
+            else:
+                total += counts
+        
+        if uncounted:
+            counts = np.empty((len(uncounted), bins), dtype=np.uint32)
+            with self.parallel(1):
+                histogram_kernel(np.stack([tiles[tile] for tile in uncounted]), max_iter, 1, counts)
+            for n, (tx, ty) in enumerate(uncounted):
+                self.tile_cache.put(key_base + (tx, ty, 'histogram'), counts[n].copy())
+            total += counts.sum(axis=0)
+        return total
+
+    def generate_tiled(self, xmin, xmax, ymin, ymax, max_iter, is_julia=False, julia_c=None,
+                       cancelled=None, scale=1.0, span=None):
+        """
+        Cached rendering on a global pixel grid
+        The view is snapped to the grid so only tiles missing from the
+        cache are computed, and pans cost time per newly exposed tile.
+        The grid step comes from span, the view's (width, height) as set by
+        the zoom, when given; bounds taken around a moving center differ in
+        their last bits and would otherwise start a new grid on every pan.
+        A scale below 1 renders a coarser pass on a grid that divides the
+        full-resolution one; the next finer pass reuses its samples.
+        Returns None if cancelled() turns true between tile batches.
+        Passes coarse enough for float32 use the vectorized kernel
+        whatever the solver.
         """
-        # Default Julia constant if not provided
         if is_julia and julia_c is None:
             julia_c = complex(-0.4, 0.6)
+        c = julia_c if is_julia else 0j
         
-        # Choose generation method
-        if is_julia:
-            self.iterations_buffer = self.generate_julia(
-                xmin, xmax, ymin, ymax, 
-                self.width, self.height, 
-                max_iter, julia_c
+        factor = max(1, int(round(1 / scale)))
+        height, width = self.frame_shape(scale)
+        span_x, span_y = span if span is not None else (xmax - xmin, ymax - ymin)
+        step_x = span_x / (self.width - 1) * factor
+        step_y = span_y / (self.height - 1) * factor
+        origin_x = int(round(xmin / step_x))
+        origin_y = int(round(ymin / step_y))
+        
+        size = self.tile_size
+        tiles_x = range(origin_x // size, (origin_x + width - 1) // size + 1)
+        tiles_y = range(origin_y // size, (origin_y + height - 1) // size + 1)
+        dtype = np.dtype(self.output_dtype)
+        builtin = self.formula == 'mandelbrot'
+        if builtin:
+            self.dtype = self.precision_for(
+                step_x, step_y, max(abs(xmin), abs(xmax), abs(ymin), abs(ymax), abs(c))
             )
+            fractal = 'julia' if is_julia else 'mandelbrot'
         else:
-            self.iterations_buffer = self.generate_mandelbrot(
-                xmin, xmax, ymin, ymax, 
-                self.width, self.height, 
-                max_iter
-            )
+            self.dtype = np.float64
+            fractal = self.formula + ('/julia' if is_julia else '')
+        key_base = (fractal, c, step_x, step_y, max_iter, dtype.str, np.dtype(self.dtype).str)
+        boundary = builtin and self.solver == 'boundary' and self.dtype != np.float32
+        
+        # Stored tiles are shared by generators with other tile sizes and
+        # solvers; coarse passes are transient and never stored
+        store = self.tile_store if factor == 1 else None
+        store_base = key_base + ('boundary' if boundary else 'brute', size)
+        
+        # Collect cached tiles and render the missing ones in a single batch
+        tiles = {}
+        missing = []
+        for ty in tiles_y:
+            for tx in tiles_x:
+                tile = self.tile_cache.get(key_base + (tx, ty))
+                if tile is None and store is not None:
+                    stored = store.get(store_base + (tx, ty))
+                    if stored is not None:
+                        tile = np.array(stored)
+                        self.tile_cache.put(key_base + (tx, ty), tile)
+                if tile is None:
+                    missing.append((tx, ty))
+                else:
+                    tiles[tx, ty] = tile
+        
+        # One batch per row of tiles keeps launches parallel and cancellable
+        batch = len(tiles_x)
+        for start in range(0, len(missing), batch):
+            if cancelled is not None and cancelled():
+                return None
+            chunk = missing[start:start + batch]
+            indices = np.array(chunk, dtype=np.int64)
+            rendered = np.empty((len(chunk), size, size), dtype=dtype)
+            counts = self.histogram_counts(len(chunk), max_iter)
+            if boundary:
+                with self.parallel(1):
+                    boundary_tiles(
+                        indices[:, 0].copy(), indices[:, 1].copy(), size,
+                        step_x, step_y, max_iter, is_julia, c, self.min_block,
+                        self.interior_check, self.periodicity, rendered, self.smooth, counts
+                    )
+            else:
+                seed = self._seed_tiles(chunk, key_base)
+                if seed is None:
+                    seed = np.empty((0, 0, 0), dtype=dtype)
+                with self.parallel():
+                    if builtin:
+                        self.generate_tiles(
+                            indices[:, 0].copy(), indices[:, 1].copy(), size,
+                            step_x, step_y, max_iter, is_julia, c, seed,
+                            self.interior_check, self.periodicity, rendered, self.smooth,
+                            self.dtype, counts
+                        )
+                    else:
+                        get_formula(self.formula).kernels.tiles_kernel(
+                            indices[:, 0].copy(), indices[:, 1].copy(), size,
+                            step_x, step_y, max_iter, is_julia, c, seed,
+                            self.periodicity, rendered, self.smooth, counts
+                        )
+            if self.equalize:
+                # Each tile's histogram, merged from the threads that wrote it
+                counts = counts.sum(axis=0, dtype=np.uint32)
+            for n, (tx, ty) in enumerate(chunk):
+                # Copy so evicting one tile frees its memory
+                tile = rendered[n].copy()
+                self.tile_cache.put(key_base + (tx, ty), tile)
+                if self.equalize:
+                    self.tile_cache.put(key_base + (tx, ty, 'histogram'), counts[n].copy())
+                if store is not None:
+                    store.put(store_base + (tx, ty), tile)
+                tiles[tx, ty] = tile
+        self.previous_pass = key_base
+        self.grid = (0.0, 0.0, origin_x, origin_y, step_x, step_y)
+        self.histogram = self._tile_histogram(tiles, key_base, max_iter) if self.equalize else None
+        
+        # Assemble the frame from tile overlaps
+        frame = self._assemble(
+            tiles, size, origin_x, origin_y, width, height,
+            out=self.output_buffer((height, width), dtype)
+        )
         
+        self.iterations_buffer = frame
         return self.iterations_buffer
+
+
+# Kernels write into caller-allocated buffers: numba types both sides of an
+# `out is None` branch, so a float32 `out` cannot share one with a uint32 default
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def mandelbrot_kernel(xmin, xmax, ymin, ymax, width, height, max_iter,
+                      interior_check, periodicity, out, smooth, counts):
+    counting = counts.shape[0] > 0
+    for i in prange(height):
+        for j in prange(width):
+            # Map pixel coordinates to complex plane
+            real = xmin + (xmax - xmin) * j / (width - 1)
+            imag = ymin + (ymax - ymin) * i / (height - 1)
+
+            if smooth:
+                out[i, j] = smooth_escape_time(
+                    real, imag, max_iter, False, 0j, interior_check, periodicity
+                )
+            else:
+                out[i, j] = escape_time(
+                    real, imag, max_iter, False, 0j, interior_check, periodicity
+                )
+        if counting:
+            count_row(counts, 0, out[i], max_iter)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def julia_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, c, periodicity, out, smooth,
+                 counts):
+    counting = counts.shape[0] > 0
+    for i in prange(height):
+        for j in prange(width):
+            # Map pixel coordinates to complex plane
+            real = xmin + (xmax - xmin) * j / (width - 1)
+            imag = ymin + (ymax - ymin) * i / (height - 1)
+
+            if smooth:
+                out[i, j] = smooth_escape_time(real, imag, max_iter, True, c, False, periodicity)
+            else:
+                out[i, j] = escape_time(real, imag, max_iter, True, c, False, periodicity)
+        if counting:
+            count_row(counts, 0, out[i], max_iter)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c, seed,
+                 interior_check, periodicity, out, smooth, counts):
+    count = tile_x.shape[0]
+    seeded = seed.shape[0] > 0
+    counting = counts.shape[0] > 0
+
+    for row in prange(count * tile_size):
+        t = row // tile_size
+        i = row % tile_size
+        imag = (tile_y[t] * tile_size + i) * step_y
+
+        for j in range(tile_size):
+            if seeded and seed[t, i, j] != SEED_UNKNOWN:
+                out[t, i, j] = seed[t, i, j]
+                continue
+
+            real = (tile_x[t] * tile_size + j) * step_x
+            if smooth:
+                out[t, i, j] = smooth_escape_time(
+                    real, imag, max_iter, is_julia, c, interior_check, periodicity
+                )
+            else:
+                out[t, i, j] = escape_time(
+                    real, imag, max_iter, is_julia, c, interior_check, periodicity
+                )
+        if counting:
+            count_row(counts, t, out[t, i], max_iter)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def lanes_frame_kernel(xmin, xmax, ymin, ymax, width, height, max_iter, is_julia, c,
+                       interior_check, periodicity, out, smooth, counts):
+    step_x = (xmax - xmin) / (width - 1)
+    counting = counts.shape[0] > 0
+    for i in prange(height):
+        imag = ymin + (ymax - ymin) * i / (height - 1)
+        escape_lanes_f32(xmin, step_x, imag, width, max_iter, is_julia, c,
+                         interior_check, periodicity, smooth, out[i], False, out[i])
+        if counting:
+            count_row(counts, 0, out[i], max_iter)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def lanes_tiles_kernel(tile_x, tile_y, tile_size, step_x, step_y, max_iter, is_julia, c, seed,
+                       interior_check, periodicity, out, smooth, counts):
+    seeded = seed.shape[0] > 0
+    counting = counts.shape[0] > 0
+
+    for row in prange(tile_x.shape[0] * tile_size):
+        t = row // tile_size
+        i = row % tile_size
+        imag = (tile_y[t] * tile_size + i) * step_y
+        # Rows without seeds pass their own output as a placeholder
+        row_seed = seed[t, i] if seeded else out[t, i]
+        escape_lanes_f32(tile_x[t] * tile_size * step_x, step_x, imag, tile_size, max_iter,
+                         is_julia, c, interior_check, periodicity, smooth,
+                         row_seed, seeded, out[t, i])
+        if counting:
+            count_row(counts, t, out[t, i], max_iter)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def julia_atlas_kernel(cs, xmin, xmax, ymin, ymax, width, height, max_iter, periodicity,
+                       lanes, out, smooth):
+    columns = out.shape[1] // width
+    step_x = (xmax - xmin) / (width - 1)
+
+    # One parallel loop over the rows of every thumbnail
+    for row in prange(cs.shape[0] * height):
+        k = row // height
+        i = row % height
+        imag = ymin + (ymax - ymin) * i / (height - 1)
+        x0 = k % columns * width
+        cell = out[k // columns * height + i, x0:x0 + width]
+
+        if lanes:
+            escape_lanes_f32(xmin, step_x, imag, width, max_iter, True, cs[k],
+                             False, periodicity, smooth, cell, False, cell)
+        else:
+            for j in range(width):
+                real = xmin + (xmax - xmin) * j / (width - 1)
+                if smooth:
+                    cell[j] = smooth_escape_time(real, imag, max_iter, True, cs[k], False, periodicity)
+                else:
+                    cell[j] = escape_time(real, imag, max_iter, True, cs[k], False, periodicity)
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def edge_mask_kernel(values, max_iter, threshold, out):
+    """Flag pixels whose log-scaled escape count differs from a 4-neighbour's"""
+    height, width = values.shape
+    scale = 1.0 / math.log(max_iter + 1.0)
+    limit = threshold / scale
+
+    for i in prange(height):
+        for j in range(width):
+            v = math.log(values[i, j] + 1.0)
+            edge = False
+            if j > 0 and abs(math.log(values[i, j - 1] + 1.0) - v) > limit:
+                edge = True
+            elif j < width - 1 and abs(math.log(values[i, j + 1] + 1.0) - v) > limit:
+                edge = True
+            elif i > 0 and abs(math.log(values[i - 1, j] + 1.0) - v) > limit:
+                edge = True
+            elif i < height - 1 and abs(math.log(values[i + 1, j] + 1.0) - v) > limit:
+                edge = True
+            out[i, j] = edge
+
+    return out
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def supersample_kernel(rows, cols, base_x, base_y, origin_x, origin_y, step_x, step_y, grid,
+                       max_iter, is_julia, c, interior_check, periodicity, lanes, out, smooth):
+    """
+    Subsamples of the pixels listed row by row in (rows, cols)
+    Sample s of every pixel in a row is offset the same way, so a row of
+    edge pixels is one evenly spaced run that the float32 lane kernel can
+    iterate, with the pixels in between seeded as already known.
+    """
+    # Runs of pixels sharing a row
+    count = rows.shape[0]
+    starts = np.empty(count + 1, dtype=np.int64)
+    runs = 0
+    for p in range(count):
+        if p == 0 or rows[p] != rows[p - 1]:
+            starts[runs] = p
+            runs += 1
+    starts[runs] = count
+    strata = grid * grid
+
+    for task in prange(runs * strata):
+        first = starts[task // strata]
+        last = starts[task // strata + 1]
+        s = task % strata
+        y = origin_y + rows[first]
+
+        # One sample per stratum of a grid x grid split of the pixel
+        dx = (s % grid + pixel_jitter(0, y, 2 * s)) / grid - 0.5
+        dy = (s // grid + pixel_jitter(0, y, 2 * s + 1)) / grid - 0.5
+        re0 = base_x + (origin_x + cols[first] + dx) * step_x
+        imag = base_y + (y + dy) * step_y
+
+        if lanes:
+            span = cols[last - 1] - cols[first] + 1
+            values = np.zeros(span, dtype=out.dtype)
+            for p in range(first, last):
+                values[cols[p] - cols[first]] = SEED_UNKNOWN
+            escape_lanes_f32(re0, step_x, imag, span, max_iter, is_julia, c,
+                             interior_check, periodicity, smooth, values, True, values)
+            for p in range(first, last):
+                out[p, s + 1] = values[cols[p] - cols[first]]
+        else:
+            for p in range(first, last):
+                real = re0 + (cols[p] - cols[first]) * step_x
+                if smooth:
+                    out[p, s + 1] = smooth_escape_time(
+                        real, imag, max_iter, is_julia, c, interior_check, periodicity
+                    )
+                else:
+                    out[p, s + 1] = escape_time(
+                        real, imag, max_iter, is_julia, c, interior_check, periodicity
+                    )
+
+    return out
@@ -0,0 +1,256 @@
+"""
+Headless renderer for images larger than memory
+
+    python headless.py poster.png --size 20000 15000 --center -0.745 0.1 --zoom 200
+
+The image is rendered in horizontal strips that are colorized and streamed
+to disk one at a time, so no display is needed and memory use depends on
+the strip height rather than the image size. PNG compression runs on its
+own thread, overlapping the kernel of the next strip.
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+from color_handler import ColorHandler
+from formulas import FORMULAS
+from fractal_generator import FractalGenerator, SOLVERS
+from image_writer import FORMATS, open_writer
+from kernels import histogram_bins, histogram_kernel
+from perturbation import PerturbationEngine
+from profiler import FrameProfiler
+from settings import DEEP_ZOOM_THRESHOLD, MAX_ITER
+
+# Rows rendered, colored and written at a time
+STRIP_HEIGHT = 256
+
+
+def render_strips(center_x, center_y, span_x, width, height, max_iter,
+                  julia_c=None, strip_height=STRIP_HEIGHT, solver='boundary', profiler=None,
+                  smooth=False, threads=None, formula='mandelbrot', histogram=None,
+                  antialias=False, lock=None):
+    """
+    Yield (first_row, iterations, edges) for consecutive strips of an image
+    Pixels are square: span_x covers the full width and the vertical span
+    follows from the aspect ratio. Row 0 is the top (smallest imaginary part).
+    Centers may be Decimal or str; spans below float64 resolution switch to
+    perturbation rendering. A profiler times each strip as the kernel stage.
+    smooth=True yields float32 fractional escape counts. threads limits
+    the kernel threads, all of them by default. formula names an entry of
+    formulas.FORMULAS; only 'mandelbrot' renders beyond float64.
+    A histogram of histogram_bins(max_iter) int64 bins adds up the
+    escape-count histogram the kernel collects while rendering each strip.
+    antialias=True supersamples the edge pixels of every strip, as
+    (rows, cols, samples) from FractalGenerator.supersample_edges; edges is
+    None otherwise, and for deep or formula strips. Each strip's kernels
+    run holding `lock`, if given.
+    """
+    if profiler is None:
+        profiler = FrameProfiler()
+    if lock is None:
+        lock = nullcontext()
+    is_julia = julia_c is not None
+    strip_height = min(strip_height, height)
+    generator = FractalGenerator(width, strip_height, solver=solver, threads=threads,
+                                 formula=formula)
+    generator.smooth = smooth
+    generator.equalize = histogram is not None
+
+    step = span_x / (width - 1)
+    deep = span_x < 4 / DEEP_ZOOM_THRESHOLD and formula == 'mandelbrot'
+    precision = PerturbationEngine.precision_for(span_x)
+
+    for row in range(0, height, strip_height):
+        rows = min(strip_height, height - row)
+        # Offset of the strip center from the image center, in pixels
+        offset = row + (strip_height - 1) / 2 - (height - 1) / 2
+
+        with lock:
+            with profiler.stage('kernel'):
+                if deep:
+                    with localcontext() as ctx:
+                        ctx.prec = precision
+                        strip_y = Decimal(center_y) + Decimal(offset) * Decimal(step)
+                    iterations = generator.generate_deep(
+                        center_x, strip_y, span_x, step * (strip_height - 1),
+                        max_iter, is_julia, julia_c
+                    )
+                else:
+                    x = float(center_x)
+                    y = float(center_y) + offset * step
+                    half_h = step * (strip_height - 1) / 2
+                    iterations = generator.generate(
+                        x - span_x / 2, x + span_x / 2, y - half_h, y + half_h,
+                        max_iter, is_julia, julia_c, solver
+                    )
+
+            edges = None
+            if antialias:
+                with profiler.stage('antialias'):
+                    edges = generator.supersample_edges(iterations, max_iter, is_julia, julia_c)
+
+            # The last strip is rendered at full height and cropped
+            if histogram is not None:
+                histogram += generator.histogram
+                if rows < strip_height:
+                    overhang = np.empty((1, len(histogram)), dtype=np.uint32)
+                    histogram_kernel(iterations[np.newaxis, rows:], max_iter, 1, overhang)
+                    histogram -= overhang[0]
+        if edges is not None and rows < strip_height:
+            kept = edges[0] < rows
+            edges = tuple(part[kept] for part in edges)
+        yield row, iterations[:rows], edges
+
+
+def spooled(strips, width, height, strip_height, dtype):
+    """
+    Run `strips` to the end into temporary files, then yield them back
+    Escape counts go to a memory-mapped file and edge samples are appended
+    to another, so only the strip being written or read is held in memory.
+    """
+    with tempfile.TemporaryFile() as spool, tempfile.TemporaryFile() as edge_spool:
+        counts = np.memmap(spool, dtype=dtype, mode='w+', shape=(height, width))
+        for row, iterations, edges in strips:
+            counts[row:row + iterations.shape[0]] = iterations
+            # Let written pages go back to the OS instead of piling up as dirty
+            counts.flush()
+            np.save(edge_spool, edges is not None)
+            for part in edges or ():
+                np.save(edge_spool, part)
+
+        edge_spool.seek(0)
+        for row in range(0, height, strip_height):
+            edges = None
+            if np.load(edge_spool):
+                edges = tuple(np.load(edge_spool) for _ in range(3))
+            yield row, counts[row:row + strip_height], edges
+
+
+def render_image(writer, center_x, center_y, span_x, max_iter, julia_c=None,
+                 colormap='viridis', strip_height=STRIP_HEIGHT, solver='boundary',
+                 progress=None, profiler=None, smooth=False, threads=None, formula='mandelbrot',
+                 equalize=False, antialias=False, phase=0.0, lock=None):
+    """
+    Render writer.width x writer.height pixels strip by strip into a writer
+    progress(rows_done, height) is called after every strip. An enabled
+    profiler times the kernel, colorize and write stages and logs a
+    record per strip. equalize=True colors every strip through the
+    histogram of the whole image: the kernels count it while the strips
+    render into a temporary file, which is colored once they are done.
+    antialias=True blends supersampled edge pixels like the explorer, and
+    phase rotates the palette like its animation. The kernels of each
+    strip run holding `lock`, if given, and writing runs without it.
+    """
+    if profiler is None:
+        profiler = FrameProfiler()
+    if lock is None:
+        lock = nullcontext()
+    color_handler = ColorHandler()
+    color_handler.set_colormap(colormap)
+    color_handler.phase = phase
+    colors = None
+
+    histogram = None
+    if equalize:
+        color_handler.set_mode('histogram')
+        histogram = np.zeros(histogram_bins(max_iter), dtype=np.int64)
+
+    strips = render_strips(center_x, center_y, span_x, writer.width, writer.height, max_iter,
+                           julia_c, strip_height, solver, profiler, smooth, threads, formula,
+                           histogram, antialias, lock)
+    if equalize:
+        strips = spooled(strips, writer.width, writer.height, min(strip_height, writer.height),
+                         np.float32 if smooth else np.uint32)
+
+    for row, iterations, edges in strips:
+        profiler.record_frame(iterations, max_iter)
+
+        if colors is None:
+            colors = np.empty(iterations.shape + (3,), dtype=np.uint8)
+        strip = colors[:iterations.shape[0]]
+        with lock:
+            with profiler.stage('colorize'):
+                color_handler.colorize(iterations, max_iter, out=strip, histogram=histogram)
+                if edges is not None:
+                    rows, cols, samples = edges
+                    strip[rows, cols] = color_handler.colorize_samples(samples, max_iter,
+                                                                       histogram=histogram)
+        with profiler.stage('write'):
+            writer.write(strip)
+
+        profiler.log(row=row, rows=iterations.shape[0])
+        if progress is not None:
+            progress(row + iterations.shape[0], writer.height)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render a fractal image without a display")
+    parser.add_argument('output', help="output path (.png, .raw or .npy)")
+    parser.add_argument('--size', nargs=2, type=int, default=(1920, 1080),
+                        metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--center', nargs=2, default=('-0.5', '0'), metavar=('X', 'Y'),
+                        help="view center, with as many digits as needed")
+    parser.add_argument('--zoom', type=float, default=1.0,
+                        help="magnification; zoom 1 spans 4 units horizontally")
+    parser.add_argument('--iterations', type=int, default=MAX_ITER)
+    parser.add_argument('--julia', nargs=2, type=float, metavar=('RE', 'IM'),
+                        help="render the Julia set for this constant")
+    parser.add_argument('--formula', choices=sorted(FORMULAS), default='mandelbrot')
+    parser.add_argument('--colormap', default='viridis')
+    parser.add_argument('--solver', choices=SOLVERS, default='boundary')
+    parser.add_argument('--smooth', action='store_true',
+                        help="color fractional escape counts instead of integer bands")
+    parser.add_argument('--equalize', action='store_true',
+                        help="histogram-equalized colors, spread evenly over the image's pixels")
+    parser.add_argument('--antialias', action='store_true',
+                        help="supersample the pixels on edges, as the explorer does")
+    parser.add_argument('--strip-height', type=int, default=STRIP_HEIGHT)
+    parser.add_argument('--threads', type=int, help="kernel threads (default: all cores)")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="output format, guessed from the extension by default")
+    parser.add_argument('--profile', action='store_true',
+                        help="log per-strip stage timings as JSON lines on stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    width, height = args.size
+    julia_c = complex(*args.julia) if args.julia else None
+
+    writer = open_writer(args.output, width, height, args.format)
+    start = time.perf_counter()
+
+    profiler = FrameProfiler(enabled=args.profile)
+    if args.profile:
+        logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(message)s')
+        progress = None
+    else:
+        def progress(done, total):
+            elapsed = time.perf_counter() - start
+            print(f"\r{done}/{total} rows, {elapsed:.1f}s", end='', file=sys.stderr)
+
+    # A failed render leaves no partial file behind
+    try:
+        render_image(
+            writer, args.center[0], args.center[1], 4 / args.zoom, args.iterations,
+            julia_c, args.colormap, args.strip_height, args.solver, progress, profiler,
+            args.smooth, args.threads, args.formula, args.equalize, args.antialias
+        )
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if not args.profile:
+            print(file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+# Output formats for streamed images
+FORMATS = ('png', 'raw', 'npy')
+
+
+def discard(path):
+    """Delete a partly written image; devices and pipes are left alone"""
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+class PNGWriter:
+    def __init__(self, path, width, height, compression=6, threaded=False, queue_depth=2):
+        """
+        8-bit RGB PNG written one strip of rows at a time
+        Only the current strip is held in memory; each one is compressed
+        into its own IDAT chunk as soon as it is written. threaded=True
+        compresses on a background thread while the next strip renders;
+        up to queue_depth strips wait for it before write() blocks.
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compression)
+        self._scanlines = None
+
+        self._file = open(path, 'wb')
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+        self._queue = None
+        self._thread = None
+        self._error = None
+        if threaded:
+            # Scanline buffers go back to the free list once compressed, so
+            # at most queue_depth + 2 strips are ever allocated
+            self._queue = queue.Queue(queue_depth)
+            self._free = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._compress_queued, name='png-writer',
+                                            daemon=True)
+            self._thread.start()
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def _compress(self, scanlines):
+        data = self._compressor.compress(scanlines)
+        if data:
+            self._chunk(b'IDAT', data)
+
+    def _compress_queued(self):
+        while True:
+            scanlines = self._queue.get()
+            if scanlines is None:
+                return
+            # After a failure the rest is drained so write() never blocks
+            if self._error is None:
+                try:
+                    self._compress(scanlines)
+                except Exception as error:
+                    self._error = error
+            self._free.put(scanlines)
+
+    def _buffer(self, rows):
+        """Scanline buffer for a strip of rows, reused when one is free"""
+        if self._queue is None:
+            buffer = self._scanlines
+        else:
+            try:
+                buffer = self._free.get_nowait()
+            except queue.Empty:
+                buffer = None
+        if buffer is None or buffer.shape[0] < rows:
+            # Each scanline starts with its filter type byte (0, none)
+            buffer = np.zeros((rows, 1 + self.width * 3), dtype=np.uint8)
+        if self._queue is None:
+            self._scanlines = buffer
+        return buffer[:rows]
+
+    def write(self, strip):
+        """Append rows of an (rows, width, 3) uint8 array"""
+        if self._error is not None:
+            raise self._error
+        rows = strip.shape[0]
+        scanlines = self._buffer(rows)
+        scanlines[:, 1:] = strip.reshape(rows, -1)
+
+        if self._queue is None:
+            self._compress(scanlines)
+        else:
+            self._queue.put(scanlines)
+        self.rows_written += rows
+
+    def _stop(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def close(self):
+        """
+        Finish the file
+        Raises if fewer rows than the height were written; the file is then
+        left without its IEND chunk, so readers see it is truncated.
+        """
+        if self._file.closed:
+            return
+        try:
+            self._stop()
+            if self._error is not None:
+                raise self._error
+            if self.rows_written != self.height:
+                raise ValueError(
+                    f"Incomplete image: {self.rows_written} of {self.height} rows written"
+                )
+            self._chunk(b'IDAT', self._compressor.flush())
+            self._chunk(b'IEND', b'')
+        finally:
+            self._file.close()
+
+    def abort(self):
+        """Stop writing and delete the partly written file"""
+        self._stop()
+        self._file.close()
+        discard(self.path)
+
+
+class RawWriter:
+    def __init__(self, path, width, height):
+        """Headerless interleaved RGB bytes, row after row"""
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._file = open(path, 'wb')
+
+    def write(self, strip):
+        self._file.write(np.ascontiguousarray(strip).tobytes())
+        self.rows_written += strip.shape[0]
+
+    def close(self):
+        self._file.close()
+
+    def abort(self):
+        """Stop writing and delete the partly written file"""
+        self._file.close()
+        discard(self.path)
+
+
+class NpyWriter:
+    def __init__(self, path, width, height):
+        """(height, width, 3) uint8 .npy file filled through a memory map"""
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._array = np.lib.format.open_memmap(
+            path, mode='w+', dtype=np.uint8, shape=(height, width, 3)
+        )
+
+    def write(self, strip):
+        rows = strip.shape[0]
+        self._array[self.rows_written:self.rows_written + rows] = strip
+        self.rows_written += rows
+        # Let written pages go back to the OS instead of piling up as dirty
+        self._array.flush()
+
+    def close(self):
+        if self._array is not None:
+            self._array.flush()
+            self._array = None
+
+    def abort(self):
+        """Stop writing and delete the partly written file"""
+        self._array = None
+        discard(self.path)
+
+
+def open_writer(path, width, height, fmt=None):
+    """
+    Streaming writer for the format given, or guessed from the extension
+    PNGs are compressed on a background thread while strips render.
+    """
+    if fmt is None:
+        fmt = path.rsplit('.', 1)[-1].lower() if '.' in path else 'raw'
+        if fmt not in FORMATS:
+            fmt = 'raw'
+    if fmt == 'png':
+        return PNGWriter(path, width, height, threaded=True)
+    if fmt == 'raw':
+        return RawWriter(path, width, height)
+    if fmt == 'npy':
+        return NpyWriter(path, width, height)
+    raise ValueError(f"Unknown image format: {fmt}")
@@ -0,0 +1,330 @@
+import math
+
+import numpy as np
+from numba import get_thread_id, njit, prange
+
+# Squared distance below which an orbit is taken to have closed a cycle
+PERIOD_EPSILON = 1e-20
+
+# Escape radius for smooth iteration counts; the fractional part is only
+# accurate once |z| is far past 2
+SMOOTH_BAILOUT = 256.0
+
+# Iterations |z| needs to grow from 2 to SMOOTH_BAILOUT: log2(log 256 / log 2)
+SMOOTH_EXTRA = 3
+
+# Marks seed pixels whose escape count is not known yet; exact in both
+# uint32 and float32 and above any iteration limit
+SEED_UNKNOWN = 2 ** 31
+
+# Pixels the float32 kernel iterates side by side, a multiple of the SIMD width
+LANES = 16
+
+# Cycle detection threshold for float32 orbits, which settle onto exact cycles
+PERIOD_EPSILON_F32 = 1e-12
+
+# Most iterations the float32 kernel runs between refilling and cycle checks
+PERIOD_STRIDE = 8
+
+# Most bins of an escape-count histogram; limits up to this many iterations
+# get a bin per count
+HISTOGRAM_BINS = 1024
+
+
+# Histogram argument of render kernels that count nothing
+NO_COUNTS = np.empty((0, 0, 0), dtype=np.uint32)
+
+
+def histogram_bins(max_iter):
+    """Bins of the escape-count histogram for an iteration limit"""
+    return max(1, min(max_iter - 1, HISTOGRAM_BINS))
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def in_main_components(real, imag):
+    """Analytic membership test for the main cardioid and the period-2 bulb"""
+    x = real - 0.25
+    y2 = imag * imag
+    q = x * x + y2
+    if q * (q + x) <= 0.25 * y2:
+        return True
+    return (real + 1.0) * (real + 1.0) + y2 <= 0.0625
+
+
+@njit(nogil=True, cache=True)
+def pixel_jitter(x, y, k):
+    """Reproducible offset in [0, 1) hashed from integer pixel coordinates and a sample index"""
+    h = (x * 73856093) ^ (y * 19349663) ^ (k * 83492791)
+    h = (h ^ (h >> 13)) * 1274126177
+    h ^= h >> 16
+    return (h & 0xFFFF) / 65536.0
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def escape_time(real, imag, max_iter, is_julia, c, interior_check=False, periodicity=False):
+    """
+    Escape iteration of a single point, max_iter - 1 if it never escapes
+    interior_check skips points inside the cardioid and period-2 bulb
+    (Mandelbrot only); periodicity stops orbits that close a cycle, using
+    Brent's doubling window so cycles of any length are found
+    """
+    if is_julia:
+        z = complex(real, imag)
+        point = c
+    else:
+        if interior_check and in_main_components(real, imag):
+            return max_iter - 1
+        z = 0j
+        point = complex(real, imag)
+
+    saved = z
+    window = 8
+    steps = 0
+    for k in range(max_iter):
+        z = z * z + point
+        if z.real * z.real + z.imag * z.imag > 4.0:
+            return k
+
+        if periodicity:
+            dr = z.real - saved.real
+            di = z.imag - saved.imag
+            if dr * dr + di * di < PERIOD_EPSILON:
+                return max_iter - 1
+            steps += 1
+            if steps == window:
+                saved = z
+                steps = 0
+                window *= 2
+
+    return max_iter - 1
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def smooth_iteration(k, zr, zi, max_iter):
+    """
+    Fractional escape count of an orbit that left SMOOTH_BAILOUT at step k
+    Normalized so the integer part matches escape_time's count at radius 2
+    """
+    mu = k - math.log2(0.5 * math.log(zr * zr + zi * zi) / math.log(2.0))
+    return min(max(mu, 0.0), max_iter - 1.0)
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def smooth_escape_time(real, imag, max_iter, is_julia, c, interior_check=False, periodicity=False):
+    """
+    Normalized fractional escape count of a single point
+    Same early-outs as escape_time, max_iter - 1 if it never escapes
+    """
+    if is_julia:
+        z = complex(real, imag)
+        point = c
+    else:
+        if interior_check and in_main_components(real, imag):
+            return max_iter - 1.0
+        z = 0j
+        point = complex(real, imag)
+
+    bailout = SMOOTH_BAILOUT * SMOOTH_BAILOUT
+    saved = z
+    window = 8
+    steps = 0
+    for k in range(max_iter + SMOOTH_EXTRA):
+        z = z * z + point
+        mag = z.real * z.real + z.imag * z.imag
+        if mag > bailout:
+            return smooth_iteration(k, z.real, z.imag, max_iter)
+        # Points still bounded at max_iter count as inside, as in escape_time
+        if k >= max_iter - 1 and mag <= 4.0:
+            return max_iter - 1.0
+
+        if periodicity:
+            dr = z.real - saved.real
+            di = z.imag - saved.imag
+            if dr * dr + di * di < PERIOD_EPSILON:
+                return max_iter - 1.0
+            steps += 1
+            if steps == window:
+                saved = z
+                steps = 0
+                window *= 2
+
+    return max_iter - 1.0
+
+
+@njit(fastmath=True, nogil=True, cache=True, inline='always')
+def _iterate_lanes(zr, zi, pr, pi, alive, n, bailout, max_iter):
+    """
+    Advance every live lane one step and return how many are still live
+    Finished lanes keep their last z, selected rather than branched around;
+    a lane stops once it escapes or has run max_iter iterations
+    """
+    two = np.float32(2.0)
+    live = 0
+    for l in range(LANES):
+        x = zr[l]
+        y = zi[l]
+        nr = x * x - y * y + pr[l]
+        ni = two * x * y + pi[l]
+        a = alive[l]
+        zr[l] = nr if a else x
+        zi[l] = ni if a else y
+        a = a and nr * nr + ni * ni <= bailout
+        n[l] += a
+        a = a and n[l] < max_iter
+        alive[l] = a
+        live += a
+    return live
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def _finish_lane(zr, zi, pr, pi, n, max_iter, smooth, bailout):
+    """Escape value of a stopped lane, as escape_time or smooth_escape_time returns it"""
+    if not smooth:
+        return min(n, max_iter - 1)
+    mag = zr * zr + zi * zi
+    if mag > bailout:
+        return smooth_iteration(n, zr, zi, max_iter)
+    # Points still bounded at max_iter count as inside; orbits already past
+    # radius 2 run on to the larger bailout
+    if mag <= 4.0:
+        return max_iter - 1.0
+    two = np.float32(2.0)
+    for k in range(n, n + SMOOTH_EXTRA):
+        zr, zi = zr * zr - zi * zi + pr, two * zr * zi + pi
+        if zr * zr + zi * zi > bailout:
+            return smooth_iteration(k, zr, zi, max_iter)
+    return max_iter - 1.0
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def escape_lanes_f32(re0, step_x, imag, count, max_iter, is_julia, c,
+                     interior_check, periodicity, smooth, seed, seeded, out):
+    """
+    Escape counts of `count` pixels along a row, iterated LANES at a time in float32
+    Pixel j sits at (re0 + j * step_x, imag). Real and imaginary parts are
+    kept in separate lane arrays and finished lanes are frozen with selects
+    rather than branches, so LLVM vectorizes the inner loop. Once half the
+    lanes have finished they are refilled with the next pixels of the row,
+    so short orbits do not wait on long ones. Results match escape_time, or
+    smooth_escape_time with smooth=True, up to rounding. With `seeded`,
+    pixels whose `seed` value is known are copied instead.
+    """
+    zr = np.zeros(LANES, dtype=np.float32)
+    zi = np.zeros(LANES, dtype=np.float32)
+    pr = np.zeros(LANES, dtype=np.float32)
+    pi = np.zeros(LANES, dtype=np.float32)
+    sr = np.zeros(LANES, dtype=np.float32)
+    si = np.zeros(LANES, dtype=np.float32)
+    alive = np.zeros(LANES, dtype=np.bool_)
+    n = np.zeros(LANES, dtype=np.int32)
+    save_at = np.zeros(LANES, dtype=np.int32)
+    pixel = np.full(LANES, -1, dtype=np.int64)
+
+    bailout = np.float32(SMOOTH_BAILOUT * SMOOTH_BAILOUT) if smooth else np.float32(4.0)
+    cr = np.float32(c.real)
+    ci = np.float32(c.imag)
+    next_pixel = 0
+
+    while True:
+        live = 0
+        for l in range(LANES):
+            if alive[l] and periodicity:
+                # Brent-style cycle check against a point saved at doubling ages
+                dr = zr[l] - sr[l]
+                di = zi[l] - si[l]
+                if dr * dr + di * di < PERIOD_EPSILON_F32:
+                    alive[l] = False
+                    n[l] = max_iter
+                elif n[l] >= save_at[l]:
+                    sr[l] = zr[l]
+                    si[l] = zi[l]
+                    save_at[l] = 2 * n[l]
+            if alive[l]:
+                live += 1
+                continue
+
+            if pixel[l] >= 0:
+                out[pixel[l]] = _finish_lane(zr[l], zi[l], pr[l], pi[l], n[l],
+                                             max_iter, smooth, bailout)
+                pixel[l] = -1
+
+            # Refill the lane with the next pixel that needs iterating
+            while next_pixel < count:
+                j = next_pixel
+                next_pixel += 1
+                real = re0 + j * step_x
+                if seeded and seed[j] != SEED_UNKNOWN:
+                    out[j] = seed[j]
+                    continue
+                if not is_julia and interior_check and in_main_components(real, imag):
+                    out[j] = max_iter - 1
+                    continue
+
+                if is_julia:
+                    zr[l] = real
+                    zi[l] = imag
+                    pr[l] = cr
+                    pi[l] = ci
+                else:
+                    zr[l] = 0.0
+                    zi[l] = 0.0
+                    pr[l] = real
+                    pi[l] = imag
+                sr[l] = zr[l]
+                si[l] = zi[l]
+                n[l] = 0
+                save_at[l] = 8
+                alive[l] = True
+                pixel[l] = j
+                live += 1
+                break
+
+        if live == 0:
+            return
+
+        # Iterate until half the lanes are free, while pixels remain to refill them
+        threshold = LANES // 2 if next_pixel < count else 0
+        for _ in range(PERIOD_STRIDE):
+            if _iterate_lanes(zr, zi, pr, pi, alive, n, bailout, max_iter) <= threshold:
+                break
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def histogram_kernel(values, max_iter, chunks, out):
+    """
+    Escape-count histograms of a stack of 2D arrays, `chunks` row ranges each
+    Row range c of array t is counted by one thread into out[t * chunks + c],
+    so threads never share a histogram and the rows are summed afterwards.
+    Counts 0 to max_iter - 1 are spread over out.shape[1] bins; pixels that
+    never escaped are left out.
+    """
+    count, height, width = values.shape
+    bins = out.shape[1]
+    scale = bins / max(max_iter - 1, 1)
+    for n in prange(count * chunks):
+        t = n // chunks
+        c = n % chunks
+        for k in range(bins):
+            out[n, k] = 0
+        for i in range(c * height // chunks, (c + 1) * height // chunks):
+            for j in range(width):
+                v = values[t, i, j]
+                if v < max_iter - 1:
+                    out[n, min(int(v * scale), bins - 1)] += 1
+
+
+@njit(fastmath=True, nogil=True, cache=True)
+def count_row(counts, t, row, max_iter):
+    """
+    Add a row of escape counts to the calling thread's histogram of tile t
+    counts is (threads, tiles, bins) for numba.get_num_threads() threads,
+    so render kernels count every row they write while it is still in
+    cache, without threads sharing a histogram. Binned like histogram_kernel.
+    """
+    bins = counts.shape[2]
+    scale = bins / max(max_iter - 1, 1)
+    thread = get_thread_id()
+    for j in range(row.shape[0]):
+        v = row[j]
+        if v < max_iter - 1:
+            counts[thread, t, min(int(v * scale), bins - 1)] += 1
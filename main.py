@@ -1,34 +1,106 @@
+import logging
+import math
 import sys
+import time
+import queue
+import threading
+from decimal import Decimal, getcontext
 import pygame
 import numpy as np
 from pygame.locals import *
 from settings import *
 from fractal_generator import FractalGenerator
+from formulas import FORMULAS
+from tile_cache import TileStore
 from color_handler import ColorHandler
-from ui_components import Button, HUD
+from ui_components import Button, HUD, UILayer
+from render_worker import RenderWorker
+from profiler import FrameProfiler
+from warmup import start_warmup
+
+# Posted by the render worker when a frame is ready to be shown
+FRAME_READY = pygame.USEREVENT + 1
 
 class FractalForge:
     def __init__(self):
+        # Compile, or load from the on-disk cache, the render kernels while
+        # the window opens; the first frame only waits for what is left
+        self.warmup = start_warmup()
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("FractalForge: Infinite Zoom Explorer")
         self.clock = pygame.time.Clock()
         
-        # Fractal state
+        # Fractal state (center kept in arbitrary precision for deep zooms)
         self.view = {
-            'x': -0.5,
-            'y': 0.0,
+            'x': Decimal('-0.5'),
+            'y': Decimal(0),
             'zoom': 1.0,
             'iterations': MAX_ITER,
             'julia': False,
             'drag_start': None,
-            'julia_c': complex(-0.4, 0.6)  # Default Julia constant
+            'julia_c': complex(-0.4, 0.6),  # Default Julia constant
+            'formula': FORMULA
         }
         
         # Initialize components
-        self.generator = FractalGenerator(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.generator = FractalGenerator(
+            SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, TILE_CACHE_MB, SOLVER, SCHEDULE, THREADS
+        )
+        self.generator.smooth = SMOOTH_COLORING
+        self.generator.precision = PRECISION
+        if TILE_STORE_DIR is not None:
+            self.generator.tile_store = TileStore(TILE_STORE_DIR, TILE_STORE_MB * 1024 * 1024)
+        
+        # Julia thumbnails get their own generator, so a preview never
+        # reuses the buffers of the frame on screen
+        self.julia_generator = FractalGenerator(
+            *JULIA_PREVIEW_SIZE, schedule=SCHEDULE, threads=THREADS
+        )
+        self.julia_generator.smooth = SMOOTH_COLORING
+        self.julia_generator.precision = PRECISION
+        self.julia_generator.formula = FORMULA
         self.color_handler = ColorHandler()
+        self.color_handler.set_mode(COLOR_MODE)
+        self.generator.equalize = COLOR_MODE == 'histogram'
         self.hud = HUD()
+        self.profiler = FrameProfiler()
+        
+        # Rendering happens on a background worker; the loop shows the
+        # latest finished frame, transformed to the current view until
+        # the sharp one arrives
+        self.render_lock = threading.Lock()
+        self.render_worker = RenderWorker(self.render_view, self.discard_frame, self.frame_ready)
+        self.frame_surface = None
+        self.frame_source = None
+        self.frame_view = None
+        
+        # Persistent frame surfaces the worker colorizes into directly.
+        # Three per pass size: one rendering, one waiting, one on screen
+        # Each keeps the iteration counts it was colored from, so palette
+        # animation can recolor it without re-running the fractal kernel
+        self.surface_pool = {}
+        self.frame_iterations = {}
+        
+        # Anti-aliased pixels of each frame, (rows, cols, samples), kept so
+        # recoloring can blend them again
+        self.antialias = ANTIALIAS
+        self.frame_edges = {}
+        
+        # Histogram each frame was colored by in histogram mode
+        self.frame_histograms = {}
+        for profile in QUALITY_PROFILES.values():
+            height, width = self.generator.frame_shape(profile['scale'])
+            if (width, height) not in self.surface_pool:
+                pool = queue.Queue()
+                for _ in range(3):
+                    surface = pygame.Surface((width, height)).convert()
+                    self.frame_iterations[surface] = np.zeros(
+                        (height, width), dtype=self.generator.output_dtype
+                    )
+                    pool.put(surface)
+                self.surface_pool[width, height] = pool
+        self.upscaled_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
         
         # Simplified UI
         self.ui_elements = [
@@ -49,12 +121,32 @@ class FractalForge:
                 "Zoom In", self.zoom_in
             )
         ]
+        self.ui_layer = UILayer(self.ui_elements)
 
-        # Automatic quality adjustment
+        # Automatic quality adjustment: coarse passes while interacting,
+        # refined once the view has been idle for REFINE_DELAY seconds
         self.quality_timer = 0
         self.auto_quality = True
+        self.render_profile = None
         self.needs_redraw = True
+        self.animate_palette = False
+        
+        # Idle mode: the loop sleeps on the event queue when nothing moves
+        # and only presents what changed
+        self.full_redraw = True
 
+        # Julia browsing: a grid of candidates from the Explore button, or
+        # a live preview of the Julia set under the cursor in picker mode
+        self.julia_atlas = None
+        self.julia_picker = False
+        self.preview_c = None
+        self.preview_dirty = False
+        self.preview_surface = pygame.Surface(JULIA_PREVIEW_SIZE).convert()
+        self.preview_rect = self.preview_surface.get_rect(
+            bottomright=(SCREEN_WIDTH - 20, SCREEN_HEIGHT - 20)
+        )
+        self.preview_shown = False
+        
         # Pan speed for arrow key navigation
         self.pan_speed = PAN_SPEED  # Use constant from settings
         
@@ -62,20 +154,28 @@ class FractalForge:
         self.drag_sensitivity = 0.005
 
     def reset_view(self):
-        self.view.update(x=-0.5, y=0.0, zoom=1.0, iterations=MAX_ITER)
+        self.view.update(x=Decimal('-0.5'), y=Decimal(0), zoom=1.0, iterations=MAX_ITER)
         self.needs_redraw = True
 
     def toggle_julia(self):
         self.view['julia'] = not self.view['julia']
+        self.julia_atlas = None
+        self.julia_picker = False
+        self.needs_redraw = True
+
+    def cycle_formula(self):
+        """Switch to the next registered formula, keeping the view"""
+        names = list(FORMULAS)
+        index = names.index(self.view['formula']) if self.view['formula'] in names else -1
+        self.view['formula'] = names[(index + 1) % len(names)]
+        self.julia_generator.formula = self.view['formula']
+        self.julia_atlas = None
         self.needs_redraw = True
 
     def cycle_colormap(self):
         maps = ['viridis', 'plasma', 'rainbow', 'hsv']
         
-        # Get the current colormap name safely
-        current_map = (self.color_handler.current_cmap.name 
-                       if hasattr(self.color_handler.current_cmap, 'name') 
-                       else 'viridis')
+        current_map = self.color_handler.current_name
         
         # Find the index of the current map or default to 0
         try:
@@ -86,11 +186,23 @@ class FractalForge:
         # Cycle to the next map
         new_map = maps[(current_index + 1) % len(maps)]
         self.color_handler.set_colormap(new_map)
-        self.needs_redraw = True
+        
+        # The iteration counts are unchanged, so only the colors are redone
+        self.recolor_frame()
+        self.full_redraw = True
 
     def save_image(self):
+        """
+        Render the current view into a SAVE_WIDTH-wide PNG in the background
+        The image is rendered, colored and compressed strip by strip, so its
+        size is bounded by disk space instead of memory or the screen. It
+        has its own generator and takes the render lock for one strip at a
+        time, so the explorer keeps rendering frames in between.
+        """
         import os
         from datetime import datetime
+        from headless import render_image
+        from image_writer import PNGWriter
         
         # Create screenshots directory if it doesn't exist
         os.makedirs('screenshots', exist_ok=True)
@@ -99,31 +211,107 @@ class FractalForge:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f'screenshots/fractal_{timestamp}.png'
         
-        # Render and save the current fractal view
-        fractal_surface = self.draw_fractal()
-        pygame.image.save(fractal_surface, filename)
+        # Square pixels over the view's 4 x 3 unit extent, colored like the
+        # frame on screen
+        self.update_iterations()
+        view = self.snapshot_view()
+        width, height = SAVE_WIDTH, round(SAVE_WIDTH * 3 / 4)
+        julia_c = view['julia_c'] if view['julia'] else None
+        options = dict(
+            colormap=self.color_handler.current_name, solver=SOLVER, smooth=SMOOTH_COLORING,
+            threads=THREADS, formula=view['formula'],
+            equalize=self.color_handler.mode == 'histogram', antialias=self.antialias,
+            phase=self.color_handler.phase, lock=self.render_lock
+        )
+        
+        def save():
+            writer = PNGWriter(filename, width, height, threaded=True)
+            try:
+                render_image(writer, view['x'], view['y'], 4 / view['zoom'], view['iterations'],
+                             julia_c, **options)
+                writer.close()
+            except Exception:
+                # Nothing waits on this thread, so report the failure here
+                # and leave no truncated image behind
+                writer.abort()
+                logging.getLogger('fractalforge.save').exception("Saving %s failed", filename)
+        
+        # Not a daemon, so quitting waits for the file to be complete
+        threading.Thread(target=save, name='image-save').start()
 
     def explore_julia(self):
         """
         Interactive Julia set parameter exploration
-        Randomly generate new Julia set constants
+        A grid of random constants is rendered in one batch; clicking a
+        thumbnail opens that Julia set and pressing Explore again draws
+        new candidates.
         """
-        # Generate random Julia set parameters
-        real_part = np.random.uniform(-1.0, 1.0)
-        imag_part = np.random.uniform(-1.0, 1.0)
+        columns, rows = JULIA_ATLAS_GRID
+        count = columns * rows
+        candidates = np.random.uniform(-1.0, 1.0, count) + 1j * np.random.uniform(-1.0, 1.0, count)
         
-        # Update Julia constant
-        self.view['julia_c'] = complex(real_part, imag_part)
-        
-        # Toggle Julia mode if not already active
-        if not self.view['julia']:
-            self.toggle_julia()
+        # Thumbnails tile the screen at the aspect of the full view
+        width, height = SCREEN_WIDTH // columns, SCREEN_HEIGHT // rows
+        with self.render_lock:
+            atlas = self.julia_generator.generate_julia_atlas(
+                candidates, width, height, JULIA_PREVIEW_ITER, columns
+            )
+            surface = pygame.Surface((columns * width, rows * height)).convert()
+            pixels = pygame.surfarray.pixels3d(surface)
+            self.color_handler.colorize(atlas, JULIA_PREVIEW_ITER, out=pixels.swapaxes(0, 1))
+            del pixels
         
-        # Reset view for new Julia exploration
+        self.julia_atlas = (candidates, (width, height), surface)
+        self.julia_picker = False
+        self.full_redraw = True
+
+    def toggle_julia_picker(self):
+        """Preview the Julia set of the point under the cursor on the Mandelbrot map"""
+        self.julia_picker = not self.julia_picker
+        self.julia_atlas = None
+        if self.julia_picker and self.view['julia']:
+            self.view['julia'] = False
+            self.reset_view()
+        self.preview_c = self.screen_to_complex(pygame.mouse.get_pos()) if self.julia_picker else None
+        self.preview_shown = False
+        self.full_redraw = True
+
+    def pick_julia(self, c):
+        """Open the Julia set of a constant chosen from the atlas or the map"""
+        self.view['julia_c'] = complex(c)
+        self.view['julia'] = True
+        self.julia_atlas = None
+        self.julia_picker = False
+        self.preview_c = None
         self.reset_view()
-        
-        # Trigger redraw
-        self.needs_redraw = True
+
+    def render_preview(self):
+        """
+        Render the pending picker preview, unless a frame is being rendered
+        The cursor moves on before a blocked preview would be seen, so it
+        is retried on the next loop instead of waiting.
+        """
+        if not self.render_lock.acquire(blocking=False):
+            return
+        try:
+            preview = self.julia_generator.generate_julia_atlas(
+                [self.preview_c], *JULIA_PREVIEW_SIZE, JULIA_PREVIEW_ITER
+            )
+            pixels = pygame.surfarray.pixels3d(self.preview_surface)
+            self.color_handler.colorize(preview, JULIA_PREVIEW_ITER, out=pixels.swapaxes(0, 1))
+            del pixels
+        finally:
+            self.render_lock.release()
+        self.preview_c = None
+        self.preview_shown = True
+        self.preview_dirty = True
+
+    def screen_to_complex(self, pos):
+        """Point of the complex plane under a screen position"""
+        return complex(
+            float(self.view['x']) + (pos[0] / SCREEN_WIDTH - 0.5) * 4 / self.view['zoom'],
+            float(self.view['y']) + (pos[1] / SCREEN_HEIGHT - 0.5) * 3 / self.view['zoom']
+        )
 
     def zoom_in(self):
         """Zoom in at the center of the screen"""
@@ -131,14 +319,34 @@ class FractalForge:
         center_y = SCREEN_HEIGHT / 2
         self.zoom_to_point((center_x, center_y), ZOOM_FACTOR)
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def handle_events(self, events):
+        for event in events:
+            if event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+                self.full_redraw = True
+            
             if event.type == QUIT:
+                self.render_worker.stop()
+                if self.generator.tile_store is not None:
+                    self.generator.tile_store.flush()
                 pygame.quit()
                 sys.exit()
             
             # Mouse controls
-            if event.type == MOUSEBUTTONDOWN:
+            on_ui = hasattr(event, 'pos') and self.ui_layer.rect.collidepoint(event.pos)
+            if event.type == MOUSEBUTTONDOWN and (self.julia_atlas or self.julia_picker) \
+                    and event.button in (1, 3) and not on_ui:
+                if event.button == 3:  # Right click - close the picker
+                    self.julia_atlas = None
+                    self.julia_picker = False
+                    self.full_redraw = True
+                elif self.julia_atlas:  # Left click - open a thumbnail
+                    candidates, (width, height), surface = self.julia_atlas
+                    index = event.pos[1] // height * JULIA_ATLAS_GRID[0] + event.pos[0] // width
+                    if event.pos[0] < surface.get_width() and index < len(candidates):
+                        self.pick_julia(candidates[index])
+                else:  # Left click - open the Julia set under the cursor
+                    self.pick_julia(self.screen_to_complex(event.pos))
+            elif event.type == MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click - start drag
                     self.view['drag_start'] = event.pos
                 elif event.button == 3:  # Right click - reset zoom
@@ -159,12 +367,13 @@ class FractalForge:
                     dy = (event.pos[1] - self.view['drag_start'][1]) * self.drag_sensitivity / self.view['zoom']
                     
                     # Adjust view based on drag
-                    self.view['x'] -= dx * 4 / SCREEN_WIDTH
-                    self.view['y'] += dy * 3 / SCREEN_HEIGHT
+                    self.pan(-dx * 4 / SCREEN_WIDTH, -dy * 3 / SCREEN_HEIGHT)
                     
                     # Update drag start
                     self.view['drag_start'] = event.pos
                     self.needs_redraw = True
+                elif self.julia_picker:
+                    self.preview_c = self.screen_to_complex(event.pos)
             
             # Keyboard controls
             elif event.type == KEYDOWN:
@@ -172,78 +381,324 @@ class FractalForge:
                     self.reset_view()
                 elif event.key == K_j:  # Toggle Julia/Mandelbrot
                     self.toggle_julia()
+                elif event.key == K_n:  # Next formula
+                    self.cycle_formula()
+                elif event.key == K_m:  # Julia picker on the Mandelbrot map
+                    self.toggle_julia_picker()
+                elif event.key == K_ESCAPE and (self.julia_atlas or self.julia_picker):
+                    self.julia_atlas = None
+                    self.julia_picker = False
+                    self.full_redraw = True
                 elif event.key == K_s:  # Save image
                     self.save_image()
                 elif event.key == K_c:  # Cycle colors
                     self.cycle_colormap()
+                elif event.key == K_h:  # Histogram-equalized coloring
+                    self.toggle_equalize()
+                elif event.key == K_a:  # Toggle anti-aliasing
+                    self.toggle_antialias()
+                elif event.key == K_p:  # Toggle palette animation
+                    self.animate_palette = not self.animate_palette
+                elif event.key == K_f:  # Toggle performance overlay
+                    self.profiler.enabled = not self.profiler.enabled
+                    self.profiler.reset()
+                    self.full_redraw = True
                 elif event.key == K_q:  # Quit
+                    self.render_worker.stop()
+                    if self.generator.tile_store is not None:
+                        self.generator.tile_store.flush()
                     pygame.quit()
                     sys.exit()
                 elif event.key == K_LEFT:  # Pan left
-                    self.view['x'] -= self.pan_speed / self.view['zoom']
+                    self.pan(-self.pan_speed / self.view['zoom'], 0)
                     self.needs_redraw = True
                 elif event.key == K_RIGHT:  # Pan right
-                    self.view['x'] += self.pan_speed / self.view['zoom']
+                    self.pan(self.pan_speed / self.view['zoom'], 0)
                     self.needs_redraw = True
                 elif event.key == K_UP:  # Pan up
-                    self.view['y'] -= self.pan_speed / self.view['zoom']
+                    self.pan(0, -self.pan_speed / self.view['zoom'])
                     self.needs_redraw = True
                 elif event.key == K_DOWN:  # Pan down
-                    self.view['y'] += self.pan_speed / self.view['zoom']
+                    self.pan(0, self.pan_speed / self.view['zoom'])
                     self.needs_redraw = True
 
             # Handle UI elements
             for element in self.ui_elements:
                 element.handle_event(event)
 
+    def pan(self, dx, dy):
+        """Shift the view center without losing precision at deep zoom"""
+        getcontext().prec = self.generator.perturbation.precision_for(4 / self.view['zoom'])
+        self.view['x'] += Decimal(dx)
+        self.view['y'] += Decimal(dy)
+
     def zoom_to_point(self, mouse_pos, factor):
         """Smooth zoom centered on mouse position"""
-        # Convert mouse position to fractal coordinates
-        old_x = self.view['x'] + (mouse_pos[0]/SCREEN_WIDTH - 0.5) * 4/self.view['zoom']
-        old_y = self.view['y'] - (mouse_pos[1]/SCREEN_HEIGHT - 0.5) * 3/self.view['zoom']
+        # Mouse offset from the screen center in unzoomed fractal units
+        offset_x = (mouse_pos[0]/SCREEN_WIDTH - 0.5) * 4
+        offset_y = (mouse_pos[1]/SCREEN_HEIGHT - 0.5) * 3
+        old_zoom = self.view['zoom']
         
-        # Apply zoom
-        self.view['zoom'] *= factor
+        # Apply zoom, kept on powers of ZOOM_FACTOR so a level reached again
+        # gets the same grid step and finds its tiles in the cache and store
+        level = round(math.log(old_zoom * factor) / math.log(ZOOM_FACTOR))
+        self.view['zoom'] = ZOOM_FACTOR ** level
         
         # Adjust center to maintain mouse position
-        new_x = old_x - (mouse_pos[0]/SCREEN_WIDTH - 0.5) * 4/self.view['zoom']
-        new_y = old_y + (mouse_pos[1]/SCREEN_HEIGHT - 0.5) * 3/self.view['zoom']
-        
-        self.view['x'] = new_x
-        self.view['y'] = new_y
+        self.pan(
+            offset_x / old_zoom - offset_x / self.view['zoom'],
+            offset_y / old_zoom - offset_y / self.view['zoom']
+        )
         self.needs_redraw = True
 
-    def draw_fractal(self):
+    def update_iterations(self):
         # Adaptive quality with smoother transitions
         base_iterations = MAX_ITER
         zoom_factor = np.log10(self.view['zoom'] + 1)
         self.view['iterations'] = int(base_iterations * (1 + zoom_factor))
+
+    def snapshot_view(self, profile='static'):
+        """Copy of the view parameters a render depends on, at a quality profile"""
+        view = {key: self.view[key]
+                for key in ('x', 'y', 'zoom', 'iterations', 'julia', 'julia_c', 'formula')}
+        
+        # Profiles scale the resolution and the base iteration count
+        quality = QUALITY_PROFILES[profile]
+        zoom_factor = np.log10(self.view['zoom'] + 1)
+        view['iterations'] = min(view['iterations'], int(quality['iterations'] * (1 + zoom_factor)))
+        view['scale'] = quality['scale']
+        return view
+
+    def render_view(self, view, cancelled=None, surface=None):
+        """
+        Compute and colorize a view snapshot straight into a frame surface
+        Returns None if cancelled() reports the request was superseded
+        """
+        if surface is None:
+            height, width = self.generator.frame_shape(view['scale'])
+            surface = self.surface_pool[width, height].get()
         
+        # A failed render hands its surface back too, or the pool runs dry
+        # and the worker blocks on it for good
+        try:
+            rendered = self.paint_view(view, cancelled, surface)
+        except BaseException:
+            self.release_surface(surface)
+            raise
+        if rendered is None:
+            self.release_surface(surface)
+        return rendered
+
+    def paint_view(self, view, cancelled, surface):
+        """Render a view snapshot into a surface; None if cancelled"""
         # Calculate view parameters with improved precision
-        width_ratio = 4 / self.view['zoom']
-        height_ratio = 3 / self.view['zoom']
-        xmin = self.view['x'] - width_ratio/2
-        xmax = self.view['x'] + width_ratio/2
-        ymin = self.view['y'] - height_ratio/2
-        ymax = self.view['y'] + height_ratio/2
-        
-        # Generate fractal
-        iterations = self.generator.generate(
-            xmin, xmax, ymin, ymax, 
-            self.view['iterations'], 
-            self.view['julia'],
-            self.view['julia_c'] if self.view['julia'] else None
+        width_ratio = 4 / view['zoom']
+        height_ratio = 3 / view['zoom']
+        julia_c = view['julia_c'] if view['julia'] else None
+        
+        with self.render_lock:
+            # Generate fractal, switching to perturbation once float64 runs
+            # out; only the quadratic family has a perturbation kernel
+            self.generator.formula = view['formula']
+            with self.profiler.stage('kernel'):
+                if view['zoom'] >= DEEP_ZOOM_THRESHOLD and view['formula'] == 'mandelbrot':
+                    iterations = self.generator.generate_deep(
+                        view['x'], view['y'],
+                        width_ratio, height_ratio,
+                        view['iterations'],
+                        view['julia'], julia_c,
+                        view['scale']
+                    )
+                else:
+                    xmin = float(view['x']) - width_ratio/2
+                    xmax = float(view['x']) + width_ratio/2
+                    ymin = float(view['y']) - height_ratio/2
+                    ymax = float(view['y']) + height_ratio/2
+                    iterations = self.generator.generate_tiled(
+                        xmin, xmax, ymin, ymax, 
+                        view['iterations'], 
+                        view['julia'], julia_c,
+                        cancelled, view['scale'],
+                        span=(width_ratio, height_ratio)
+                    )
+            
+            if iterations is None or (cancelled is not None and cancelled()):
+                return None
+            
+            self.profiler.record_frame(iterations, view['iterations'])
+            
+            # Color mapping with stability; pixels3d is indexed (x, y)
+            with self.profiler.stage('colorize'):
+                # Histogram mode uses the counts the kernels collected while
+                # rendering; generator.equalize follows the mode
+                histogram = self.generator.histogram if self.color_handler.mode == 'histogram' else None
+                pixels = pygame.surfarray.pixels3d(surface)
+                self.color_handler.colorize(iterations, view['iterations'], out=pixels.swapaxes(0, 1),
+                                            histogram=histogram)
+            
+            # Full-resolution passes supersample the pixels on edges
+            edges = None
+            if self.antialias and view['scale'] >= 1 and view['zoom'] < DEEP_ZOOM_THRESHOLD:
+                with self.profiler.stage('antialias'):
+                    edges = self.generator.supersample_edges(
+                        iterations, view['iterations'], view['julia'], julia_c
+                    )
+                    self.blend_edges(pixels.swapaxes(0, 1), edges, view['iterations'], histogram)
+            del pixels
+            
+            counts = self.frame_iterations.get(surface)
+            if counts is not None:
+                np.copyto(counts, iterations)
+                self.frame_edges[surface] = edges
+                self.frame_histograms[surface] = histogram
+        
+        return surface
+
+    def release_surface(self, surface):
+        """Return a pooled frame surface once nothing shows it anymore"""
+        pool = self.surface_pool.get(surface.get_size()) if surface is not None else None
+        if pool is not None and surface is not self.upscaled_surface:
+            pool.put(surface)
+
+    def discard_frame(self, view, surface):
+        self.release_surface(surface)
+
+    def recolor_frame(self):
+        """Recolor the frame on screen from its stored iteration counts"""
+        counts = self.frame_iterations.get(self.frame_source)
+        if counts is None:
+            return
+        
+        max_iter = self.frame_view['iterations']
+        histogram = self.frame_histograms.get(self.frame_source)
+        if self.color_handler.mode == 'histogram' and histogram is None:
+            # Colored on the logarithmic scale before
+            histogram = self.color_handler.histogram(counts, max_iter)
+            self.frame_histograms[self.frame_source] = histogram
+        
+        pixels = pygame.surfarray.pixels3d(self.frame_source)
+        self.color_handler.colorize(counts, max_iter, out=pixels.swapaxes(0, 1), histogram=histogram)
+        self.blend_edges(
+            pixels.swapaxes(0, 1), self.frame_edges.get(self.frame_source), max_iter, histogram
         )
+        del pixels
+        if self.frame_surface is self.upscaled_surface:
+            pygame.transform.scale(
+                self.frame_source, (SCREEN_WIDTH, SCREEN_HEIGHT), self.upscaled_surface
+            )
+
+    def blend_edges(self, pixels, edges, max_iter, histogram=None):
+        """Give supersampled pixels the mean color of their samples"""
+        if edges is not None:
+            rows, cols, samples = edges
+            pixels[rows, cols] = self.color_handler.colorize_samples(samples, max_iter,
+                                                                     histogram=histogram)
+
+    def toggle_equalize(self):
+        """Switch between logarithmic and histogram-equalized coloring"""
+        mode = 'log' if self.color_handler.mode == 'histogram' else 'histogram'
+        self.color_handler.set_mode(mode)
+        self.generator.equalize = mode == 'histogram'
+        self.recolor_frame()
+        self.full_redraw = True
+
+    def toggle_antialias(self):
+        self.antialias = not self.antialias
+        self.needs_redraw = True
+
+    def draw_fractal(self):
+        """Render the current view synchronously into a new surface of the generator's size"""
+        self.update_iterations()
+        surface = pygame.Surface((self.generator.width, self.generator.height)).convert()
+        return self.render_view(self.snapshot_view(), surface=surface)
+
+    def draw_frame(self):
+        """Blit the latest frame, mapped onto the current view"""
+        if self.frame_surface is None:
+            return
+        
+        frame = self.frame_view
+        scale = self.view['zoom'] / frame['zoom']
+        if scale == 1 and frame['x'] == self.view['x'] and frame['y'] == self.view['y']:
+            self.screen.blit(self.frame_surface, (0, 0))
+            return
+        
+        # Where the old frame lands on screen under the current view
+        width = SCREEN_WIDTH * scale
+        height = SCREEN_HEIGHT * scale
+        left = SCREEN_WIDTH / 2 + float(frame['x'] - self.view['x']) * self.view['zoom'] * SCREEN_WIDTH / 4 - width / 2
+        top = SCREEN_HEIGHT / 2 + float(frame['y'] - self.view['y']) * self.view['zoom'] * SCREEN_HEIGHT / 3 - height / 2
         
-        # Color mapping with stability
-        colored = self.color_handler.colorize(iterations, self.view['iterations'])
+        # Only scale the part of the old frame that is still visible
+        visible = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT).clip(
+            pygame.Rect(int(left), int(top), int(width) + 1, int(height) + 1)
+        )
+        if visible.width == 0 or visible.height == 0:
+            return
+        source = pygame.Rect(
+            int((visible.left - left) / scale),
+            int((visible.top - top) / scale),
+            max(1, int(visible.width / scale)),
+            max(1, int(visible.height / scale))
+        ).clip(self.frame_surface.get_rect())
+        if source.width == 0 or source.height == 0:
+            return
         
-        return pygame.surfarray.make_surface(colored)
+        preview = pygame.transform.scale(self.frame_surface.subsurface(source), visible.size)
+        self.screen.blit(preview, visible.topleft)
+
+    def is_animating(self):
+        """True while the screen changes without further input"""
+        return (self.needs_redraw or self.render_profile == 'interactive' or self.animate_palette
+                or self.preview_c is not None)
+
+    def frame_ready(self):
+        # Wakes the loop from an idle wait; safe to post from the worker thread
+        pygame.event.post(pygame.event.Event(FRAME_READY))
+
+    def present(self, area=None):
+        """Draw the frame and UI, updating only `area` of the display if given"""
+        self.screen.set_clip(area)
+        with self.profiler.stage('draw'):
+            self.screen.fill(COLORS['bg'])
+            self.draw_frame()
+            if self.julia_atlas is not None:
+                self.screen.blit(self.julia_atlas[2], (0, 0))
+            elif self.julia_picker and self.preview_shown:
+                self.screen.blit(self.preview_surface, self.preview_rect)
+                pygame.draw.rect(self.screen, COLORS['neon'], self.preview_rect.inflate(4, 4), 2)
+        
+        with self.profiler.stage('ui'):
+            # Draw UI
+            self.ui_layer.draw(self.screen)
+            
+            # Draw HUD
+            mouse_pos = pygame.mouse.get_pos()
+            if self.julia_atlas is None:
+                self.hud.draw(self.screen, mouse_pos, self.view)
+            if self.profiler.enabled:
+                self.hud.draw_stats(self.screen, self.profiler.summary(), self.clock.get_fps())
+        self.screen.set_clip(None)
+        
+        with self.profiler.stage('flip'):
+            if area is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(area)
 
     def run(self):
         while True:
-            dt = self.clock.tick(FPS) / 1000.0
-            self.handle_events()
+            if self.is_animating():
+                dt = self.clock.tick(FPS) / 1000.0
+                events = pygame.event.get()
+            else:
+                # Sleep until input arrives, a frame finishes or the timeout passes
+                event = pygame.event.wait(IDLE_TIMEOUT)
+                events = [event] + pygame.event.get() if event.type != NOEVENT else []
+                dt = self.clock.tick() / 1000.0
+            frame_start = time.perf_counter()
+            with self.profiler.stage('events'):
+                self.handle_events(events)
             
             # Continuous key state checking for smooth movement
             keys = pygame.key.get_pressed()
@@ -253,39 +708,77 @@ class FractalForge:
             
             # Correct arrow key movement
             if keys[K_LEFT]:
-                self.view['x'] -= pan_amount
+                self.pan(-pan_amount, 0)
                 self.needs_redraw = True
             if keys[K_RIGHT]:
-                self.view['x'] += pan_amount
+                self.pan(pan_amount, 0)
                 self.needs_redraw = True
             if keys[K_UP]:
-                self.view['y'] -= pan_amount  # Corrected: move up when UP is pressed
+                self.pan(0, -pan_amount)  # Corrected: move up when UP is pressed
                 self.needs_redraw = True
             if keys[K_DOWN]:
-                self.view['y'] += pan_amount  # Corrected: move down when DOWN is pressed
+                self.pan(0, pan_amount)  # Corrected: move down when DOWN is pressed
                 self.needs_redraw = True
             
-            # Update phase for animations
-            self.color_handler.update_phase(dt)
-            
-            # Render if needed
+            # Hand the view to the render worker, superseding older requests
             if self.needs_redraw:
-                fractal_surface = self.draw_fractal()
+                self.update_iterations()
+                self.quality_timer = 0
+                self.render_profile = 'interactive' if self.auto_quality else 'static'
+                self.render_worker.submit(self.snapshot_view(self.render_profile))
                 self.needs_redraw = False
+                self.full_redraw = True
+            elif self.render_profile == 'interactive':
+                # Refine to full quality once the view has been idle
+                self.quality_timer += dt
+                if self.quality_timer >= REFINE_DELAY:
+                    self.render_profile = 'static'
+                    self.render_worker.submit(self.snapshot_view(self.render_profile))
             
-            # Draw everything
-            self.screen.fill(COLORS['bg'])
-            self.screen.blit(fractal_surface, (0, 0))
+            # Pick up the latest finished frame, upscaling coarse passes
+            finished = self.render_worker.poll()
+            if finished is not None:
+                view, surface = finished
+                if self.frame_source is not surface:
+                    self.release_surface(self.frame_source)
+                self.frame_source = surface
+                self.frame_view = view
+                if surface.get_size() != (SCREEN_WIDTH, SCREEN_HEIGHT):
+                    with self.profiler.stage('upscale'):
+                        pygame.transform.scale(
+                            surface, (SCREEN_WIDTH, SCREEN_HEIGHT), self.upscaled_surface
+                        )
+                    surface = self.upscaled_surface
+                self.frame_surface = surface
+                self.full_redraw = True
             
-            # Draw UI
-            for element in self.ui_elements:
-                element.draw(self.screen)
+            # Live Julia preview of the point under the cursor
+            if self.julia_picker and self.preview_c is not None:
+                self.render_preview()
             
-            # Draw HUD
-            mouse_pos = pygame.mouse.get_pos()
-            self.hud.draw(self.screen, mouse_pos, self.view)
+            # Palette animation rotates the colors of the frame on screen
+            if self.animate_palette and self.frame_source is not None:
+                self.color_handler.update_phase(dt)
+                self.recolor_frame()
+                self.full_redraw = True
+            
+            # Present the whole screen after changes, or just the buttons
+            # and the preview when only they changed
+            if self.full_redraw or (self.profiler.enabled and self.is_animating()):
+                self.present()
+                self.full_redraw = False
+            else:
+                areas = []
+                if self.ui_layer.needs_repaint():
+                    areas.append(self.ui_layer.rect)
+                if self.preview_dirty:
+                    areas.append(self.preview_rect.inflate(4, 4))
+                if areas:
+                    self.present(areas[0].unionall(areas[1:]))
+            self.preview_dirty = False
             
-            pygame.display.flip()
+            if self.profiler.enabled:
+                self.profiler.record('frame', time.perf_counter() - frame_start)
 
 if __name__ == "__main__":
     app = FractalForge()
@@ -0,0 +1,141 @@
+"""
+Colormap tables bundled so colorization does not need matplotlib
+
+Each palette is 256 RGB entries, sampled from the matplotlib colormap of
+the same name. Regenerate with `python palettes.py` if matplotlib is
+installed.
+"""
+import numpy as np
+
+PALETTE_SIZE = 256
+
+# 256 packed RGB triples per colormap, as hex
+_TABLES = {
+    'viridis': (
+        '44015444025544035745055845065a45085b46095c460b5e460c5f460e61470f62471163'
+        '47126547146647156747166947186a48196b481a6c481c6e481d6f481e70482071482172'
+        '482273482374472575472676472777472878472a79472b7a472c7b462d7c462f7c46307d'
+        '46317e45327f45347f453580453681443781443982433a83433b83433c84423d84423e85'
+        '4240854141864142864043874044873f45873f47883e48883e49893d4a893d4b893d4c89'
+        '3c4d8a3c4e8a3b508a3b518a3a528b3a538b39548b39558b38568b38578c37588c37598c'
+        '365a8c365b8c355c8c355d8c345e8d345f8d33608d33618d32628d32638d31648d31658d'
+        '31668d30678d30688d2f698d2f6a8d2e6b8e2e6c8e2e6d8e2d6e8e2d6f8e2c708e2c718e'
+        '2c728e2b738e2b748e2a758e2a768e2a778e29788e29798e287a8e287a8e287b8e277c8e'
+        '277d8e277e8e267f8e26808e26818e25828e25838d24848d24858d24868d23878d23888d'
+        '23898d22898d228a8d228b8d218c8d218d8c218e8c208f8c20908c20918c1f928c1f938b'
+        '1f948b1f958b1f968b1e978a1e988a1e998a1e998a1e9a891e9b891e9c891e9d881e9e88'
+        '1e9f881ea0871fa1871fa2861fa38620a48520a58521a68521a78422a78423a88323a982'
+        '24aa8225ab8126ac8127ad8028ae7f29af7f2ab07e2bb17d2cb17d2eb27c2fb37b30b47a'
+        '32b57a33b67935b77836b87738b97639b9763bba753dbb743ebc7340bd7242be7144be70'
+        '45bf6f47c06e49c16d4bc26c4dc26b4fc36951c46853c56755c66657c66559c7645bc862'
+        '5ec96160c96062ca5f64cb5d67cc5c69cc5b6bcd596dce5870ce5672cf5574d05477d052'
+        '79d1517cd24f7ed24e81d34c83d34b86d44988d5478bd5468dd64490d64392d74195d73f'
+        '97d83e9ad83c9dd93a9fd938a2da37a5da35a7db33aadb32addc30afdc2eb2dd2cb5dd2b'
+        'b7dd29bade27bdde26bfdf24c2df22c5df21c7e01fcae01ecde01dcfe11cd2e11bd4e11a'
+        'd7e219dae218dce218dfe318e1e318e4e318e7e419e9e419ece41aeee51bf1e51cf3e51e'
+        'f6e61ff8e621fae622fde724'
+    ),
+    'plasma': (
+        '0c078610078713068915068a18068b1b068c1d068d1f058e21058f230590250591270592'
+        '2905932b05942d04942f04953104963304973404983604983804993a049a3b039a3d039b'
+        '3f039c40039c42039d44039e45039e47029f49029f4a02a04c02a14e02a14f02a25101a2'
+        '5201a35401a35601a35701a45901a45a00a55c00a55e00a55f00a66100a66200a66400a7'
+        '6500a76700a76800a76a00a76c00a86d00a86f00a87000a87200a87300a87500a87601a8'
+        '7801a87901a87b02a87c02a77e03a77f03a78104a78204a78405a68506a68607a68807a5'
+        '8908a58b09a48c0aa48e0ca48f0da3900ea3920fa29310a19511a19612a09713a099149f'
+        '9a159e9b179e9d189d9e199c9f1a9ba01b9ba21c9aa31d99a41e98a51f97a72197a82296'
+        'a92395aa2494ac2593ad2692ae2791af2890b02a8fb12b8fb22c8eb42d8db52e8cb62f8b'
+        'b7308ab83289b93388ba3487bb3586bc3685bd3784be3883bf3982c03b81c13c80c23d80'
+        'c33e7fc43f7ec5407dc6417cc7427bc8447ac94579ca4678cb4777cc4876cd4975ce4a75'
+        'cf4b74d04d73d14e72d14f71d25070d3516fd4526ed5536dd6556dd7566cd7576bd8586a'
+        'd95969da5a68db5b67dc5d66dc5e66dd5f65de6064df6163df6262e06461e16560e26660'
+        'e3675fe3685ee46a5de56b5ce56c5be66d5ae76e5ae87059e87158e97257ea7356ea7455'
+        'eb7654ec7754ec7853ed7952ed7b51ee7c50ef7d4fef7e4ef0804df0814df1824cf2844b'
+        'f2854af38649f38748f48947f48a47f58b46f58d45f68e44f68f43f69142f79241f79341'
+        'f89540f8963ff8983ef9993df99a3cfa9c3bfa9d3afa9f3afaa039fba238fba337fba436'
+        'fca635fca735fca934fcaa33fcac32fcad31fdaf31fdb030fdb22ffdb32efdb52dfdb62d'
+        'fdb82cfdb92bfdbb2bfdbc2afdbe29fdc029fdc128fdc328fdc427fdc626fcc726fcc926'
+        'fccb25fccc25fcce25fbd024fbd124fbd324fad524fad624fad824f9d924f9db24f8dd24'
+        'f8df24f7e024f7e225f6e425f6e525f5e726f5e926f4ea26f3ec26f3ee26f2f026f2f126'
+        'f1f326f0f525f0f623eff821'
+    ),
+    'rainbow': (
+        '7f00ff7d03fe7b06fe7909fe770cfe750ffe7312fe7115fe6f19fe6d1cfe6b1ffe6922fe'
+        '6725fe6528fe632bfe612efd5f31fd5d35fd5b38fd593bfd573efd5541fc5344fc5147fc'
+        '4f4afc4d4dfb4b50fb4953fb4756fb4559fa435cfa415ffa3f61fa3d64f93b67f9396af9'
+        '376df83570f83373f83175f72f78f72d7bf62b7ef62980f62783f52586f52388f4218bf4'
+        '1f8ef31d90f31b93f31995f21798f2159af1139df1119ff00fa2ef0da4ef0ba7ee09a9ee'
+        '07abed05aeed03b0ec01b2ec00b4eb02b7ea04b9ea06bbe908bde80abfe80cc1e70ec3e6'
+        '10c5e612c7e514c9e416cbe418cde31acfe21cd1e21ed2e120d4e022d6df24d7df26d9de'
+        '28dbdd2adcdc2cdedc2edfdb30e1da32e2d934e4d836e5d738e6d73ae8d63ce9d53eead4'
+        '40ecd342edd244eed146efd148f0d04af1cf4cf2ce4ef3cd50f4cc52f5cb54f6ca56f6c9'
+        '58f7c85af8c75cf9c65ef9c560fac462fac364fbc266fbc168fcc06afcbf6cfdbe6efdbd'
+        '70fdbc72febb74feba76feb978feb87afeb77cfeb57efeb480feb382feb284feb186feb0'
+        '88feaf8afeae8cfeac8efdab90fdaa92fda994fca896fca798fba59afba49cfaa39efaa2'
+        'a0f9a1a2f99fa4f89ea6f79da8f69caaf69aacf599aef498b0f397b2f295b4f194b6f093'
+        'b8ef92baee90bced8fbeec8ec0ea8cc2e98bc4e88ac6e688c8e587cae486cce284cee183'
+        'd0df82d2de80d4dc7fd6db7ed8d97cdad77bdcd67aded478e0d277e2d175e4cf74e6cd73'
+        'e8cb71eac970ecc76eeec56df0c36cf2c16af4bf69f6bd67f8bb66fab964fcb763feb461'
+        'ffb260ffb05fffae5dffab5cffa95affa759ffa457ffa256ff9f54ff9d53ff9a51ff9850'
+        'ff954eff934dff904bff8e4aff8b48ff8847ff8645ff8344ff8042ff7e41ff7b3fff783e'
+        'ff753cff733bff7039ff6d38ff6a36ff6735ff6433ff6131ff5f30ff5c2eff592dff562b'
+        'ff532aff5028ff4d27ff4a25ff4724ff4422ff4120ff3e1fff3b1dff381cff351aff3119'
+        'ff2e17ff2b15ff2814ff2512ff2211ff1f0fff1c0eff190cff150aff1209ff0f07ff0c06'
+        'ff0904ff0603ff0301ff0000'
+    ),
+    'hsv': (
+        'ff0000ff0500ff0b00ff1100ff1700ff1d00ff2300ff2900ff2f00ff3500ff3b00ff4000'
+        'ff4600ff4c00ff5200ff5800ff5e00ff6400ff6a00ff7000ff7600ff7c00ff8100ff8700'
+        'ff8d00ff9300ff9900ff9f00ffa500ffab00ffb100ffb700ffbd00ffc200ffc800ffce00'
+        'ffd400ffda00ffe000ffe600ffec00fdf100fbf500faf900f8fc00f4ff00eeff00e8ff00'
+        'e2ff00dcff00d6ff00d0ff00caff00c4ff00bfff00b9ff00b3ff00adff00a7ff00a1ff00'
+        '9bff0095ff008fff0089ff0083ff007eff0078ff0072ff006cff0066ff0060ff005aff00'
+        '54ff004eff0048ff0043ff003dff0037ff0031ff002bff0025ff001fff0019ff0013ff00'
+        '0dff0007ff0005ff0304ff0702ff0b00ff0f00ff1500ff1b00ff2100ff2700ff2d00ff33'
+        '00ff3900ff3e00ff4400ff4a00ff5000ff5600ff5c00ff6200ff6800ff6e00ff7400ff79'
+        '00ff7f00ff8500ff8b00ff9100ff9700ff9d00ffa300ffa900ffaf00ffb500ffba00ffc0'
+        '00ffc600ffcc00ffd200ffd800ffde00ffe400ffea00fff000fff500fffb00fcff00f6ff'
+        '00f0ff00eaff00e4ff00deff00d8ff00d2ff00ccff00c7ff00c1ff00bbff00b5ff00afff'
+        '00a9ff00a3ff009dff0097ff0091ff008bff0086ff0080ff007aff0074ff006eff0068ff'
+        '0062ff005cff0056ff0050ff004bff0045ff003fff0039ff0033ff002dff0027ff0021ff'
+        '001bff0015ff000fff010cff0308ff0504ff0700ff0d00ff1300ff1900ff1f00ff2500ff'
+        '2b00ff3100ff3600ff3c00ff4200ff4800ff4e00ff5400ff5a00ff6000ff6600ff6c00ff'
+        '7100ff7700ff7d00ff8300ff8900ff8f00ff9500ff9b00ffa100ffa700ffad00ffb200ff'
+        'b800ffbe00ffc400ffca00ffd000ffd600ffdc00ffe200ffe800ffee00fff300fff700fd'
+        'f900f9fb00f5fd00f1ff00ecff00e6ff00e0ff00daff00d4ff00cfff00c9ff00c3ff00bd'
+        'ff00b7ff00b1ff00abff00a5ff009fff0099ff0093ff008eff0088ff0082ff007cff0076'
+        'ff0070ff006aff0064ff005eff0058ff0052ff004dff0047ff0041ff003bff0035ff002f'
+        'ff0029ff0023ff001dff0017'
+    ),
+}
+
+
+def load_palettes():
+    """Every bundled palette as a (256, 3) uint8 array, keyed by name"""
+    return {
+        name: np.frombuffer(bytes.fromhex(data), dtype=np.uint8).reshape(PALETTE_SIZE, 3).copy()
+        for name, data in _TABLES.items()
+    }
+
+
+def _regenerate():
+    """Rewrite the tables in this file from matplotlib"""
+    import re
+    import textwrap
+
+    import matplotlib
+
+    source = open(__file__).read()
+    for name in _TABLES:
+        cmap = matplotlib.colormaps[name].resampled(PALETTE_SIZE)
+        table = cmap(np.arange(PALETTE_SIZE), bytes=True)[:, :3].astype(np.uint8)
+        chunks = textwrap.wrap(table.tobytes().hex(), 72)
+        body = ''.join(f"        '{chunk}'\n" for chunk in chunks)
+        source = re.sub(rf"    '{name}': \(\n(?:        '[0-9a-f]+'\n)+    \),",
+                        lambda _: f"    '{name}': (\n{body}    ),", source)
+    with open(__file__, 'w') as f:
+        f.write(source)
+
+
+if __name__ == "__main__":
+    _regenerate()
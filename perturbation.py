@@ -0,0 +1,276 @@
+import math
+from decimal import Decimal, localcontext
+
+import numpy as np
+from numba import njit, prange
+
+from kernels import NO_COUNTS, SMOOTH_BAILOUT, SMOOTH_EXTRA, count_row, smooth_iteration
+
+
+def compute_reference_orbit(center_x, center_y, max_iter, precision, julia_c=None):
+    """
+    Iterate a single reference point in arbitrary precision
+    Returns the orbit rounded to float64 (real and imaginary arrays)
+    """
+    with localcontext() as ctx:
+        ctx.prec = precision
+        cx = Decimal(center_x)
+        cy = Decimal(center_y)
+        four = Decimal(4)
+
+        # Mandelbrot orbits start at 0 with c = reference,
+        # Julia orbits start at the reference with the fixed constant
+        if julia_c is None:
+            zr, zi = Decimal(0), Decimal(0)
+            cr, ci = cx, cy
+        else:
+            zr, zi = cx, cy
+            cr, ci = Decimal(julia_c.real), Decimal(julia_c.imag)
+
+        orbit_r = np.zeros(max_iter + 1, dtype=np.float64)
+        orbit_i = np.zeros(max_iter + 1, dtype=np.float64)
+        orbit_r[0] = float(zr)
+        orbit_i[0] = float(zi)
+
+        length = 1
+        for n in range(1, max_iter + 1):
+            zr2 = zr * zr
+            zi2 = zi * zi
+            zi = 2 * zr * zi + ci
+            zr = zr2 - zi2 + cr
+            orbit_r[n] = float(zr)
+            orbit_i[n] = float(zi)
+            length = n + 1
+            # Keep the escaping point so pixels can reach the end of the orbit
+            if zr * zr + zi * zi > four:
+                break
+
+    return orbit_r[:length], orbit_i[:length]
+
+
+@njit(cache=True, fastmath=True)
+def series_coefficients(orbit_r, orbit_i, max_delta, is_julia, tolerance, limit):
+    """
+    Third-order series approximation of the perturbation deltas
+    Returns the largest usable skip and the A, B, C coefficients per iteration
+    """
+    coef = np.zeros((limit + 1, 3), dtype=np.complex128)
+    a = 1.0 + 0j if is_julia else 0j
+    b = 0j
+    c = 0j
+    coef[0, 0] = a
+    skip = 0
+
+    for n in range(limit):
+        z = complex(orbit_r[n], orbit_i[n])
+        next_a = 2.0 * z * a + (0.0 if is_julia else 1.0)
+        next_b = 2.0 * z * b + a * a
+        next_c = 2.0 * z * c + 2.0 * a * b
+        a, b, c = next_a, next_b, next_c
+
+        # Stop once the cubic term is no longer negligible against the quadratic one
+        if abs(c) * max_delta > tolerance * abs(b):
+            break
+        coef[n + 1, 0] = a
+        coef[n + 1, 1] = b
+        coef[n + 1, 2] = c
+        skip = n + 1
+
+    return skip, coef
+
+
+@njit(cache=True, fastmath=True)
+def series_error(orbit_r, orbit_i, coef, skip, dcr, dci, is_julia):
+    """
+    Relative error of the series approximation against direct iteration
+    Probes that escape before `skip` cannot be skipped at all
+    """
+    dc = complex(dcr, dci)
+    dz = dc if is_julia else 0j
+    for n in range(skip):
+        z = complex(orbit_r[n], orbit_i[n])
+        dz = 2.0 * z * dz + dz * dz + (0j if is_julia else dc)
+        full = complex(orbit_r[n + 1], orbit_i[n + 1]) + dz
+        if full.real * full.real + full.imag * full.imag > 4.0:
+            return np.inf
+    approx = coef[skip, 0] * dc + coef[skip, 1] * dc * dc + coef[skip, 2] * dc * dc * dc
+    scale = abs(dz)
+    if scale == 0.0:
+        return abs(approx)
+    return abs(approx - dz) / scale
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _perturb_pixel(orbit_r, orbit_i, dcr, dci, dzr, dzi, start, max_iter, is_julia,
+                   smooth=False):
+    """
+    Iterate one pixel delta against the reference orbit with rebasing
+    smooth=True returns the fractional escape count at SMOOTH_BAILOUT
+    """
+    orbit_len = orbit_r.shape[0]
+    bailout = SMOOTH_BAILOUT * SMOOTH_BAILOUT if smooth else 4.0
+    limit = max_iter + SMOOTH_EXTRA if smooth else max_iter
+    base_r = orbit_r[0]
+    base_i = orbit_i[0]
+    add_r = 0.0 if is_julia else dcr
+    add_i = 0.0 if is_julia else dci
+
+    m = start
+    for k in range(start, limit):
+        zr_ref = orbit_r[m]
+        zi_ref = orbit_i[m]
+        # dz' = 2 Z dz + dz^2 + dc
+        ndzr = 2.0 * (zr_ref * dzr - zi_ref * dzi) + dzr * dzr - dzi * dzi + add_r
+        ndzi = 2.0 * (zr_ref * dzi + zi_ref * dzr) + 2.0 * dzr * dzi + add_i
+        dzr = ndzr
+        dzi = ndzi
+        m += 1
+
+        zr = orbit_r[m] + dzr
+        zi = orbit_i[m] + dzi
+        mag = zr * zr + zi * zi
+        if mag > bailout:
+            if smooth:
+                return smooth_iteration(k, zr, zi, max_iter)
+            return k
+        if k >= max_iter - 1 and mag <= 4.0:
+            break
+
+        # Glitch detection: the pixel has drifted closer to the origin than
+        # to the reference, or the reference escaped first. Rebase onto the
+        # start of the orbit using the full value as the new delta.
+        if mag < dzr * dzr + dzi * dzi or m == orbit_len - 1:
+            dzr = zr - base_r
+            dzi = zi - base_i
+            m = 0
+
+    return max_iter - 1
+
+
+@njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def perturbation_kernel(orbit_r, orbit_i, offset_r, offset_i, step_x, step_y,
+                        width, height, max_iter, is_julia,
+                        skip, coef_a, coef_b, coef_c, out, smooth, counts):
+    """
+    Per-pixel float64 deltas iterated against a high-precision reference
+    The first `skip` iterations are taken from the series approximation;
+    smooth=True writes fractional escape counts, for a float32 `out`. A
+    (threads, 1, bins) `counts` collects per-thread escape-count histograms.
+    """
+    half_w = (width - 1) / 2.0
+    half_h = (height - 1) / 2.0
+    counting = counts.shape[0] > 0
+
+    for i in prange(height):
+        for j in range(width):
+            dcr = offset_r + (j - half_w) * step_x
+            dci = offset_i + (i - half_h) * step_y
+            d = complex(dcr, dci)
+
+            if skip > 0:
+                dz = coef_a * d + coef_b * d * d + coef_c * d * d * d
+                dzr = dz.real
+                dzi = dz.imag
+            elif is_julia:
+                dzr = dcr
+                dzi = dci
+            else:
+                dzr = 0.0
+                dzi = 0.0
+
+            out[i, j] = _perturb_pixel(
+                orbit_r, orbit_i, dcr, dci, dzr, dzi, skip, max_iter, is_julia, smooth
+            )
+        if counting:
+            count_row(counts, 0, out[i], max_iter)
+
+    return out
+
+
+class PerturbationEngine:
+    def __init__(self, series_tolerance=1e-4):
+        # Reference orbit cache, reused while panning at a fixed depth
+        self.series_tolerance = series_tolerance
+        self.reference = None
+        self.orbit_r = None
+        self.orbit_i = None
+        self.orbit_key = None
+
+    @staticmethod
+    def precision_for(span):
+        """Decimal digits needed to resolve a view of the given span"""
+        return max(30, int(-math.log10(span)) + 20)
+
+    def _reference_orbit(self, center_x, center_y, span, max_iter, julia_c):
+        precision = self.precision_for(span)
+        key = (max_iter, julia_c, precision)
+
+        # Reuse the previous reference while it stays close to the view;
+        # rebasing keeps off-center references accurate
+        if self.reference is not None and self.orbit_key == key:
+            ref_x, ref_y = self.reference
+            with localcontext() as ctx:
+                ctx.prec = precision
+                distance = max(abs(Decimal(center_x) - ref_x),
+                               abs(Decimal(center_y) - ref_y))
+            if distance < Decimal(span):
+                return self.reference
+
+        with localcontext() as ctx:
+            ctx.prec = precision
+            self.reference = (+Decimal(center_x), +Decimal(center_y))
+        self.orbit_r, self.orbit_i = compute_reference_orbit(
+            self.reference[0], self.reference[1], max_iter, precision, julia_c
+        )
+        self.orbit_key = key
+        return self.reference
+
+    def render(self, center_x, center_y, span_x, span_y, width, height,
+               max_iter, julia_c=None, series=True, out=None, smooth=False, counts=NO_COUNTS):
+        """
+        Render a view around an arbitrary-precision center
+        center_x/center_y may be Decimal, str or float; smooth=True returns
+        fractional escape counts as float32; `counts` collects histograms as
+        in perturbation_kernel
+        """
+        is_julia = julia_c is not None
+        span = max(span_x, span_y)
+        ref_x, ref_y = self._reference_orbit(center_x, center_y, span, max_iter, julia_c)
+
+        # Offset of the view center from the reference, small enough for float64
+        with localcontext() as ctx:
+            ctx.prec = self.precision_for(span)
+            offset_r = float(Decimal(center_x) - ref_x)
+            offset_i = float(Decimal(center_y) - ref_y)
+
+        step_x = span_x / (width - 1)
+        step_y = span_y / (height - 1)
+
+        skip, coef_a, coef_b, coef_c = 0, 0j, 0j, 0j
+        if series:
+            limit = max(min(max_iter - 1, self.orbit_r.shape[0] - 2), 0)
+            # Probe grid over the view, corners included
+            probes = [
+                (offset_r + sx * span_x / 2, offset_i + sy * span_y / 2)
+                for sx in np.linspace(-1, 1, 5) for sy in np.linspace(-1, 1, 5)
+            ]
+            max_delta = max(math.hypot(dx, dy) for dx, dy in probes)
+            skip, coef = series_coefficients(
+                self.orbit_r, self.orbit_i, max_delta, is_julia,
+                self.series_tolerance, limit
+            )
+            # Check the approximation against direct iteration at the probes
+            while skip > 0 and max(
+                series_error(self.orbit_r, self.orbit_i, coef, skip, dx, dy, is_julia)
+                for dx, dy in probes
+            ) > self.series_tolerance:
+                skip //= 2
+            coef_a, coef_b, coef_c = coef[skip]
+
+        if out is None:
+            out = np.zeros((height, width), dtype=np.float32 if smooth else np.uint32)
+        return perturbation_kernel(
+            self.orbit_r, self.orbit_i, offset_r, offset_i, step_x, step_y,
+            width, height, max_iter, is_julia,
+            skip, coef_a, coef_b, coef_c, out, smooth, counts
+        )
@@ -0,0 +1,122 @@
+import json
+import logging
+import time
+from collections import deque
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def frame_statistics(iterations, max_iter):
+    """Total escape count and number of pixels that reached the iteration limit"""
+    height = iterations.shape[0]
+    totals = np.zeros(height, dtype=np.int64)
+    saturated = np.zeros(height, dtype=np.int64)
+    for i in prange(height):
+        for j in range(iterations.shape[1]):
+            n = iterations[i, j]
+            totals[i] += n + 1
+            if n >= max_iter - 1:
+                saturated[i] += 1
+    return totals.sum(), saturated.sum()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class _Disabled:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_DISABLED = _Disabled()
+
+
+class FrameProfiler:
+    def __init__(self, window=240, enabled=False):
+        """
+        Per-stage timers over a rolling window of samples
+        While disabled, stage() hands out a shared no-op context and
+        nothing is measured.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+
+        # Latest frame throughput figures
+        self.counters = {}
+        self.logger = logging.getLogger('fractalforge.profile')
+
+    def stage(self, name):
+        """Context manager timing one run of a stage"""
+        if not self.enabled:
+            return _DISABLED
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def record_frame(self, iterations, max_iter, stage='kernel'):
+        """
+        Iterations per second and the fraction of pixels at max_iter
+        Throughput is the frame's total escape count over the last `stage`
+        time, so cached tiles count as free work.
+        """
+        if not self.enabled:
+            return
+        total, saturated = frame_statistics(iterations, max_iter)
+        samples = self.samples.get(stage)
+        seconds = samples[-1] if samples else 0.0
+        self.counters['iterations_per_second'] = total / seconds if seconds > 0 else 0.0
+        self.counters['max_iter_fraction'] = saturated / max(iterations.size, 1)
+
+    def percentiles(self, name, quantiles=(50, 95, 99)):
+        """Percentiles of a stage in milliseconds, or None without samples"""
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        return np.percentile(np.array(samples) * 1000, quantiles)
+
+    def summary(self):
+        """Structured snapshot of every stage and the latest counters"""
+        stages = {}
+        for name, samples in list(self.samples.items()):
+            if not samples:
+                continue
+            p50, p95, p99 = self.percentiles(name)
+            stages[name] = {
+                'last_ms': samples[-1] * 1000,
+                'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99),
+                'count': len(samples),
+            }
+        return {'stages': stages, **self.counters}
+
+    def log(self, **fields):
+        """Emit the summary, plus any extra fields, as one JSON log record"""
+        if self.enabled:
+            self.logger.info(json.dumps({**fields, **self.summary()}))
+
+    def reset(self):
+        self.samples.clear()
+        self.counters.clear()
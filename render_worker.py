@@ -0,0 +1,101 @@
+import threading
+
+import numba
+
+# TBB can hang at interpreter exit once parallel kernels have been launched
+# from a non-main thread, so prefer OpenMP when it is available
+numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+class RenderWorker:
+    def __init__(self, render_fn, discard_fn=None, ready_fn=None):
+        """
+        Background thread that renders the most recent view request
+        render_fn(request, cancelled) returns a result, or None when
+        cancelled() reported that the request was superseded.
+        discard_fn(request, result) receives finished results that are
+        dropped without being polled, so their buffers can be reused.
+        ready_fn() is called from the worker thread when a result or an
+        error is waiting to be polled.
+        """
+        self.render_fn = render_fn
+        self.discard_fn = discard_fn
+        self.ready_fn = ready_fn
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._pending = None
+        self._finished = None
+        self._error = None
+        self._busy = False
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, request):
+        """Queue a request, replacing any that has not started yet"""
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, request)
+            self._condition.notify()
+            return self._generation
+
+    def is_stale(self, generation):
+        """True once a newer request has been submitted"""
+        return generation != self._generation
+
+    @property
+    def busy(self):
+        with self._condition:
+            return self._busy or self._pending is not None
+
+    def poll(self):
+        """Return the latest finished (request, result) pair once, or None"""
+        with self._condition:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            finished, self._finished = self._finished, None
+            return finished
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                generation, request = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                result = self.render_fn(request, lambda: self.is_stale(generation))
+            except Exception as error:
+                result = None
+                with self._condition:
+                    self._error = error
+
+            dropped = None
+            ready = False
+            with self._condition:
+                self._busy = False
+                ready = self._error is not None
+                # Drop results that were superseded while rendering
+                if result is not None:
+                    if self.is_stale(generation):
+                        dropped = (request, result)
+                    else:
+                        dropped, self._finished = self._finished, (request, result)
+                        ready = True
+
+            if dropped is not None and self.discard_fn is not None:
+                self.discard_fn(*dropped)
+            if ready and self.ready_fn is not None:
+                self.ready_fn()
@@ -1,5 +1,4 @@
-import pygame
-import numpy
+import os
 
 # Display Settings
 SCREEN_WIDTH = 1280
@@ -21,7 +20,31 @@ ZOOM_FACTOR = 1.1  # More granular zoom
 
 # Fractal Defaults
 MAX_ITER = 512  # Increased from 256 for more detail
-PRECISION = numpy.float64  # High-precision floating point
+PRECISION = None  # None picks float32 or float64 from the pixel spacing; or force a dtype
+DEEP_ZOOM_THRESHOLD = 1e10  # Switch to perturbation rendering beyond this zoom
+SOLVER = 'boundary'  # 'brute' iterates every pixel, 'boundary' skips uniform regions
+FORMULA = 'mandelbrot'  # Starting formula, a name from formulas.FORMULAS
+SMOOTH_COLORING = True  # Fractional escape counts, no color bands
+COLOR_MODE = 'log'  # 'log' scales colors by escape count, 'histogram' spreads them evenly over the pixels
+ANTIALIAS = True  # Supersample pixels on edges of full-quality frames
+
+# Parallelism
+SCHEDULE = 'dynamic'  # 'static' gives each thread a block of rows, 'dynamic' hands out small chunks
+THREADS = None  # Kernel threads; None uses every core
+
+# Julia Browsing
+JULIA_ATLAS_GRID = (4, 4)  # Candidates shown by Julia Explore, columns x rows
+JULIA_PREVIEW_SIZE = (320, 240)  # Hover preview of the Julia picker
+JULIA_PREVIEW_ITER = 256  # Iterations of candidate and preview thumbnails
+
+# Tile Cache
+TILE_SIZE = 64  # Pixels per side of a cached tile
+TILE_CACHE_MB = 256  # Memory cap for cached tiles
+TILE_STORE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'fractalforge', 'tiles')  # None disables the on-disk store
+TILE_STORE_MB = 1024  # Disk cap for stored tiles and deep-zoom frames
+
+# Saved Images
+SAVE_WIDTH = 3200  # Width of images saved with S; the height follows the view's 4:3 extent
 
 # UI Layout
 UI_MARGIN = 20
@@ -33,3 +56,5 @@ QUALITY_PROFILES = {
     'interactive': {'scale': 0.5, 'iterations': 128},
     'static': {'scale': 1.0, 'iterations': 512}
 }
+REFINE_DELAY = 0.25  # Idle seconds before refining to the static profile
+IDLE_TIMEOUT = 1000  # Longest sleep (ms) waiting for events when nothing animates
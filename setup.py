@@ -12,11 +12,11 @@ setup(
         'pygame==2.6.1',
         'numpy==1.24.3',
         'numba==0.57.0',
-        'matplotlib==3.7.1',
     ],
     extras_require={
         'dev': [
             'pytest==8.0.0',
+            'matplotlib==3.7.1',
             'flake8',
         ],
     },
@@ -0,0 +1,41 @@
+import numpy as np
+from animation import Y4MSink, ZoomAnimation, interpolate_path
+from fractal_generator import FractalGenerator
+
+
+def test_path_passes_through_keyframes():
+    """The path starts and ends on keyframes and zooms geometrically"""
+    path = interpolate_path([(-0.5, 0.0, 1.0), (-0.75, 0.1, 100.0)], 5)
+
+    assert path[0] == (-0.5, 0.0, 1.0)
+    assert np.allclose(path[-1], (-0.75, 0.1, 100.0))
+    assert np.allclose([zoom for _, _, zoom in path], [1, 10 ** 0.5, 10, 10 ** 1.5, 100])
+
+
+def test_resampled_frames_match_full_renders():
+    """Frames built from their predecessor agree with rendering them from scratch"""
+    animation = ZoomAnimation(160, 90, max_iter=256, solver='brute')
+    generator = FractalGenerator(160, 90)
+    path = interpolate_path([(-0.5, 0.0, 1.0), (-0.743643887, 0.131825904, 50.0)], 20)
+
+    for x, y, zoom in path:
+        frame, max_iter = animation.render_frame(x, y, zoom, 512)
+        step = 4 / zoom / 159
+        full = generator.generate_mandelbrot(x - 79.5 * step, x + 79.5 * step,
+                                             y - 44.5 * step, y + 44.5 * step, 160, 90, max_iter)
+        assert np.mean(frame != full) < 0.01
+
+    assert animation.reused > 0
+
+
+def test_y4m_stream(tmp_path):
+    """Every frame reaches the sink through the pipeline"""
+    path = tmp_path / 'zoom.y4m'
+    animation = ZoomAnimation(64, 36, max_iter=64)
+    animation.render([(-0.5, 0.0, 1.0), (-0.7, 0.2, 4.0)], 6, Y4MSink(str(path), 64, 36, 30),
+                     queue_depth=2)
+
+    data = path.read_bytes()
+    header, _, body = data.partition(b'\n')
+    assert header.startswith(b'YUV4MPEG2 W64 H36 F30:1')
+    assert len(body) == 6 * (6 + 3 * 64 * 36)
@@ -0,0 +1,26 @@
+from benchmark import compare, measure, scaling_efficiency
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    """Only steady-state benchmarks slower than the threshold are regressions"""
+    baseline = {'results': {'kernel/a': 1.0, 'kernel/b': 1.0, 'warmup/c': 1.0, 'old': 1.0}}
+    current = {'results': {'kernel/a': 1.05, 'kernel/b': 1.5, 'warmup/c': 3.0, 'new': 1.0}}
+
+    rows, regressions = compare(baseline, current, threshold=0.1)
+
+    assert [row[0] for row in rows] == ['kernel/a', 'kernel/b', 'warmup/c']
+    assert regressions == ['kernel/b']
+
+
+def test_measure_runs_setup_before_each_call():
+    calls = []
+    seconds = measure(lambda: calls.append('run'), 3, setup=lambda: calls.append('setup'))
+
+    assert calls == ['setup', 'run'] * 3
+    assert seconds >= 0
+
+
+def test_scaling_efficiency_relative_to_one_thread():
+    results = {'kernel/a/t1': 4.0, 'kernel/a/t2': 2.5, 'kernel/a/t4': 1.0, 'warmup/b': 1.0}
+
+    assert scaling_efficiency(results) == {'kernel/a/t2': 0.8, 'kernel/a/t4': 1.0}
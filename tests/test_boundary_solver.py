@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import fractal_generator
+from fractal_generator import FractalGenerator
+
+# Views this shallow would render in float32, which skips the boundary
+# solver, so the tests below pin float64
+STANDARD_VIEWS = [
+    ((-2.5, 1.5, -1.5, 1.5), 256, False, None),
+    ((-0.76, -0.73, 0.09, 0.11), 512, False, None),
+    ((-0.4, 0.2, -0.3, 0.3), 512, False, None),
+    ((-2.0, 2.0, -1.5, 1.5), 256, True, complex(-0.4, 0.6)),
+]
+
+
+def count_calls(monkeypatch, name):
+    """Count calls to a solver entry point as fractal_generator sees it"""
+    calls = []
+    solver = getattr(fractal_generator, name)
+
+    def counted(*args, **kwargs):
+        calls.append(name)
+        return solver(*args, **kwargs)
+
+    monkeypatch.setattr(fractal_generator, name, counted)
+    return calls
+
+
+@pytest.mark.parametrize("bounds, max_iter, is_julia, julia_c", STANDARD_VIEWS)
+def test_boundary_matches_brute_force(monkeypatch, bounds, max_iter, is_julia, julia_c):
+    """Boundary tracing reproduces the brute-force kernel on standard views"""
+    calls = count_calls(monkeypatch, 'boundary_frame')
+    generator = FractalGenerator(320, 240)
+    generator.precision = np.float64
+    brute = generator.generate(*bounds, max_iter, is_julia, julia_c).copy()
+    assert not calls
+    traced = generator.generate(*bounds, max_iter, is_julia, julia_c, solver='boundary')
+    assert calls
+
+    assert traced.shape == brute.shape
+    assert np.mean(traced != brute) < 0.001
+
+
+def test_boundary_tiles_match_brute_tiles(monkeypatch):
+    """Tiled rendering gives the same frame with either solver"""
+    calls = count_calls(monkeypatch, 'boundary_tiles')
+    bounds = (-2.5, 1.5, -1.5, 1.5)
+    frames = []
+    for solver in ('brute', 'boundary'):
+        generator = FractalGenerator(256, 192, tile_size=64, solver=solver)
+        generator.precision = np.float64
+        frames.append(generator.generate_tiled(*bounds, 256))
+        assert bool(calls) == (solver == 'boundary')
+    brute, traced = frames
+
+    assert np.mean(traced != brute) < 0.001
+
+
+def test_unknown_solver():
+    """Unknown solver names are rejected"""
+    generator = FractalGenerator(64, 48)
+    with pytest.raises(ValueError):
+        generator.generate(-2, 1, -1.5, 1.5, 64, solver='magic')
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from color_handler import ColorHandler
+
+
+def test_colorize_matches_colormap():
+    """Bundled palette tables reproduce the matplotlib colormaps"""
+    cm = pytest.importorskip('matplotlib.cm')
+    handler = ColorHandler()
+    iterations = np.arange(0, 512, dtype=np.uint32).reshape(16, 32)
+
+    for name in ('viridis', 'plasma', 'rainbow', 'hsv'):
+        handler.set_colormap(name)
+        cmap = getattr(cm, name)
+        expected = cmap(np.log(iterations + 1) / np.log(513), bytes=True)[..., :3]
+        assert np.array_equal(handler.colorize(iterations, 512), expected)
+
+
+def test_colorize_into_strided_buffer():
+    """Colors can be written straight into a transposed (x, y) pixel view"""
+    handler = ColorHandler()
+    iterations = np.random.default_rng(0).integers(0, 256, (48, 64)).astype(np.uint32)
+    pixels = np.zeros((64, 48, 3), dtype=np.uint8)
+
+    result = handler.colorize(iterations, 256, out=pixels.swapaxes(0, 1))
+
+    assert np.shares_memory(result, pixels)
+    assert np.array_equal(pixels.swapaxes(0, 1), handler.colorize(iterations, 256))
+
+
+def test_phase_rotates_palette():
+    """A phase offset shifts every color along the lookup table"""
+    handler = ColorHandler()
+    lut = handler.current_lut
+    iterations = np.array([[0, 100, 255, 511]], dtype=np.uint32)
+    index = np.minimum((np.log(iterations + 1.0) / np.log(513) * len(lut)).astype(int), len(lut) - 1)
+
+    handler.phase = 0.25
+    shift = len(lut) // 4
+
+    assert np.array_equal(handler.colorize(iterations, 512), lut[(index + shift) % len(lut)])
+
+
+def test_colorize_smooth_counts():
+    """Fractional counts blend between the colors of the neighbouring integer counts"""
+    handler = ColorHandler()
+    counts = np.array([[0, 40, 100, 511]], dtype=np.uint32)
+    expected = handler.colorize(counts, 512).astype(int)
+
+    # Integer values land on table entries, up to rounding of the blend
+    assert np.abs(handler.colorize(counts.astype(np.float32), 512) - expected).max() <= 1
+
+    between = handler.colorize(np.array([[40.5]], dtype=np.float32), 512)[0, 0].astype(int)
+    low = handler.colorize(np.array([[40]], dtype=np.uint32), 512)[0, 0].astype(int)
+    high = handler.colorize(np.array([[41]], dtype=np.uint32), 512)[0, 0].astype(int)
+    assert np.all(between >= np.minimum(low, high) - 1)
+    assert np.all(between <= np.maximum(low, high) + 1)
+
+
+def test_colorize_samples_averages_colors():
+    """Anti-aliased pixels blend the colors of their samples, not their counts"""
+    handler = ColorHandler()
+    samples = np.array([[10, 10, 300, 300], [50, 50, 50, 50]], dtype=np.uint32)
+    
+    colors = handler.colorize(samples, 512).astype(np.int32)
+    blended = handler.colorize_samples(samples, 512)
+    
+    assert blended.shape == (2, 3)
+    assert np.all(np.abs(blended[0] - (colors[0, 0] + colors[0, 2]) / 2) <= 1)
+    assert np.array_equal(blended[1], colors[1, 0])
+
+
+def test_histogram_mode_spreads_a_narrow_band():
+    """Counts crowded into a few percent of the range still use the whole palette evenly"""
+    handler = ColorHandler()
+    handler.set_mode('histogram')
+    rng = np.random.default_rng(0)
+    iterations = rng.integers(3000, 3200, (120, 160)).astype(np.uint32)
+    iterations[:20] = 4999
+
+    colors = handler.colorize(iterations, 5000)
+    assert (colors[:20] == handler.current_lut[-1]).all()
+    assert len(np.unique(colors[20:].reshape(-1, 3), axis=0)) > 150
+
+    # Equal shares of the escaped pixels land in equal shares of the palette
+    position = np.argsort(iterations[20:], axis=None)
+    distance = np.abs(colors[20:].reshape(-1, 1, 3).astype(int) - handler.current_lut).sum(axis=2)
+    lut_index = distance.argmin(axis=1)
+    quartiles = np.array_split(lut_index[position], 4)
+    medians = [np.median(q) / (len(handler.current_lut) - 1) for q in quartiles]
+    assert np.allclose(medians, [0.125, 0.375, 0.625, 0.875], atol=0.05)
+
+
+def test_shared_histogram_colors_parts_like_the_whole():
+    """Strips colored with the histogram of the whole frame match coloring the frame at once"""
+    handler = ColorHandler()
+    handler.set_mode('histogram')
+    iterations = np.linspace(0, 200, 96 * 64).astype(np.float32).reshape(96, 64) ** 1.3 % 255
+    histogram = handler.histogram(iterations, 256)
+
+    whole = handler.colorize(iterations, 256)
+    parts = np.concatenate([handler.colorize(iterations[row:row + 16], 256, histogram=histogram)
+                            for row in range(0, 96, 16)])
+    assert np.array_equal(parts, whole)
+    assert not np.array_equal(handler.colorize(iterations[:16], 256), whole[:16])
@@ -0,0 +1,62 @@
+import threading
+from multiprocessing import connection
+
+import numpy as np
+import pytest
+from distributed import AUTHKEY_ENV, TileScheduler, main
+from fractal_generator import FractalGenerator
+
+VIEW = (-2.0, 1.0, -1.2, 1.2, 150, 120, 128)
+
+
+def expected():
+    return FractalGenerator.generate_mandelbrot(*VIEW)
+
+
+def flaky_worker(address, authkey):
+    """Accepts one tile and disconnects without answering"""
+    conn = connection.Client(address, authkey=authkey)
+    conn.send(('ready', 'flaky'))
+    conn.recv()
+    conn.close()
+
+
+def test_worker_processes_assemble_frame():
+    """Tiles rendered by worker processes assemble into the full frame"""
+    with TileScheduler(workers=2, tile_size=32) as scheduler:
+        image = scheduler.render(*VIEW)
+
+    assert image.shape == (120, 150)
+    assert np.mean(image != expected()) < 0.001
+    assert len(scheduler.timings) == 20
+    assert all(seconds >= 0 for _, _, seconds, _ in scheduler.timings)
+
+
+def test_lost_tiles_are_retried():
+    """A worker dropping its tile does not lose it, and idle workers steal"""
+    with TileScheduler(workers=2, tile_size=32) as scheduler:
+        threading.Thread(target=flaky_worker, args=(scheduler.address, scheduler.authkey),
+                         daemon=True).start()
+        # The flaky worker joins before the worker processes have started
+        # and is handed every tile
+        while not scheduler.workers:
+            scheduler._admit(timeout=0.1)
+
+        image = scheduler.render(*VIEW)
+
+    assert np.mean(image != expected()) < 0.001
+    assert scheduler.retries >= 1
+    assert scheduler.steals >= 1
+    assert 'flaky' not in {timing[1] for timing in scheduler.timings}
+
+
+def test_authkey_is_random_and_required_off_loopback(monkeypatch):
+    """Without a key each scheduler makes its own, and refuses to listen publicly"""
+    with TileScheduler(workers=0) as first, TileScheduler(workers=0) as second:
+        assert first.authkey != second.authkey and len(first.authkey) == 32
+
+    with pytest.raises(ValueError):
+        TileScheduler(workers=0, address=('0.0.0.0', 0))
+    monkeypatch.delenv(AUTHKEY_ENV, raising=False)
+    with pytest.raises(SystemExit):
+        main(['render', 'out.png', '--listen', '0.0.0.0:0'])
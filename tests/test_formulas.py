@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from formulas import FORMULAS, get_formula
+from fractal_generator import FractalGenerator
+from kernels import NO_COUNTS
+
+
+def test_template_matches_builtin_kernel():
+    """The generated quadratic kernel reproduces the hand-written one"""
+    generator = FractalGenerator(160, 120)
+    generator.interior_check = False
+    generator.precision = np.float64
+    kernels = get_formula('mandelbrot').kernels
+    out = np.empty((120, 160), dtype=np.uint32)
+
+    for is_julia in (False, True):
+        expected = generator.generate(-2.0, 2.0, -1.5, 1.5, 256, is_julia).copy()
+        kernels.frame_kernel(-2.0, 2.0, -1.5, 1.5, 160, 120, 256, is_julia, complex(-0.4, 0.6),
+                             True, out, False, NO_COUNTS)
+        assert np.mean(out != expected) < 0.001
+
+
+@pytest.mark.parametrize('name', sorted(FORMULAS))
+def test_formulas_render_both_modes(name):
+    """Every formula renders Mandelbrot and Julia views with a spread of counts"""
+    generator = FractalGenerator(80, 60, formula=name)
+    c = 0j if FORMULAS[name].converge else complex(-0.4, 0.6)
+    for is_julia in (False, True):
+        iterations = generator.generate(-2.0, 2.0, -1.5, 1.5, 64, is_julia, c)
+        assert iterations.max() <= 63
+        assert len(np.unique(iterations)) > 3
+
+
+def test_formula_shapes():
+    """Spot checks: the tricorn mirrors across the real axis, Newton's roots converge at once"""
+    tricorn = FractalGenerator(81, 61, formula='tricorn')
+    iterations = tricorn.generate(-2.0, 2.0, -1.5, 1.5, 64)
+    assert np.mean(iterations != iterations[::-1]) < 0.01
+
+    burning_ship = FractalGenerator(81, 61, formula='burning_ship')
+    mandelbrot = FractalGenerator(81, 61)
+    assert not np.array_equal(burning_ship.generate(-2.0, 2.0, -1.5, 1.5, 64),
+                              mandelbrot.generate(-2.0, 2.0, -1.5, 1.5, 64))
+
+    newton = get_formula('newton').kernels
+    for root in (1.0, -0.5 + 0.75 ** 0.5 * 1j, -0.5 - 0.75 ** 0.5 * 1j):
+        assert newton.escape_time(root.real, root.imag, 64, True, 0j) <= 1
+    # The step is undefined at 0, which must not raise inside the kernel
+    newton.escape_time(0.0, 0.0, 64, True, 0j)
+
+
+def test_tiled_formula_matches_frame():
+    """Formula tiles assemble into the frame kernel's result and stay apart from other formulas"""
+    generator = FractalGenerator(128, 96, tile_size=32, formula='burning_ship')
+    step = 0.03
+    bounds = (-64 * step, 63 * step, -48 * step, 47 * step)
+    tiled = generator.generate_tiled(*bounds, 128).copy()
+    direct = generator.generate(*bounds, 128)
+    assert np.mean(tiled != direct) < 0.01
+
+    generator.formula = 'mandelbrot'
+    assert not np.array_equal(generator.generate_tiled(*bounds, 128), tiled)
+
+
+def test_unknown_formula_and_deep_zoom():
+    """Unknown names are rejected, and only the quadratic family zooms deep"""
+    with pytest.raises(ValueError):
+        FractalGenerator(80, 60, formula='nope')
+    with pytest.raises(ValueError):
+        FractalGenerator(80, 60, formula='tricorn').generate_deep('-0.5', '0', 4e-12, 3e-12, 64)
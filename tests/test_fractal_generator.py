@@ -1,5 +1,7 @@
+import numba
 import numpy as np
 import pytest
+import fractal_generator
 from fractal_generator import FractalGenerator
 
 def test_fractal_generator_initialization():
@@ -15,7 +17,7 @@ def test_mandelbrot_generation():
     
     # Check basic properties of generated iterations
     assert iterations is not None
-    assert iterations.shape == (800, 600)
+    assert iterations.shape == (600, 800)
     assert np.min(iterations) >= 0
     assert np.max(iterations) <= 256
 
@@ -27,7 +29,7 @@ def test_julia_generation():
     
     # Check basic properties of generated iterations
     assert iterations is not None
-    assert iterations.shape == (800, 600)
+    assert iterations.shape == (600, 800)
     assert np.min(iterations) >= 0
     assert np.max(iterations) <= 256
 
@@ -41,4 +43,136 @@ def test_invalid_parameters():
     
     # Test invalid dimensions
     with pytest.raises(ValueError):
-        generator.generate(-2, 1, -1.5, 1.5, 256, False, None, width=-100)
+        FractalGenerator(-100, 600)
+    
+    # Test unknown solver
+    with pytest.raises(ValueError):
+        generator.generate(-2, 1, -1.5, 1.5, 256, False, solver='magic')
+
+def test_known_points():
+    """Rows run from ymin to ymax and interior points reach the iteration limit"""
+    generator = FractalGenerator(301, 201)
+    iterations = generator.generate(-2.0, 1.0, -1.0, 1.0, 256, False)
+    
+    # Pixel (i, j) samples (-2 + j / 100, -1 + i / 100)
+    assert iterations[100, 150] == 255  # c = -0.5, inside the main cardioid
+    assert iterations[100, 100] == 255  # c = -1, center of the period-2 bulb
+    assert iterations[0, 0] < 2         # c = -2 - 1i escapes immediately
+    assert iterations[100, 300] < 4     # c = 1 escapes after a few steps
+
+def test_interior_early_outs_match_full_iteration():
+    """Cardioid/bulb and periodicity checks do not change the output"""
+    bounds = (-2.5, 1.5, -1.5, 1.5, 160, 120, 256)
+    plain = FractalGenerator.generate_mandelbrot(*bounds)
+    checked = FractalGenerator.generate_mandelbrot(*bounds, True, True)
+    assert np.array_equal(plain, checked)
+
+    c = complex(-0.12, 0.75)
+    plain = FractalGenerator.generate_julia(-1.5, 1.5, -1.2, 1.2, 160, 120, 256, c)
+    checked = FractalGenerator.generate_julia(-1.5, 1.5, -1.2, 1.2, 160, 120, 256, c, True)
+    assert np.array_equal(plain, checked)
+
+def test_smooth_counts_follow_integer_counts(monkeypatch):
+    """Fractional counts are float32 and stay within one band of the integer ones"""
+    generator = FractalGenerator(301, 201)
+    # float64, since the boundary solver is skipped in float32
+    generator.precision = np.float64
+    counts = generator.generate(-2.0, 1.0, -1.0, 1.0, 256, False).copy()
+    generator.smooth = True
+    smooth = generator.generate(-2.0, 1.0, -1.0, 1.0, 256, False)
+    
+    assert smooth.dtype == np.float32
+    assert smooth[100, 150] == 255  # interior points keep the limit
+    # Orbits escaping slowly along the real axis near c = -2 may lag behind
+    escaped = counts < 254
+    difference = smooth[escaped] - counts[escaped].astype(np.float32)
+    assert np.mean(np.abs(difference) <= 1.5) > 0.99
+    
+    # Tiled and boundary-traced passes agree with the plain kernel
+    traced = []
+    boundary_tiles = fractal_generator.boundary_tiles
+    monkeypatch.setattr(fractal_generator, 'boundary_tiles',
+                        lambda *args: traced.append(args) or boundary_tiles(*args))
+    generator.solver = 'boundary'
+    tiled = generator.generate_tiled(-2.0, 1.0, -1.0, 1.0, 256)
+    assert traced
+    assert tiled.dtype == np.float32
+    assert np.allclose(tiled, smooth, atol=1e-3)
+
+def test_precision_tiers():
+    """Shallow views use the float32 kernel, which agrees with float64 almost everywhere"""
+    generator = FractalGenerator(320, 240)
+    exact = generator.generate_mandelbrot(-2.5, 1.5, -1.5, 1.5, 320, 240, 256, True, True)
+    
+    iterations = generator.generate(-2.5, 1.5, -1.5, 1.5, 256, False)
+    assert generator.dtype == np.float32
+    assert np.mean(iterations == exact) > 0.99
+    assert np.mean((iterations == 255) == (exact == 255)) > 0.999
+    
+    # Past float32 resolution the float64 kernel takes over
+    generator.generate(-0.744, -0.743, 0.131, 0.132, 256, False)
+    assert generator.dtype == np.float64
+    
+    generator.precision = np.float64
+    generator.generate(-2.5, 1.5, -1.5, 1.5, 256, False)
+    assert generator.dtype == np.float64
+
+
+def test_schedules_agree():
+    """Every schedule and thread count renders the same frame and restores numba's settings"""
+    threads = numba.get_num_threads()
+    frames = []
+    for solver in ('brute', 'boundary'):
+        for schedule, count in (('static', None), ('dynamic', None), ('dynamic', 1)):
+            generator = FractalGenerator(160, 120, tile_size=32, solver=solver,
+                                         schedule=schedule, threads=count)
+            generator.precision = np.float64
+            frames.append(generator.generate(-0.2, 0.2, -0.15, 0.15, 256, False, None, solver).copy())
+            frames.append(generator.generate_tiled(-0.2, 0.2, -0.15, 0.15, 256).copy())
+            assert numba.get_num_threads() == threads
+            assert numba.get_parallel_chunksize() == 0
+    
+    for frame in frames[1:]:
+        assert np.array_equal(frame, frames[0])
+    
+    with pytest.raises(ValueError):
+        FractalGenerator(100, 100, schedule='guided')
+    with pytest.raises(ValueError):
+        FractalGenerator(100, 100, threads=0)
+
+
+def test_julia_atlas_matches_single_renders():
+    """Each atlas cell is the Julia set of its constant; unused cells stay empty"""
+    candidates = [complex(-0.4, 0.6), complex(-0.123, 0.745), complex(0.3, 0.5)]
+    generator = FractalGenerator(64, 48)
+    atlas = generator.generate_julia_atlas(candidates, 64, 48, 128).copy()
+    assert atlas.shape == (96, 128)
+    
+    for k, c in enumerate(candidates):
+        single = FractalGenerator(64, 48).generate(-2.0, 2.0, -1.5, 1.5, 128, True, c)
+        row, column = divmod(k, 2)
+        assert np.array_equal(atlas[row * 48:(row + 1) * 48, column * 64:(column + 1) * 64], single)
+    assert not atlas[48:, 64:].any()
+    
+    with pytest.raises(ValueError):
+        generator.generate_julia_atlas([], 64, 48, 128)
+
+
+def test_supersample_edges():
+    """Only pixels on an edge are resampled, the same way in every frame"""
+    generator = FractalGenerator(160, 120, tile_size=32)
+    generator.smooth = True
+    iterations = generator.generate_tiled(-0.76, -0.72, 0.1, 0.13, 512)
+    rows, cols, samples = generator.supersample_edges(iterations, 512)
+    
+    assert 0 < len(rows) < iterations.size / 2
+    assert samples.shape == (len(rows), 5)
+    assert np.array_equal(samples[:, 0], iterations[rows, cols])
+    # Subsamples stay close to the pixel they refine
+    assert np.median(np.abs(samples[:, 1:] - samples[:, :1])) < 0.1 * 512
+    
+    again = generator.supersample_edges(iterations, 512)
+    assert np.array_equal(again[2], samples)
+    
+    generator.generate_deep('-0.75', '0.1', 4e-12, 3e-12, 256)
+    assert generator.supersample_edges(generator.iterations_buffer, 256) is None
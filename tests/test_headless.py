@@ -0,0 +1,140 @@
+import os
+import tracemalloc
+import zlib
+
+import numpy as np
+import pytest
+import headless
+from color_handler import ColorHandler
+from fractal_generator import FractalGenerator
+from headless import main, render_image, render_strips
+from image_writer import PNGWriter
+from kernels import histogram_bins
+
+
+def read_png(path):
+    """Decode an unfiltered 8-bit RGB PNG"""
+    data = open(path, 'rb').read()
+    pos, idat = 8, b''
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], 'big')
+        kind = data[pos + 4:pos + 8]
+        if kind == b'IHDR':
+            width = int.from_bytes(data[pos + 8:pos + 12], 'big')
+            height = int.from_bytes(data[pos + 12:pos + 16], 'big')
+        elif kind == b'IDAT':
+            idat += data[pos + 8:pos + 8 + length]
+        pos += length + 12
+    rows = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, -1)
+    assert not rows[:, 0].any()
+    return rows[:, 1:].reshape(height, width, 3)
+
+
+def test_strips_match_full_frame():
+    """Strips, including a cropped last one, tile the full-frame render"""
+    strips = [(row, iterations.copy()) for row, iterations, _ in
+              render_strips('-0.5', '0', 3.0, 160, 100, 128, strip_height=32, solver='brute')]
+    image = np.concatenate([iterations for _, iterations in strips])
+
+    # A view this shallow renders in float32
+    step = 3.0 / 159
+    direct = FractalGenerator(160, 100).generate_mandelbrot(
+        -2.0, 1.0, -49.5 * step, 49.5 * step, 160, 100, 128, precision=np.float32
+    )
+
+    assert [row for row, _ in strips] == [0, 32, 64, 96]
+    assert image.shape == (100, 160)
+    assert np.mean(image != direct) < 0.001
+
+
+def test_png_and_npy_outputs_agree(tmp_path):
+    """Streamed PNG and memory-mapped outputs hold the same pixels"""
+    args = ['--size', '96', '70', '--iterations', '64', '--strip-height', '16']
+    main([str(tmp_path / 'out.png')] + args)
+    main([str(tmp_path / 'out.npy')] + args)
+
+    png = read_png(tmp_path / 'out.png')
+    npy = np.load(tmp_path / 'out.npy')
+
+    assert png.shape == (70, 96, 3)
+    assert np.array_equal(png, npy)
+    assert len(np.unique(png.reshape(-1, 3), axis=0)) > 1
+
+
+def test_threaded_png_matches_direct(tmp_path):
+    """Compressing on the writer thread gives the same image, buffers reused"""
+    images = []
+    for threaded in (False, True):
+        path = tmp_path / f'{threaded}.png'
+        writer = PNGWriter(path, 80, 130, threaded=threaded, queue_depth=1)
+        render_image(writer, '-0.5', '0', 3.0, 64, strip_height=8, solver='brute')
+        writer.close()
+        assert writer.rows_written == 130
+        images.append(read_png(path))
+
+    assert np.array_equal(*images)
+
+
+def test_threaded_png_memory_stays_at_a_few_strips(tmp_path):
+    """A tall image streams through the writer thread with bounded memory"""
+    strip = np.random.default_rng(0).integers(0, 256, (32, 512, 3), dtype=np.uint8)
+    writer = PNGWriter(tmp_path / 'tall.png', 512, 32 * 200, threaded=True, queue_depth=2)
+    tracemalloc.start()
+    try:
+        for _ in range(200):
+            writer.write(strip)
+        writer.close()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    image = read_png(tmp_path / 'tall.png')
+    assert image.shape == (6400, 512, 3)
+    assert np.array_equal(image[-32:], strip)
+    # A few queued and free buffers plus compressed chunks, not the 9.8 MB image
+    assert peak < 12 * strip.nbytes
+
+
+@pytest.mark.skipif(not os.path.exists('/dev/full'), reason="needs /dev/full")
+def test_threaded_png_raises_write_errors():
+    """Errors on the writer thread surface from write() or close()"""
+    strip = np.random.default_rng(0).integers(0, 256, (64, 256, 3), dtype=np.uint8)
+    writer = PNGWriter('/dev/full', 256, 64 * 100, threaded=True)
+    with pytest.raises(OSError):
+        for _ in range(100):
+            writer.write(strip)
+        writer.close()
+
+
+def test_incomplete_images_are_not_left_behind(tmp_path, monkeypatch):
+    """A short PNG gets no IEND chunk, and a failed render removes its file"""
+    strip = np.zeros((16, 32, 3), dtype=np.uint8)
+    writer = PNGWriter(str(tmp_path / 'short.png'), 32, 64)
+    writer.write(strip)
+    with pytest.raises(ValueError):
+        writer.close()
+    assert not (tmp_path / 'short.png').read_bytes().endswith(b'IEND\xaeB`\x82')
+
+    def failing(writer, *args):
+        writer.write(np.zeros((16, 96, 3), dtype=np.uint8))
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(headless, 'render_image', failing)
+    for name in ('out.png', 'out.npy', 'out.raw'):
+        with pytest.raises(RuntimeError):
+            main([str(tmp_path / name), '--size', '96', '70'])
+        assert not (tmp_path / name).exists()
+
+
+def test_equalized_strips_share_the_image_histogram(tmp_path):
+    """Strip kernels add up the histogram of the whole image, cropped rows excluded"""
+    histogram = np.zeros(histogram_bins(128), dtype=np.int64)
+    strips = [iterations.copy() for _, iterations, _ in
+              render_strips('-0.5', '0', 3.0, 96, 70, 128, strip_height=16, histogram=histogram)]
+    assert np.array_equal(histogram, ColorHandler().histogram(np.concatenate(strips), 128))
+
+    args = ['--size', '96', '70', '--iterations', '128', '--equalize']
+    main([str(tmp_path / 'strips.npy'), '--strip-height', '16'] + args)
+    main([str(tmp_path / 'whole.npy'), '--strip-height', '70'] + args)
+    strips, whole = np.load(tmp_path / 'strips.npy'), np.load(tmp_path / 'whole.npy')
+    assert np.mean(np.any(strips != whole, axis=2)) < 0.01
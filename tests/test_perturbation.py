@@ -0,0 +1,33 @@
+import numpy as np
+from fractal_generator import FractalGenerator
+from perturbation import compute_reference_orbit
+
+
+def test_reference_orbit_escape():
+    """Reference orbit stops at the first escaping point"""
+    orbit_r, orbit_i = compute_reference_orbit('1.0', '0.0', 100, 30)
+    # 0 -> 1 -> 2 -> 5 escapes
+    assert orbit_r.tolist() == [0.0, 1.0, 2.0, 5.0]
+    assert np.all(orbit_i == 0)
+
+
+def test_perturbation_matches_direct_kernel():
+    """Perturbation output agrees with the float64 kernel at shallow zoom"""
+    generator = FractalGenerator(160, 120)
+    direct = generator.generate(-2.5, 1.5, -1.5, 1.5, 256, False).copy()
+    deep = generator.generate_deep('-0.5', '0.0', 4.0, 3.0, 256, False)
+
+    assert deep.shape == (120, 160)
+    assert np.mean(deep != direct) < 0.01
+
+
+def test_deep_zoom_resolves_detail():
+    """Views far beyond float64 resolution still contain structure"""
+    generator = FractalGenerator(64, 48)
+    iterations = generator.generate_deep(
+        '-0.743643887037158704752191506114774',
+        '0.131825904205311970493132056385139',
+        1e-20, 0.75e-20, 20000
+    )
+
+    assert len(np.unique(iterations)) > 100
@@ -0,0 +1,28 @@
+import numpy as np
+from profiler import FrameProfiler, frame_statistics
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = FrameProfiler()
+    with profiler.stage('kernel'):
+        pass
+    profiler.record_frame(np.zeros((4, 4), dtype=np.uint32), 16)
+
+    assert profiler.stage('a') is profiler.stage('b')
+    assert profiler.summary() == {'stages': {}}
+
+
+def test_stage_percentiles_and_frame_counters():
+    """Stages keep a rolling window; frame counters describe the last frame"""
+    profiler = FrameProfiler(window=100, enabled=True)
+    for ms in range(1, 201):
+        profiler.record('kernel', ms / 1000)
+    iterations = np.array([[0, 9], [9, 4]], dtype=np.uint32)
+    profiler.record_frame(iterations, 10)
+
+    stats = profiler.summary()
+    assert stats['stages']['kernel']['count'] == 100
+    assert np.isclose(stats['stages']['kernel']['p50_ms'], 150.5)
+    assert stats['max_iter_fraction'] == 0.5
+    assert np.isclose(stats['iterations_per_second'], 26 / 0.2)
+    assert frame_statistics(iterations, 10) == (26, 2)
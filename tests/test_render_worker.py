@@ -0,0 +1,60 @@
+import threading
+import time
+from render_worker import RenderWorker
+
+
+def wait_for(worker, timeout=5.0):
+    deadline = time.time() + timeout
+    while worker.busy and time.time() < deadline:
+        time.sleep(0.01)
+    return worker.poll()
+
+
+def test_latest_request_wins():
+    """Requests superseded while rendering are cancelled and dropped"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def render(request, cancelled):
+        if request == 'slow':
+            started.set()
+            release.wait()
+            return None if cancelled() else request
+        return request
+
+    worker = RenderWorker(render)
+    worker.submit('slow')
+    started.wait()
+    worker.submit('fast')
+    release.set()
+
+    assert wait_for(worker) == ('fast', 'fast')
+    assert worker.poll() is None
+    worker.stop()
+
+
+def test_render_errors_reach_the_caller():
+    """Exceptions raised on the worker thread are re-raised by poll"""
+    def render(request, cancelled):
+        raise RuntimeError(request)
+
+    worker = RenderWorker(render)
+    worker.submit('boom')
+    try:
+        wait_for(worker)
+    except RuntimeError as error:
+        assert str(error) == 'boom'
+    else:
+        raise AssertionError("expected the render error")
+    worker.stop()
+
+
+def test_ready_callback_wakes_the_caller():
+    """ready_fn fires once a result can be polled, so the caller may sleep"""
+    ready = threading.Event()
+    worker = RenderWorker(lambda request, cancelled: request, ready_fn=ready.set)
+    worker.submit('frame')
+
+    assert ready.wait(5.0)
+    assert worker.poll() == ('frame', 'frame')
+    worker.stop()
@@ -0,0 +1,170 @@
+from decimal import Decimal
+
+import numpy as np
+import fractal_generator
+from color_handler import ColorHandler
+from fractal_generator import FractalGenerator
+from tile_cache import TileCache, TileStore
+
+
+def test_lru_eviction_respects_memory_cap():
+    """Least recently used tiles are evicted once the cap is exceeded"""
+    cache = TileCache(max_bytes=3 * 64)
+    for key in range(3):
+        cache.put(key, np.zeros(16, dtype=np.uint32))
+    cache.get(0)
+    cache.put(3, np.zeros(16, dtype=np.uint32))
+
+    assert 0 in cache and 1 not in cache
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_tiled_frame_matches_direct_kernel():
+    """Assembled tiles reproduce the full-frame kernel on the snapped view"""
+    generator = FractalGenerator(200, 150, tile_size=32)
+    step = 3.0 / 149
+    xmin, ymin = -80 * step, -75 * step
+    xmax, ymax = xmin + 199 * step, ymin + 149 * step
+
+    tiled = generator.generate_tiled(xmin, xmax, ymin, ymax, 128)
+    direct = generator.generate_mandelbrot(xmin, xmax, ymin, ymax, 200, 150, 128)
+
+    assert tiled.shape == (150, 200)
+    assert np.mean(tiled != direct) < 0.001
+
+
+def test_pan_renders_only_exposed_tiles():
+    """Panning by one tile column only renders that column"""
+    generator = FractalGenerator(128, 128, tile_size=32)
+    step = 0.01
+    generator.generate_tiled(0, 127 * step, 0, 127 * step, 64)
+    rendered = len(generator.tile_cache)
+
+    generator.generate_tiled(32 * step, 159 * step, 0, 127 * step, 64)
+    assert len(generator.tile_cache) - rendered == 4
+
+
+def test_pan_through_inexact_center_keeps_the_grid():
+    """Pans the way the explorer does still only render exposed tiles"""
+    generator = FractalGenerator(128, 96, tile_size=32)
+    x, y, zoom = Decimal('-0.7436438870371'), Decimal('0.1318259042'), 3.7
+    width, height = 4 / zoom, 3 / zoom
+    rows = None
+    for _ in range(6):
+        rendered = len(generator.tile_cache)
+        generator.generate_tiled(float(x) - width / 2, float(x) + width / 2,
+                                 float(y) - height / 2, float(y) + height / 2, 64,
+                                 span=(width, height))
+        if rows is None:
+            rows = len({key[-1] for key in generator.tile_cache.tiles})
+        else:
+            assert len(generator.tile_cache) - rendered == rows
+        x += Decimal(32 * width / 127)
+
+
+def test_refined_pass_reuses_coarse_samples():
+    """A fine pass seeded from a coarse pass matches an unseeded render"""
+    bounds = (-2.5, 1.5, -1.5, 1.5)
+    seeded = FractalGenerator(160, 120, tile_size=32)
+    coarse = seeded.generate_tiled(*bounds, 64, scale=0.5)
+    refined = seeded.generate_tiled(*bounds, 256)
+
+    fresh = FractalGenerator(160, 120, tile_size=32)
+    expected = fresh.generate_tiled(*bounds, 256)
+
+    assert coarse.shape == (60, 80)
+    assert np.array_equal(refined, expected)
+
+
+def test_tile_store_persists_and_evicts(tmp_path):
+    """Stored tiles outlive the store object; old files go once over the size cap"""
+    store = TileStore(str(tmp_path), max_bytes=3 * (16 + 64 * 4))
+    for key in range(4):
+        store.put(('tile', key), np.full((8, 8), key, dtype=np.float32))
+    store.flush()
+
+    reopened = TileStore(str(tmp_path), store.max_bytes)
+    assert len(reopened) == 3 and ('tile', 0) not in reopened
+    tile = reopened.get(('tile', 3))
+    assert tile.dtype == np.float32 and np.array_equal(tile, np.full((8, 8), 3))
+
+
+def test_restarted_generator_reads_stored_tiles(tmp_path, monkeypatch):
+    """A new generator on the same store renders a revisited view without computing it"""
+    traced = []
+    boundary_tiles = fractal_generator.boundary_tiles
+    monkeypatch.setattr(fractal_generator, 'boundary_tiles',
+                        lambda *args: traced.append(args) or boundary_tiles(*args))
+
+    def generator(tile_size, store):
+        # float64, since the boundary solver is skipped in float32
+        generator = FractalGenerator(160, 120, tile_size=tile_size, solver='boundary')
+        generator.precision = np.float64
+        generator.tile_store = store
+        return generator
+
+    bounds = (-2.5, 1.5, -1.5, 1.5)
+    first = generator(32, TileStore(str(tmp_path), 1 << 30))
+    expected = first.generate_tiled(*bounds, 256).copy()
+    deep = first.generate_deep('-0.745', '0.1', 4e-12, 3e-12, 256).copy()
+    first.tile_store.flush()
+    assert traced
+
+    traced.clear()
+    second = generator(32, TileStore(str(tmp_path), 1 << 30))
+    assert np.array_equal(second.generate_tiled(*bounds, 256), expected)
+    assert np.array_equal(second.generate_deep('-0.745', '0.1', 4e-12, 3e-12, 256), deep)
+    assert second.tile_store.misses == 0
+    assert not traced
+
+    # Another tile size or solver does not reuse them
+    third = generator(64, second.tile_store)
+    third.generate_tiled(*bounds, 256)
+    assert third.tile_store.misses > 0
+    assert traced
+
+
+def test_revisited_view_reuses_stored_tiles(tmp_path):
+    """Coming back to a view from another center reads the store without adding to it"""
+    zoom = 1.1 ** 40
+    width, height = 4 / zoom, 3 / zoom
+    y = Decimal('0.1')
+
+    def render(generator, x):
+        generator.generate_tiled(float(x) - width / 2, float(x) + width / 2,
+                                 float(y) - height / 2, float(y) + height / 2, 128,
+                                 span=(width, height))
+
+    x = Decimal('-0.7436438870371')
+    first = FractalGenerator(128, 96, tile_size=32)
+    first.tile_store = TileStore(str(tmp_path), 1 << 30)
+    render(first, x)
+    for _ in range(10):
+        x += Decimal(width / 7)
+        render(first, x)
+    first.tile_store.flush()
+    stored = len(first.tile_store)
+
+    second = FractalGenerator(128, 96, tile_size=32)
+    second.tile_store = TileStore(str(tmp_path), 1 << 30)
+    render(second, Decimal('-0.7436438870371') + Decimal(width / 3))
+    assert second.tile_store.misses == 0
+    second.tile_store.flush()
+    assert len(second.tile_store) == stored
+
+
+def test_tile_histograms_sum_to_frame_histogram():
+    """Per-tile histograms of a tile-aligned view add up to the frame's, also from the cache"""
+    generator = FractalGenerator(128, 96, tile_size=32)
+    generator.equalize = True
+    step = 0.025
+    bounds = (-64 * step, 63 * step, -32 * step, 63 * step)
+    iterations = generator.generate_tiled(*bounds, 256)
+
+    handler = ColorHandler()
+    expected = handler.histogram(iterations, 256)
+    assert np.array_equal(generator.histogram, expected)
+    assert expected.sum() > 0
+
+    generator.generate_tiled(*bounds, 256)
+    assert np.array_equal(generator.histogram, expected)
@@ -0,0 +1,36 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from ui_components import Button, TextCache, UILayer
+
+pygame.init()
+
+
+def test_text_cache_reuses_surfaces():
+    """Repeated text is rendered once; old entries are dropped past the cap"""
+    cache = TextCache(max_entries=2)
+    first = cache.render("Reset", (255, 255, 255))
+
+    assert cache.render("Reset", (255, 255, 255)) is first
+    assert cache.render("Reset", (0, 0, 0)) is not first
+    cache.render("Colors", (255, 255, 255))
+    assert len(cache.surfaces) == 2
+    assert cache.font(24) is cache.font(24)
+
+
+def test_ui_layer_repaints_only_on_change():
+    button = Button(10, 10, 120, 40, "Reset", lambda: None)
+    layer = UILayer([button])
+    screen = pygame.Surface((200, 100))
+
+    layer.draw(screen)
+    cached = layer.surface.copy()
+    layer.surface.fill((0, 0, 0, 0))
+    layer.draw(screen)
+    assert layer.surface.get_at((60, 30)).a == 0  # unchanged, not repainted
+
+    button.hovered = True
+    layer.draw(screen)
+    assert layer.surface.get_at((60, 30)) != cached.get_at((60, 30))
@@ -0,0 +1,36 @@
+import numpy as np
+from color_handler import ColorHandler
+from fractal_generator import FractalGenerator
+from warmup import signatures, start_warmup
+
+
+def test_warmup_covers_render_path():
+    """Rendering and coloring like the explorer compiles nothing after warm-up"""
+    start_warmup().join()
+    compiled = {dispatcher: len(dispatcher.signatures) for dispatcher, _ in signatures()}
+
+    handler = ColorHandler()
+    pixels = np.zeros((80, 60, 3), dtype=np.uint8)
+    for mode in ('log', 'histogram'):
+        handler.set_mode(mode)
+        for solver in ('boundary', 'brute'):
+            for smooth in (False, True):
+                for zoom in (1.0, 1e4):
+                    generator = FractalGenerator(80, 60, tile_size=32, solver=solver)
+                    generator.smooth = smooth
+                    generator.equalize = mode == 'histogram'
+                    iterations = generator.generate_tiled(
+                        -0.745 - 2 / zoom, -0.745 + 2 / zoom, 0.1 - 1.5 / zoom, 0.1 + 1.5 / zoom, 256
+                    )
+                    handler.colorize(iterations, 256, out=pixels.swapaxes(0, 1),
+                                     histogram=generator.histogram)
+                    rows, cols, samples = generator.supersample_edges(iterations, 256)
+                    handler.colorize_samples(samples, 256, histogram=generator.histogram)
+    FractalGenerator(80, 60).generate_deep('-0.745', '0.1', 4e-12, 3e-12, 256)
+    for smooth in (False, True):
+        generator = FractalGenerator(80, 60)
+        generator.smooth = smooth
+        generator.generate_julia_atlas([complex(-0.4, 0.6)] * 3, 40, 30, 256)
+
+    for dispatcher, count in compiled.items():
+        assert len(dispatcher.signatures) == count, dispatcher.py_func.__name__
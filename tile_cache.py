@@ -0,0 +1,208 @@
+import hashlib
+import mmap
+import os
+import queue
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Stored tile files start with the dtype string and the shape
+TILE_HEADER = struct.Struct('<8sII')
+
+
+class TileCache:
+    def __init__(self, max_bytes):
+        # Least recently used tiles sit at the front
+        self.tiles = OrderedDict()
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __contains__(self, key):
+        return key in self.tiles
+
+    def get(self, key):
+        """Return a cached tile (marking it recently used) or None"""
+        tile = self.tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            return None
+        self.tiles.move_to_end(key)
+        self.hits += 1
+        return tile
+
+    def put(self, key, tile):
+        """Store a tile, evicting least recently used ones over the memory cap"""
+        if key in self.tiles:
+            self.nbytes -= self.tiles.pop(key).nbytes
+        self.tiles[key] = tile
+        self.nbytes += tile.nbytes
+
+        while self.nbytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        self.tiles.clear()
+        self.nbytes = 0
+
+
+
+class TileStore:
+    def __init__(self, directory, max_bytes):
+        """
+        Tiles persisted as files that outlive the process
+        Each 2D array is one file, named by a hash of its key: a small
+        header followed by the raw values, which get() memory maps.
+        Writes happen on a background thread; the least recently used
+        files (by modification time, which every hit refreshes) are deleted
+        once the directory exceeds max_bytes.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        # Index of stored files, least recently used first, with their sizes
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.tile'):
+                entries.append((entry.stat().st_mtime, entry.name, entry.stat().st_size))
+            elif entry.name.endswith('.tmp') and entry.stat().st_mtime < time.time() - 3600:
+                # Left behind by a process that exited mid-write
+                os.remove(entry.path)
+        self.files = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.nbytes = sum(self.files.values())
+        self.lock = threading.Lock()
+
+        # Tiles waiting for the writer thread, by file name
+        self.pending = {}
+        self.queue = queue.Queue()
+        self.writer = None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, key):
+        name = self._name(key)
+        return name in self.files or name in self.pending
+
+    @staticmethod
+    def _name(key):
+        # numpy scalars print differently from Python ones, so hash plain values
+        plain = tuple(part.item() if isinstance(part, np.generic) else part for part in key)
+        return hashlib.blake2b(repr(plain).encode(), digest_size=16).hexdigest() + '.tile'
+
+    def get(self, key):
+        """Return a read-only view of a stored tile (marking it recently used) or None"""
+        name = self._name(key)
+        tile = self.pending.get(name)
+        if tile is not None:
+            self.hits += 1
+            return tile
+        if name not in self.files:
+            self.misses += 1
+            return None
+
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            dtype, rows, cols = TILE_HEADER.unpack_from(mapped)
+            tile = np.frombuffer(mapped, np.dtype(dtype.rstrip(b'\0').decode()),
+                                 rows * cols, TILE_HEADER.size).reshape(rows, cols)
+            os.utime(path)
+        except (OSError, ValueError, TypeError, struct.error):
+            # Deleted or truncated by another process
+            with self.lock:
+                if name in self.files:
+                    self.nbytes -= self.files.pop(name)
+            self.misses += 1
+            return None
+
+        with self.lock:
+            if name in self.files:
+                self.files.move_to_end(name)
+        self.hits += 1
+        return tile
+
+    def put(self, key, tile):
+        """Queue a 2D tile (copied) for writing"""
+        name = self._name(key)
+        self.pending[name] = np.array(tile)
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_tiles, name='tile-store', daemon=True)
+            self.writer.start()
+        self.queue.put(name)
+
+    def flush(self):
+        """Wait until every queued tile is on disk"""
+        self.queue.join()
+
+    def _write_tiles(self):
+        while True:
+            name = self.queue.get()
+            try:
+                tile = self.pending.get(name)
+                if tile is not None:
+                    self._write(name, tile)
+                    if self.pending.get(name) is tile:
+                        del self.pending[name]
+            except OSError:
+                # A full or removed directory only costs the stored copy
+                self.pending.pop(name, None)
+            finally:
+                self.queue.task_done()
+
+    def _write(self, name, tile):
+        path = os.path.join(self.directory, name)
+        rows, cols = tile.shape
+        header = TILE_HEADER.pack(tile.dtype.str.encode(), rows, cols)
+
+        # Write under a temporary name so readers never see a partial file
+        fd, temp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        with os.fdopen(fd, 'wb') as file:
+            file.write(header)
+            file.write(np.ascontiguousarray(tile).data)
+        os.replace(temp, path)
+        size = TILE_HEADER.size + tile.nbytes
+
+        with self.lock:
+            if name in self.files:
+                self.nbytes -= self.files.pop(name)
+            self.files[name] = size
+            self.nbytes += size
+            evicted = []
+            while self.nbytes > self.max_bytes and len(self.files) > 1:
+                old, old_size = self.files.popitem(last=False)
+                self.nbytes -= old_size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        self.flush()
+        with self.lock:
+            for name in self.files:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+            self.files.clear()
+            self.nbytes = 0
@@ -1,8 +1,39 @@
+from collections import OrderedDict
+
 import pygame
 import numpy as np
 from pygame.locals import *
 from settings import COLORS
 
+class TextCache:
+    def __init__(self, max_entries=256):
+        """Rendered text surfaces keyed by string and style, fonts created once"""
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.max_entries = max_entries
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, color, size=24, antialias=True):
+        key = (text, tuple(color), size, antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(size).render(text, antialias, color)
+            self.surfaces[key] = surface
+            # Drop the least recently used text, e.g. old coordinates
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+# Shared by every UI component
+text_cache = TextCache()
+
 class Button:
     def __init__(self, x, y, width, height, text, callback):
         self.rect = pygame.Rect(x, y, width, height)
@@ -10,12 +41,16 @@ class Button:
         self.callback = callback
         self.hovered = False
 
-    def draw(self, surface):
+    def appearance(self):
+        """Everything draw() depends on"""
+        return (self.text, self.hovered)
+
+    def draw(self, surface, origin=(0, 0)):
+        rect = self.rect.move(-origin[0], -origin[1])
         color = COLORS['hover'] if self.hovered else COLORS['ui']
-        pygame.draw.rect(surface, color, self.rect, border_radius=5)
-        font = pygame.font.Font(None, 24)
-        text_surf = font.render(self.text, True, COLORS['text'])
-        text_rect = text_surf.get_rect(center=self.rect.center)
+        pygame.draw.rect(surface, color, rect, border_radius=5)
+        text_surf = text_cache.render(self.text, COLORS['text'])
+        text_rect = text_surf.get_rect(center=rect.center)
         surface.blit(text_surf, text_rect)
 
     def handle_event(self, event):
@@ -33,12 +68,16 @@ class Slider:
         self.callback = callback
         self.dragging = False
 
-    def draw(self, surface):
+    def appearance(self):
+        return (self.value,)
+
+    def draw(self, surface, origin=(0, 0)):
+        rect = self.rect.move(-origin[0], -origin[1])
         # Track
-        pygame.draw.rect(surface, COLORS['ui'], self.rect, border_radius=3)
+        pygame.draw.rect(surface, COLORS['ui'], rect, border_radius=3)
         # Thumb
-        pos = self.rect.left + (self.value - self.min)/(self.max - self.min) * self.rect.width
-        pygame.draw.circle(surface, COLORS['neon'], (int(pos), self.rect.centery), 8)
+        pos = rect.left + (self.value - self.min)/(self.max - self.min) * rect.width
+        pygame.draw.circle(surface, COLORS['neon'], (int(pos), rect.centery), 8)
 
     def handle_event(self, event):
         if event.type == MOUSEBUTTONDOWN and self.rect.collidepoint(event.pos):
@@ -51,10 +90,39 @@ class Slider:
                                self.min, self.max)
             self.callback(self.value)
 
+class UILayer:
+    def __init__(self, elements):
+        """
+        Elements composited into one cached surface
+        It is repainted only when an element's appearance changes, so an
+        idle frame costs a single blit.
+        """
+        self.elements = elements
+        self.rect = elements[0].rect.unionall([element.rect for element in elements[1:]])
+        self.rect.inflate_ip(2, 2)
+        self.surface = pygame.Surface(self.rect.size, SRCALPHA)
+        self.key = None
+
+    def needs_repaint(self):
+        return tuple(element.appearance() for element in self.elements) != self.key
+
+    def draw(self, surface):
+        key = tuple(element.appearance() for element in self.elements)
+        if key != self.key:
+            self.surface.fill((0, 0, 0, 0))
+            for element in self.elements:
+                element.draw(self.surface, self.rect.topleft)
+            self.key = key
+        surface.blit(self.surface, self.rect)
+
 class HUD:
     def __init__(self):
-        self.font = pygame.font.Font(None, 24)
+        self.font = text_cache.font(24)
         self.visible = True
+        
+        # The text block is re-rendered only when one of its lines changes
+        self.lines = None
+        self.surface = None
 
     def draw(self, surface, mouse_pos, view_params):
         if not self.visible:
@@ -70,6 +138,7 @@ class HUD:
             f"Zoom: {view_params['zoom']:.1f}x",
             f"Iterations: {view_params['iterations']}",
             f"Mode: {'Julia' if view_params.get('julia', False) else 'Mandelbrot'}",
+            f"Formula: {view_params.get('formula', 'mandelbrot')}",
             f"Julia C: {view_params.get('julia_c', 'N/A')}" if view_params.get('julia', False) else "",
             "",
             "Controls:",
@@ -80,14 +149,43 @@ class HUD:
             "Right click - Reset view",
             "R - Reset view",
             "J - Toggle Julia/Mandelbrot",
+            "N - Next formula",
+            "M - Julia picker (hover to preview)",
             "C - Cycle colors",
+            "H - Histogram coloring",
+            "A - Anti-aliasing",
+            "P - Animate palette",
+            "F - Performance overlay",
             "S - Save image",
             "Q - Quit"
         ]
         
-        y = 10
+        if lines != self.lines:
+            # Skip empty lines
+            texts = [text_cache.render(line, COLORS['text']) for line in lines if line]
+            width = max(text.get_width() for text in texts)
+            self.surface = pygame.Surface((width, 25 * len(texts)), SRCALPHA)
+            for row, text in enumerate(texts):
+                # Copy the text's own alpha instead of blending onto transparency
+                self.surface.blit(text, (0, 25 * row), special_flags=BLEND_RGBA_MAX)
+            self.lines = lines
+        surface.blit(self.surface, (10, 10))
+
+    def draw_stats(self, surface, stats, fps):
+        """Performance panel: per-stage percentiles and kernel throughput"""
+        lines = [f"FPS: {fps:.1f}", "Stage      p50 / p95 / p99 ms"]
+        for name, stage in stats['stages'].items():
+            lines.append(
+                f"{name:<10} {stage['p50_ms']:6.2f} / {stage['p95_ms']:6.2f} / {stage['p99_ms']:6.2f}"
+            )
+        if 'iterations_per_second' in stats:
+            lines.append(f"Kernel: {stats['iterations_per_second'] / 1e6:.0f} M iterations/s")
+            lines.append(f"At max_iter: {stats['max_iter_fraction']:.1%}")
+        
+        x = surface.get_width() - 360
+        y = surface.get_height() - 10 - 25 * len(lines)
+        panel = pygame.Rect(x - 10, y - 5, 360, 25 * len(lines) + 10)
+        pygame.draw.rect(surface, COLORS['ui'], panel, border_radius=5)
         for line in lines:
-            if line:  # Skip empty lines
-                text = self.font.render(line, True, COLORS['text'])
-                surface.blit(text, (10, y))
-                y += 25
+            surface.blit(text_cache.render(line, COLORS['text']), (x, y))
+            y += 25
@@ -0,0 +1,82 @@
+"""
+Kernel compilation ahead of the first frame
+
+The kernels are compiled with cache=True, so after the first launch they
+are loaded from numba's on-disk cache instead of being compiled again.
+warm_up() compiles, or loads, the exact type signatures the explorer
+calls with; start_warmup() does it on a background thread while the window
+opens, and the first render waits on numba's compile lock only for
+whatever is still missing.
+"""
+import threading
+import time
+
+import numba
+from numba import types
+
+from boundary_solver import boundary_tiles_kernel
+from color_handler import lookup_colors, lookup_equalized_colors, lookup_smooth_colors
+from fractal_generator import (edge_mask_kernel, julia_atlas_kernel, lanes_tiles_kernel,
+                               supersample_kernel, tiles_kernel)
+from kernels import histogram_kernel
+from perturbation import perturbation_kernel
+
+# Iteration counts come out as uint32, or float32 in smooth mode
+OUTPUT_TYPES = (types.uint32, types.float32)
+
+
+def signatures():
+    """(dispatcher, argument types) for every kernel on the explorer's render path"""
+    i64, f64, flag, c128 = types.int64, types.float64, types.boolean, types.complex128
+    index = i64[::1]
+    # pygame's pixels3d array, transposed to (height, width, 3)
+    pixels = types.Array(types.uint8, 3, 'A')
+    # Per-thread histograms, or NO_COUNTS without equalize
+    counts = types.uint32[:, :, ::1]
+
+    entries = []
+    for value in OUTPUT_TYPES:
+        tiles = value[:, :, ::1]
+        tile_args = (index, index, i64, f64, f64, i64, flag, c128)
+        entries += [
+            (lanes_tiles_kernel, tile_args + (tiles, flag, flag, tiles, flag, counts)),
+            (tiles_kernel, tile_args + (tiles, flag, flag, tiles, flag, counts)),
+            (boundary_tiles_kernel, tile_args + (i64, types.UniTuple(flag, 3), tiles, flag[:, :, ::1],
+                                                 counts)),
+            (perturbation_kernel, (f64[::1], f64[::1], f64, f64, f64, f64, i64, i64, i64, flag,
+                                   i64, c128, c128, c128, value[:, ::1], flag, counts)),
+            (julia_atlas_kernel, (c128[::1], f64, f64, f64, f64, i64, i64, i64, flag, flag,
+                                  value[:, ::1], flag)),
+            (edge_mask_kernel, (value[:, ::1], i64, f64, flag[:, ::1])),
+            (supersample_kernel, (index, index, f64, f64, i64, i64, f64, f64, i64, i64, flag, c128,
+                                  flag, flag, flag, value[:, ::1], flag)),
+            (histogram_kernel, (value[:, :, ::1], i64, i64, types.uint32[:, ::1])),
+        ]
+        for out in (pixels, types.uint8[:, :, ::1]):
+            entries.append((lookup_equalized_colors, (value[:, ::1], f64[::1], i64, f64,
+                                                      types.uint8[:, ::1], i64, out)))
+    # Frames color straight into pixels, anti-aliasing samples into a new array
+    for out in (pixels, types.uint8[:, :, ::1]):
+        entries += [
+            (lookup_colors, (types.uint32[:, ::1], types.uint8[:, ::1], out)),
+            (lookup_smooth_colors, (types.float32[:, ::1], types.uint8[:, ::1], f64, i64, out)),
+        ]
+    return entries
+
+
+def warm_up():
+    """Compile or load every render-path signature; returns the seconds taken"""
+    start = time.perf_counter()
+    for dispatcher, args in signatures():
+        dispatcher.compile(args)
+    return time.perf_counter() - start
+
+
+def start_warmup():
+    """Run warm_up() on a daemon thread and return the thread"""
+    # Start the parallel thread pool from the calling thread: started from
+    # the daemon thread, TBB hangs the interpreter at exit
+    numba.get_num_threads()
+    thread = threading.Thread(target=warm_up, name='kernel-warmup', daemon=True)
+    thread.start()
+    return thread